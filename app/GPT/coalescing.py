@@ -0,0 +1,114 @@
+"""Agrupación de ráfagas de mensajes de texto por chat ("hola" / "quiero" / "2 limonadas").
+
+Cada mensaje espera ``settings.message_debounce`` segundos; si entretanto llega otro del mismo chat,
+el anterior se descarta y el nuevo vuelve a esperar, como mucho hasta
+``settings.message_debounce_max_wait`` segundos desde el primero de la ráfaga. Entonces los textos
+acumulados se unen en un único mensaje que recorre una sola vez ``handle_text`` (patrones, consultas a
+la base de datos y, si hace falta, GPT). Los fragmentos que sólo son un saludo o una despedida ("hola",
+"es todo") no se unen al resto: ``route_message`` responde al saludo o abre la calificación en cuanto
+los encuentra y el pedido se perdería; si la ráfaga no tiene nada más, se atiende el último.
+
+Si llega un mensaje mientras la ráfaga anterior todavía se está atendiendo (en la práctica, esperando
+a GPT), esa ejecución se cancela y sus textos pasan a la nueva ráfaga: la respuesta tiene en cuenta
+todo lo que el usuario escribió y no se paga una llamada a GPT cuya respuesta ya no sirve.
+
+El límite por usuario (``app.utils.admission``) se cobra una vez por ráfaga, justo antes de atenderla:
+los fragmentos de una pregunta escrita a trozos nunca se rechazan por separado.
+"""
+import asyncio
+import logging
+import re
+import time
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from app.config import settings
+from app.GPT.gpt_integration import handle_text, with_message_text
+from app.GPT.patterns import EXIT_PATTERNS, GREETING_PATTERNS
+from app.utils import metrics
+from app.utils.admission import admit_user, run_admitted
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w")
+
+
+def _is_only(patterns, text: str) -> bool:
+    """True si el texto no tiene más palabras que las de los patrones ("hola", "buenas tardes!")."""
+    remainder = text.lower()
+    for pattern in patterns:
+        remainder = re.sub(pattern, " ", remainder)
+    return _WORD.search(remainder) is None
+
+
+def merge_texts(texts) -> str:
+    """Une los textos de una ráfaga sin los fragmentos que sólo saludan o se despiden."""
+    content = [text for text in texts
+               if not (_is_only(GREETING_PATTERNS, text) or _is_only(EXIT_PATTERNS, text))]
+    return " ".join(content) if content else texts[-1]
+
+
+def _cancel_in_flight(context: ContextTypes.DEFAULT_TYPE, bot_label: str) -> None:
+    """Cancela la ráfaga que se está atendiendo y devuelve sus textos a la cola del chat."""
+    in_flight = context.chat_data.pop("message_in_flight", None)
+    if in_flight is None:
+        return
+    task, texts, message_id = in_flight
+    if task.done():
+        return
+    task.cancel()
+    context.chat_data.setdefault("pending_messages", [])[:0] = texts
+    # El mensaje unido se volverá a añadir al historial junto con los nuevos
+    history = context.chat_data.get("conversation_history", [])
+    history[:] = [entry for entry in history
+                  if not (entry.get("role") == "user" and entry.get("message_id") == message_id)]
+    metrics.inc("message_runs_cancelled_total", bot=bot_label)
+    logger.debug("Cancelled in-flight message run (%d messages)", len(texts))
+
+
+async def handle_text_burst(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Acumula los mensajes del chat y atiende la ráfaga completa cuando el usuario deja de escribir."""
+    chat_data = context.chat_data
+    # Sin sesión o a la espera de una calificación, el mensaje se atiende tal cual y en el acto
+    if (settings.message_debounce <= 0 or chat_data.get("session_closed", True)
+            or context.user_data.get('awaiting_rating') or context.user_data.get('awaiting_comment')):
+        if await admit_user(update, context):
+            await run_admitted(handle_text, update, context)
+        return
+
+    bot_label = context.bot_data["bot_config"].label
+    now = time.monotonic()
+    _cancel_in_flight(context, bot_label)
+    chat_data.setdefault("pending_messages", []).append(update.message.text)
+    burst_started_at = chat_data.setdefault("burst_started_at", now)
+    message_id = update.message.message_id
+    chat_data["latest_message_id"] = message_id
+
+    deadline = burst_started_at + settings.message_debounce_max_wait
+    await asyncio.sleep(max(0.0, min(settings.message_debounce, deadline - now)))
+    if chat_data.get("latest_message_id") != message_id:
+        # El usuario siguió escribiendo: este texto se atenderá con el último mensaje de la ráfaga
+        metrics.inc("messages_coalesced_total", bot=bot_label)
+        return
+
+    texts = chat_data.pop("pending_messages", [])
+    chat_data.pop("burst_started_at", None)
+    if not texts:
+        return
+    metrics.observe("message_burst_size", len(texts))
+    merged = update if len(texts) == 1 else with_message_text(update, merge_texts(texts))
+    if not await admit_user(merged, context):
+        return
+
+    # El hueco global de manejadores se pide ahora, no durante la espera de la ráfaga
+    task = asyncio.create_task(run_admitted(handle_text, merged, context))
+    chat_data["message_in_flight"] = (task, texts, message_id)
+    try:
+        await asyncio.wait({task})
+    finally:
+        in_flight = chat_data.get("message_in_flight")
+        if in_flight is not None and in_flight[0] is task:
+            del chat_data["message_in_flight"]
+    if not task.cancelled():
+        task.result()  # Las excepciones llegan al manejador de errores de la aplicación
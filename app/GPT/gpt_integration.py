@@ -1,15 +1,24 @@
-import os
 import re
+from decimal import Decimal
 
-import openai
-from fuzzywuzzy import process
-from sqlalchemy import select
-from telegram import Update
+from telegram import Message, Update
 from telegram.error import BadRequest
 from telegram.ext import ContextTypes
 
-from app.database import SessionLocal
-from app.models import Product
+from app.GPT.intent_classifier import get_intent_classifier
+from app.GPT.openai_client import get_openai
+from app.GPT.spelling import get_spelling_corrector
+from app.catalog_index import get_catalog_index
+from app.config import settings
+from app.semantic_search import get_semantic_index
+from app.GPT.patterns import (MENU_PATTERNS, MOST_ORDERED_PRODUCT_PATTERNS, MOST_SOLD_DRINK_PATTERNS,
+                              MOST_SOLD_SPORT_DRINK_PATTERNS, MOST_SOLD_BREAKFAST_PATTERNS, MOST_SOLD_STARTER_PATTERNS,
+                              MOST_SOLD_SECOND_COURSE_PATTERNS, MOST_SOLD_SNACK_PATTERNS,
+                              PRODUCT_BY_NAME_CATEGORY_PATTERNS, PRODUCT_ORDER_PATTERN, PRODUCT_QUANTITY_PATTERN,
+                              PRODUCT_PRICE_PATTERN, RECOMMEND_PRODUCT_PATTERNS, GREETING_PATTERNS, EXIT_PATTERNS,
+                              BUDGET_PATTERNS)
+from app.GPT.streaming import (stream_gpt_response, is_filtered_response, GPT_FILTERED_RESPONSE,
+                               GPT_ERROR_RESPONSE)
 from app.utils.keyboards import (show_categories, show_most_ordered_product, show_most_sold_drink,
                                  show_most_sold_sport_drink, show_most_sold_breakfast, show_most_sold_starter,
                                  show_most_sold_second, show_most_sold_snack, recommend_drink_by_price,
@@ -17,15 +26,36 @@ from app.utils.keyboards import (show_categories, show_most_ordered_product, sho
                                  recommend_starter_by_price, recommend_second_by_price, recommend_snack_by_price,
                                  show_product_by_name, show_product_stock_by_name, show_product_stock_by_productname,
                                  show_product_price_by_name, show_most_sold_main, show_products_by_category_name,
-                                 show_lunch_products)
+                                 show_lunch_products, show_meal_recommendations, show_similar_products,
+                                 get_products_by_name)
+from app.utils import metrics
+from app.utils.admission import Overloaded, admission, notify_rejected
+from app.utils.aliases import alias_registry
+from app.utils.circuit_breaker import CircuitOpen, DeadlineExceeded, openai_breaker
 from app.utils.logging_config import setup_logging
+from app.utils.normalization import normalize_product_name
 from app.utils.rating import handle_comment, handle_rating
+from app.utils.responses import responses
 from app.utils.rules import rules
 
 logger = setup_logging()
 
-# Configurar API de OpenAI
-openai.api_key = os.getenv("OPENAI_API_KEY")
+# Parámetros comunes de las llamadas a GPT
+GPT_COMPLETION_KWARGS = {
+    "model": "gpt-3.5-turbo",
+    "max_tokens": 150,
+    "temperature": 0.5,  # Un poco de creatividad para respuestas más naturales
+    "request_timeout": settings.openai_timeout,
+}
+
+# Similitud mínima (0-1) para aceptar un producto que no contiene el texto buscado: los umbrales de
+# siempre (fuzzywuzzy > 85 y > 70). El patrón por nombre captura texto libre ("quiero ...") y exige más
+# parecido que los de cantidad, existencias y precio
+NAME_MIN_SIMILARITY = 0.86
+PRODUCT_MIN_SIMILARITY = 0.71
+
+# Productos que se muestran cuando la búsqueda semántica responde por un nombre que no existe
+SEMANTIC_RESULTS = 5
 
 # Construir el contexto del sistema dinámicamente
 system_context = {
@@ -33,157 +63,25 @@ system_context = {
     "content": " ".join(rules)  # Une las cadenas en rules en una sola cadena
 }
 
-# Definir constantes para patrones de expresiones regulares
-MENU_PATTERNS = [
-    r'\bmen[úu]\b', r'\bcarta\b', r'\bver opciones\b', r'\bver men[úu]\b', r'\bver carta\b'
-]
-
-# Expresiones regulares para obtener el producto más pedido
-MOST_ORDERED_PRODUCT_PATTERNS = [
-    r'\bproducto m[aá]s pedido\b', r'\borden m[aá]s pedida\b', r'\bproducto m[aá]s vendido\b',
-    r'\borden m[aá]s vendida\b', r'\bcu[aá]l es el producto más pedido\b', r'\bcu[aá]l es el producto m[aá]s popular\b',
-    r'\bcu[aá]l es el producto m[aá]s vendido\b', r'\bcu[aá]l es la orden m[aá]s pedida\b',
-    r'\bcu[aá]l es el pedido m[aá]s popular\b', r'\bcu[aá]l es la venta m[aá]s popular\b',
-    r'\bcu[aá]l es la orden m[aá]s vendida\b', r'\bcu[aá]l es la venta m[aá]s vendida\b',
-]
-
-MOST_SOLD_DRINK_PATTERNS = [
-    r'\bbebida m[aá]s vendida\b', r'\bbebida m[aá]s popular\b', r'\bbebida m[aá]s pedida\b',
-    r'\bcu[aá]l es la bebida más vendida\b', r'\bcu[aá]l es la bebida más popular\b',
-    r'\bcu[aá]l es la bebida más pedida\b', r'\bcu[aá]l es la bebida más solicitada\b',
-    r'[Qq]u[eé] bebida es la m[aá]s vendida\b', r'[Qq]u[eé] bebida es la m[aá]s popular\b'
-]
-
-MOST_SOLD_SPORT_DRINK_PATTERNS = [
-    r'\bbebida deportiva m[aá]s vendida\b', r'\bbebida deportiva m[aá]s popular\b',
-    r'\bbebida deportiva m[aá]s pedida\b',
-    r'\bcu[aá]l es la bebida deportiva más vendida\b', r'\bcu[aá]l es la bebida deportiva más popular\b',
-    r'\bcu[aá]l es la bebida deportiva más pedida\b', r'\bcu[aá]l es la bebida deportiva más solicitada\b',
-    r'[Qq]u[eé] bebida deportiva es la m[aá]s vendida\b', r'[Qq]u[eé] bebida deportiva es la m[aá]s popular\b'
-]
-
-MOST_SOLD_BREAKFAST_PATTERNS = [
-    r'\bdesayuno m[aá]s vendido\b', r'\bdesayuno m[aá]s popular\b', r'\bdesayuno m[aá]s pedido\b',
-    r'\bcu[aá]l es el desayuno m[aá]s vendido\b', r'\bcu[aá]l es el desayuno m[aá]s popular\b',
-    r'\bcu[aá]l es el desayuno m[aá]s pedido\b', r'\bcu[aá]l es el desayuno m[aá]s solicitado\b',
-    r'[Qq]u[eé] desayuno es el m[aá]s vendido\b', r'[Qq]u[eé] desayuno es el m[aá]s popular\b'
-
-]
-
-MOST_SOLD_STARTER_PATTERNS = [
-    r'\bentrada m[aá]s vendida\b', r'\bentrada m[aá]s popular\b', r'\bentrada m[aá]s pedida\b',
-    r'\bcu[aá]l es la entrada m[aá]s vendida\b', r'\bcu[aá]l es la entrada más popular\b',
-    r'\bcu[aá]l es la entrada m[aá]s pedida\b', r'\bcu[aá]l es la entrada más solicitada\b',
-    r'[Qq]u[eé] entrada es la m[aá]s vendida\b', r'[Qq]u[eé] entrada es la m[aá]s popular\b'
-]
-
-MOST_SOLD_SECOND_COURSE_PATTERNS = [
-    r'\bsegundo m[aá]s vendido\b', r'\bsegundo m[aá]s popular\b', r'\bsegundo m[aá]s pedido\b',
-    r'\bcu[aá]l es el segundo más vendido\b', r'\bcu[aá]l es el segundo más popular\b',
-    r'\bcu[aá]l es el segundo más pedido\b', r'\bcu[aá]l es el segundo más solicitado\b',
-    r'[Qq]u[eé] segundo es el m[aá]s vendido\b', r'[Qq]u[eé] segundo es el m[aá]s popular\b'
-]
-
-MOST_SOLD_SNACK_PATTERNS = [
-    r'\bsnack m[aá]s vendido\b', r'\bsnack m[aá]s popular\b', r'\bsnack m[aá]s pedido\b',
-    r'\bcu[aá]l es el snack m[aá]s vendido\b', r'\bcu[aá]l es el snack m[aá]s popular\b',
-    r'\bcu[aá]l es el snack m[aá]s pedido\b', r'\bcu[aá]l es el snack m[aá]s solicitado\b',
-    r'[Qq]u[eé] snack es el m[aá]s vendido\b', r'[Qq]u[eé] snack es el m[aá]s popular\b'
-]
-
-# Expresiones regulares para detectar categorías como "desayunos", "bebidas", etc.
-PRODUCT_BY_NAME_CATEGORY_PATTERNS = [
-    r'\b(?:qu[eé]|me\s+gustar[ií]a)\s+(?:ver|tener|una|la|un)\s+(desayunos?|bebidas?|bebidas deportivas?|entradas?|platos?|snacks?|almuerzos?|segundos?|postres?)\b',
-    r'\b(?:mu[ée]strame|ens[ée][ñn]ame|ver|quiero\s+ver)\s+(?:el\s+)?(?:men[úu]|lista)\s+(?:de\s+)?(\w+)\b',
-    r'\b(?:productos|art[ií]culos|opciones|cosas)\s+(?:de\s+la\s+categor[ií]a\s+)?(\w+)\b',
-    r'\b(?:categor[ií]a\s+de\s+)?(\w+)\s+(?:productos|art[ií]culos|opciones|men[úu])\b',
-    r'\b(?:tienes|hay)\s+(\w+)\s+(?:en\s+(?:el\s+men[úu]|la\s+categor[ií]a))\b',
-    r'\b(?:quiero\s+la\s+lista\s+de\s+(\w+))\b',
-    r'\b(?:cu[áa]les\s+son\s+los\s+productos\s+de\s+la\s+categor[ií]a\s+(\w+))\b',
-]
-
-# Bloquea si en la búsqueda de productos aparece una palabra que puede ser una categoría
-PRODUCT_BY_NAME_PATTERN = [
-    r'\b(?:tienes|quiero|quisiera|necesito|me\s+gustar[ií]a(?:\s+pedir|ordenar)?|deseo)\s+(?:una|un|la|el)\s+(?!desayuno|almuerzo|segundo|entrada|snack|postre\b)([\w\s]+)\b',
-    r'\b(?:hay)\s+(?!desayuno|almuerzo|segundo|entrada|snack|postre\b)([\w\s]+)\b',
-    r'\b(?:me\s+gustar[ií]a)\s+(?:pedir|ordenar)\s+(?:una|un)\s+(?!desayuno|almuerzo|segundo|entrada|snack|postre\b)([\w\s]+)\b',
-    r'\b(?:quiero\s+la\s+opción\s+(?!desayuno|almuerzo|bebida|segundo|entrada|snack|postre\b)([\w\s]+))\b',
-    r'\b(?:quiero)\s+(?:una|un)\s+(?!desayuno|almuerzo|segundo|entrada|snack|postre\b)([\w\s]+)\b',
-]
-
-# Patrones de expresión regular para extraer la cantidad y el nombre del producto
-PRODUCT_ORDER_PATTERN = [
-    r'\b(?:quiero|quisiera|necesito)\s+(\d+)\s+(.*)',  # Captura varias palabras después del número
-]
-
-# Patrones de expresión regular para consultar la cantidad de un producto
-PRODUCT_QUANTITY_PATTERN = [
-    r'\bcu[aá]nt[oa]s?\s+([\w\s]+)\s+(?:tienes|hay|quedan)(?:\s+en\s+(?:stock|inventario|existencia|bodega|almac['
-    r'eé]n|dep[oó]sito|disponibles))?\b'
-]
-
-# Patrones de expresión regular para consultar el precio por nombre de producto
-PRODUCT_PRICE_PATTERN = [
-    r'\bcu[aá]nto\s+(?:cuesta|vale|valen|cuestan)\s+(?:el|la|los|las)?\s*(.*)\b',
-    r'\bqu[eé]\s+(?:precio|valor|costo)\s+(?:tiene|tienen)\s+(?:el|la|los|las)?\s*(.*)\b',
-    r'\bprecio\s+(?:del|de\s+la|de\s+los|de\s+las)?\s*(.*)\b',
-    r'\bcosto\s+(?:del|de\s+la|de\s+los|de\s+las)?\s*(.*)\b',
-    r'\bvalor\s+(?:del|de\s+la|de\s+los|de\s+las)?\s*(.*)\b'
-]
-
-RECOMMEND_PRODUCT_PATTERNS = {
-    "drink": [
-        r'\bbebida recomendada\b', r'\bqu[eé] bebida recomiendas\b', r'\bqu[eé] bebida me recomiendas\b',
-        r'\bqu[eé] bebida es buena\b', r'\bqu[eé] bebida econ[oó]mica me recomiendas\b',
-        r'\bqu[eé] bebida es buena y econ[oó]mica\b'
-    ],
-    "sport_drink": [
-        r'\bbebida deportiva recomendada\b', r'\bqu[eé] bebida deportiva recomiendas\b',
-        r'\bqu[eé] bebida deportiva me recomiendas\b',
-        r'\bqu[eé] bebida deportiva es buena\b', r'\bqu[eé] bebida deportiva econ[oó]mica me recomiendas\b',
-        r'\bqu[eé] bebida deportiva es buena y econ[oó]mica\b'
-    ],
-    "breakfast": [
-        r'\bdesayuno recomendado\b', r'\bqu[eé] desayuno recomiendas\b', r'\bqu[eé] desayuno me recomiendas\b',
-        r'\bqu[eé] desayuno es bueno\b', r'\bqu[eé] desayuno econ[oó]mico me recomiendas\b',
-        r'\bqu[eé] desayuno es bueno y econ[oó]mico\b'
-    ],
-    "starter": [
-        r'\bentrada recomendada\b', r'\bqu[eé] entrada recomiendas\b', r'\bqu[eé] entrada me recomiendas\b',
-        r'\bqu[eé] entrada es buena\b', r'\bqu[eé] entrada econ[oó]mica me recomiendas\b',
-        r'\bqu[eé] entrada es buena y econ[oó]mica\b'
-    ],
-    "second_course": [
-        r'\bsegundo recomendado\b', r'\bqu[eé] segundo recomiendas\b', r'\bqu[eé] segundo me recomiendas\b',
-        r'\bqu[eé] segundo es bueno\b', r'\bqu[eé] segundo econ[oó]mico me recomiendas\b',
-        r'\bqu[eé] segundo es bueno y econ[oó]mico\b', r'\bqu[eé] plato fuerte recomiendas\b',
-        r'\bqu[eé] plato fuerte me recomiendas\b', r'\bqu[eé] plato fuerte es bueno\b',
-        r'[Qq]u[eé] plato fuerte es el m[aá]s comprado\b', r'\bqu[eé] plato fuerte es el mas vendido\b'
-    ],
-    "snack": [
-        r'\bsnack recomendado\b', r'\bqu[eé] snack recomiendas\b', r'\bqu[eé] snack me recomiendas\b',
-        r'\bqu[eé] snack es bueno\b', r'\bqu[eé] snack econ[oó]mico me recomiendas\b',
-        r'\bqu[eé] snack es bueno y econ[oó]mico\b'
-    ],
-    "main": [
-        r'\balmuerzo recomendado\b', r'\bqu[eé] almuerzo recomiendas\b', r'\bqu[eé] almuerzo me recomiendas\b',
-        r'\bcu[aá]l es el plato m[aá]s popular\b', r'\bcu[aá]l es el plato m[aá]s vendido\b',
-        r'\bcu[aá]l es el plato m[aá]s pedido\b',
-        r'\bqu[eé] plato me recomiendas\b',
-        r'\bqu[eé] almuerzo es bueno\b', r'\bqu[eé] almuerzo econ[oó]mico me recomiendas\b',
-        r'\bqu[eé] almuerzo es bueno y econ[oó]mico\b',
-        r'\bdeseo un almuerzo\b', r'\bqu[eé] almuerzo me recomiendas\b',
-        r'\bdame un almuerzo\b'
-
-    ]
+# Manejadores de las intenciones de respuesta fija que puede devolver el clasificador
+INTENT_HANDLERS = {
+    "menu": show_categories,
+    "most_ordered_product": show_most_ordered_product,
+    "most_sold_drink": show_most_sold_drink,
+    "most_sold_sport_drink": show_most_sold_sport_drink,
+    "most_sold_breakfast": show_most_sold_breakfast,
+    "most_sold_starter": show_most_sold_starter,
+    "most_sold_second": show_most_sold_second,
+    "most_sold_snack": show_most_sold_snack,
+    "recommend_drink": recommend_drink_by_price,
+    "recommend_sport_drink": recommend_sport_drink_by_price,
+    "recommend_breakfast": recommend_breakfast_by_price,
+    "recommend_starter": recommend_starter_by_price,
+    "recommend_second": recommend_second_by_price,
+    "recommend_snack": recommend_snack_by_price,
+    "recommend_main": show_most_sold_main,
 }
 
-# Definir patrones para saludos y conversaciones comunes
-GREETING_PATTERNS = [
-    r'\bhola\b', r'\bhi\b', r'\bhello\b', r'\bbuenos días\b', r'\bbuenas tardes\b', r'\bbuenas noches\b',
-    r'\bcómo estás\b', r'\bqué tal\b', r'\bqué pasa\b'
-]
-
 
 # Función para manejar respuestas comunes
 async def handle_common_responses(update: Update, patterns, response_text):
@@ -193,60 +91,41 @@ async def handle_common_responses(update: Update, patterns, response_text):
     return False
 
 
-EXIT_PATTERNS = [
-    r'\bsalir\b', r'\bsalir del chat\b', r'\bterminar\b', r'\bterminar chat\b', r'\badi[oó]s\b', r'\bchao\b',
-    r'\bnos vemos\b', r'\bhasta luego\b', r'\bnos vemos luego\b', r'\bfinalizar\b', r'\bfinalizar chat\b',
-    r'\bcerrar chat\b', r'\bterminar conversaci[oó]n\b', r'\bterminar chat\b', r'\bes todo\b', r'\bfin\b',
-    r'\bfin del chat\b', r'\bfin de la conversaci[oó]n\b', r'\bfin de la conversación\b',
-    r'\bes todo gracias\b', r'\bno necesito nada m[aá]s\b', r'\bno necesito ayuda\b',
-    r'\bno necesito nada m[aá]s por ahora\b', r'\bno necesito nada m[aá]s gracias\b',
-    r'\bno necesito nada m[aá]s por el momento\b', r'\bsolo eso\b', r'\bgracias\b', r'\bhasta aqu[ií]\b',
-    r'\bhasta aqu[ií] llegamos\b'
-]
-
-
 # Función para verificar si un mensaje coincide con algún patrón
 def match_pattern(patterns, message):
     for pattern in patterns:
         if re.search(pattern, message):
-            print(f"Pattern matched: {pattern}")
+            logger.debug("Pattern matched: %s", pattern)
             return True
     return False
 
 
+async def find_product_name(normalized_product_name: str, min_similarity: float = PRODUCT_MIN_SIMILARITY):
+    """Devuelve el nombre (tal como está en la base de datos) del producto que mejor coincide, o None."""
+    normalized_product_name = alias_registry.expand_product_aliases(normalized_product_name)
+    products = await get_products_by_name(normalized_product_name, min_similarity=min_similarity, limit=1)
+    return products[0].name if products else None
+
+
+# Productos parecidos al texto según la búsqueda semántica (vacío si está desactivada)
+async def find_similar_products(text: str, min_score: float, description_min_score=None):
+    index = await get_semantic_index()
+    if index is None:
+        return []
+    return [product for product, _ in index.search(text, k=SEMANTIC_RESULTS, min_score=min_score,
+                                                   description_min_score=description_min_score)]
+
+
 # Función para manejar la respuesta basada en el patrón detectado
 async def handle_response(update, patterns, handler_function):
     if match_pattern(patterns, update.message.text.lower()):
-        logger.info(f"Pattern matched. Handling with {handler_function.__name__}")
+        logger.debug("Pattern matched. Handling with %s", handler_function.__name__)
         fake_query = type('FakeQuery', (object,), {'edit_message_text': update.message.reply_text})
         await handler_function(fake_query)
         return True
     return False
 
 
-# Función para normalizar el nombre del producto
-def normalize_product_name(product_name):
-    """
-    Normaliza el nombre del producto para facilitar la búsqueda en la base de datos.
-    """
-    # Convertir a minúsculas y quitar acentos
-    product_name = product_name.lower()
-    product_name = re.sub(r'[áàäâ]', 'a', product_name)
-    product_name = re.sub(r'[éèëê]', 'e', product_name)
-    product_name = re.sub(r'[íìïî]', 'i', product_name)
-    product_name = re.sub(r'[óòöô]', 'o', product_name)
-    product_name = re.sub(r'[úùüû]', 'u', product_name)
-    product_name = re.sub(r'[^a-z0-9\s]', '', product_name)
-
-    # Eliminar pluralizaciones comunes en español y artículos al principio del nombre
-    product_name = re.sub(r'\b(el|la|los|las|una|un|unos|unas)\b\s*', '', product_name)
-    product_name = re.sub(r'(\w+)s\b', r'\1', product_name)  # Pluralización simple ('limonadas' a 'limonada')
-    product_name = re.sub(r'(\w+)es\b', r'\1', product_name)  # Pluralización con 'es' ('naranjas' a 'naranja')
-
-    # Devolver el nombre normalizado
-    return product_name.strip()
-
-
 # Función para manejar la respuesta basada en el patrón detectado por nombre
 async def handle_response_by_name(update, handler_function):
     message = update.message.text.lower()
@@ -263,34 +142,39 @@ async def handle_response_by_name(update, handler_function):
 
         # Normalizar el nombre del producto
         normalized_product_name = normalize_product_name(product_name)
-        logger.info(f"Normalized product name: {normalized_product_name}")
-
-        async with SessionLocal() as session:
-            async with session.begin():
-                # Búsqueda exacta
-                query = select(Product.name).where(Product.name.ilike(f'%{normalized_product_name}%'))
-                result = await session.execute(query)
-                products = result.scalars().all()
-
-                if not products:
-                    # Implementar una búsqueda más difusa si no hay coincidencias exactas
-                    query_all = select(Product.name)
-                    all_products = await session.execute(query_all)
-                    all_products_list = all_products.scalars().all()
-
-                    # Encontrar el producto más similar usando fuzzywuzzy
-                    best_match = process.extractOne(normalized_product_name, all_products_list)
-                    if best_match and best_match[1] > 85:  # Aumentar el umbral de similitud
-                        products = [best_match[0]]
-
-        if products:
-            product_name_to_use = products[0]
-            logger.info(f"Producto encontrado en la base de datos: {product_name_to_use}")
+        logger.debug("Normalized product name: %s", normalized_product_name)
+
+        product_name_to_use = await find_product_name(normalized_product_name, NAME_MIN_SIMILARITY)
+
+        if product_name_to_use:
+            logger.debug("Producto encontrado en la base de datos: %s", product_name_to_use)
             fake_query = type('FakeQuery', (object,), {'edit_message_text': update.message.reply_text})
             await handler_function(fake_query, product_name_to_use)
             return True
 
-    logger.info("No se encontró un producto similar en la base de datos.")
+        # Ningún nombre se parece: buscar por significado ("quiero algo frío para tomar")
+        similar_products = await find_similar_products(product_name, settings.semantic_min_score)
+        if similar_products:
+            logger.debug("Semantic search matched %d products", len(similar_products))
+            fake_query = type('FakeQuery', (object,), {'edit_message_text': update.message.reply_text})
+            await show_similar_products(fake_query, similar_products)
+            return True
+
+    logger.debug("No se encontró un producto similar en la base de datos.")
+    return False
+
+
+# Función para manejar las consultas de comidas por presupuesto ("¿qué puedo comer con $3?")
+async def handle_response_by_budget(update: Update, patterns, handler_function):
+    message = update.message.text.lower()
+    for pattern in patterns:
+        match = re.search(pattern, message)
+        if match:
+            budget = Decimal(match.group(1).replace(",", "."))
+            logger.debug("Budget extracted: %s", budget)
+            fake_query = type('FakeQuery', (object,), {'edit_message_text': update.message.reply_text})
+            await handler_function(fake_query, budget)
+            return True
     return False
 
 
@@ -305,46 +189,28 @@ async def handle_response_by_quantity(update: Update, patterns, handler_function
                 product_quantity = int(match.group(1).strip())
                 product_name = match.group(2).strip().lower()
 
-                logger.info(f"Product quantity extracted: {product_quantity}")
-                logger.info(f"Product name extracted: {product_name}")
+                logger.debug("Product quantity extracted: %s", product_quantity)
+                logger.debug("Product name extracted: %s", product_name)
 
                 # Normalizar el nombre del producto antes de la búsqueda
                 normalized_product_name = normalize_product_name(product_name)
-                logger.info(f"Normalized product name: {normalized_product_name}")
-
-                async with SessionLocal() as session:
-                    async with session.begin():
-                        # Búsqueda flexible con ILIKE
-                        query = select(Product.name).where(Product.name.ilike(f'%{normalized_product_name}%'))
-                        result = await session.execute(query)
-                        products = result.scalars().all()
-
-                        # Si no se encuentran coincidencias exactas, buscar productos similares
-                        if not products:
-                            # Implementar una búsqueda más difusa si no hay coincidencias exactas
-                            query_all = select(Product.name)
-                            all_products = await session.execute(query_all)
-                            all_products_list = all_products.scalars().all()
-
-                            # Encontrar el producto más similar usando fuzzywuzzy
-                            best_match = process.extractOne(normalized_product_name, all_products_list)
-                            if best_match and best_match[1] > 70:  # Umbral de similitud
-                                products = [best_match[0]]
-
-                if products:
+                logger.debug("Normalized product name: %s", normalized_product_name)
+
+                product_name_to_use = await find_product_name(normalized_product_name)
+
+                if product_name_to_use:
                     # Usar el nombre del producto tal como se encuentra en la base de datos (capitalizado correctamente)
-                    product_name_to_use = products[0]
-                    logger.info(f"Producto encontrado en la base de datos: {product_name_to_use}")
+                    logger.debug("Producto encontrado en la base de datos: %s", product_name_to_use)
                     fake_query = type('FakeQuery', (object,), {'edit_message_text': update.message.reply_text})
                     await handler_function(fake_query, product_name_to_use, product_quantity)
                     return True
 
             except ValueError:
-                logger.error(f"Cantidad no válida extraída: {match.group(1)}")
+                logger.error("Cantidad no válida extraída: %s", match.group(1))
                 await update.message.reply_text("Por favor, proporciona una cantidad válida.")
                 return True
         else:
-            logger.info("No se encontraron mensajes de cantidad y nombre, saltando...")
+            logger.debug("No se encontraron mensajes de cantidad y nombre, saltando...")
     return False
 
 
@@ -356,41 +222,17 @@ async def handle_response_by_quantityofproduct(update: Update, patterns, handler
         if match:
             try:
                 product_name = match.group(1).strip().title()
-                logger.info(f"Product name extracted: {product_name}")
+                logger.debug("Product name extracted: %s", product_name)
 
                 # Normalizar el nombre del producto
                 normalized_product_name = normalize_product_name(product_name)
-                logger.info(f"Normalized product name: {normalized_product_name}")
-
-                async with SessionLocal() as session:
-                    async with session.begin():
-                        # Búsqueda exacta en la base de datos
-                        query = select(Product.name).where(Product.name.ilike(f'%{normalized_product_name}%'))
-                        result = await session.execute(query)
-                        products = result.scalars().all()
-
-                        # Si no se encuentran coincidencias exactas, usar Fuzzywuzzy para buscar coincidencias aproximadas
-                        if not products:
-                            query_all = select(Product.name)
-                            all_products = await session.execute(query_all)
-                            all_products_list = all_products.scalars().all()
-
-                            # Convertir todos los nombres de productos a minúsculas para comparación
-                            all_products_list_lower = [product.lower() for product in all_products_list]
-
-                            # Encontrar el producto más similar usando Fuzzywuzzy
-                            best_match = process.extractOne(normalized_product_name, all_products_list_lower)
-
-                            if best_match and best_match[1] > 70:  # Umbral de similitud de 70
-                                # Encontrar el producto original en la lista utilizando el índice de coincidencia
-                                matched_product_index = all_products_list_lower.index(best_match[0])
-                                matched_product = all_products_list[matched_product_index]
-                                products = [matched_product]
-
-                if products:
+                logger.debug("Normalized product name: %s", normalized_product_name)
+
+                product_name_to_use = await find_product_name(normalized_product_name)
+
+                if product_name_to_use:
                     # Usar el nombre del producto tal como se encuentra en la base de datos (capitalizado correctamente)
-                    product_name_to_use = products[0]
-                    logger.info(f"Producto encontrado en la base de datos: {product_name_to_use}")
+                    logger.debug("Producto encontrado en la base de datos: %s", product_name_to_use)
                     fake_query = type('FakeQuery', (object,), {'edit_message_text': update.message.reply_text})
                     await handler_function(fake_query, product_name_to_use)
                     return True
@@ -399,7 +241,7 @@ async def handle_response_by_quantityofproduct(update: Update, patterns, handler
                 logger.error("No such group in pattern matching")
                 continue
         else:
-            logger.info("No se encontraron mensajes de cantidad, saltando...")
+            logger.debug("No se encontraron mensajes de cantidad, saltando...")
     return False
 
 
@@ -414,42 +256,25 @@ async def handle_response_by_price(update: Update, patterns, handler_function):
                 product_name = match.group(1).strip()
                 normalized_product_name = normalize_product_name(product_name)  # Normalización
 
-                logger.info(f"Normalized product name for price query: {normalized_product_name}")
+                logger.debug("Normalized product name for price query: %s", normalized_product_name)
 
                 # Realizar la búsqueda en la base de datos
-                async with SessionLocal() as session:
-                    async with session.begin():
-                        # Búsqueda exacta primero
-                        query = select(Product.name).where(Product.name.ilike(f'%{normalized_product_name}%'))
-                        result = await session.execute(query)
-                        products = result.scalars().all()
-
-                        if not products:
-                            # Implementar una búsqueda más difusa si no hay coincidencias exactas
-                            query_all = select(Product.name)
-                            all_products = await session.execute(query_all)
-                            all_products_list = all_products.scalars().all()
-
-                            # Encontrar el producto más similar usando fuzzywuzzy
-                            best_match = process.extractOne(normalized_product_name, all_products_list)
-                            if best_match and best_match[1] > 70:  # Umbral de similitud
-                                products = [best_match[0]]
-
-                if products:
-                    product_name_to_use = products[0]
-                    logger.info(f"Producto encontrado en la base de datos: {product_name_to_use}")
+                product_name_to_use = await find_product_name(normalized_product_name)
+
+                if product_name_to_use:
+                    logger.debug("Producto encontrado en la base de datos: %s", product_name_to_use)
                     fake_query = type('FakeQuery', (object,), {'edit_message_text': update.message.reply_text})
                     await handler_function(fake_query, product_name_to_use)
                     return True
-                else:
-                    await update.message.reply_text("No se encontró un producto similar en la base de datos.")
-                    return False
+                # Sin responder: si devuelve False el mensaje sigue su camino (corrección ortográfica, GPT)
+                logger.debug("No se encontró un producto similar en la base de datos.")
+                return False
 
             except Exception as e:
-                logger.error(f"Error manejando la respuesta por precio: {e}")
+                logger.error("Error manejando la respuesta por precio: %s", e)
                 continue
         else:
-            logger.info("No se encontraron mensajes de precios, saltando...")
+            logger.debug("No se encontraron mensajes de precios, saltando...")
     return False
 
 
@@ -460,33 +285,21 @@ async def handle_response_by_category(update: Update, patterns, handler_function
     # Verificar si el mensaje es más específico que una simple categoría
     specific_product_match = re.search(r'\b(?:una|un|el|la|una|el|la)\s+([\w\s]+(?:\s+de\s+\w+)+)\b', message)
     if specific_product_match:
-        logger.info("Specific product detected, skipping category mapping.")
+        logger.debug("Specific product detected, skipping category mapping.")
         return False  # Saltar la detección de categorías si se encuentra un producto específico
 
-    # Mapeo de palabras clave a categorías específicas, asegurando que las más específicas se revisen primero
-    category_keywords = {
-        'almuerzo': 'Almuerzos',
-        'sopa': 'Entradas',
-        'sopas': 'Entradas',
-        'bebida deportiva': 'Bebidas Deportivas',
-        'bebidas deportivas': 'Bebidas Deportivas',
-        'desayuno': 'Desayunos',
-        'bebida': 'Bebidas',  # 'bebida' se verifica después de 'bebida deportiva'
-        'segundo': 'Segundos',
-        'entrada': 'Entradas',
-        'snack': 'Snacks',
-    }
-
-    # Verificar si el mensaje contiene palabras clave específicas
-    for keyword, category in category_keywords.items():
-        if keyword in message:
-            logger.info(f"Detected keyword: {keyword}, mapping to category: {category}")
-            if category == 'Almuerzos':
-                await show_lunch_products(update)  # Mostrar productos de almuerzo
-            else:
-                fake_query = type('FakeQuery', (object,), {'edit_message_text': update.message.reply_text})
-                await handler_function(fake_query, category)
-            return True
+    # Alias de categorías en una sola pasada; el más largo gana ("bebida deportiva" antes que "bebida") y
+    # los que forman parte de un producto no cuentan ("cola" en "coca cola")
+    catalog_index = await get_catalog_index()
+    category = alias_registry.find_category(message, catalog_index.names)
+    if category:
+        logger.debug("Detected category alias, mapping to category: %s", category)
+        if category == 'Almuerzos':
+            await show_lunch_products(update)  # Mostrar productos de almuerzo
+        else:
+            fake_query = type('FakeQuery', (object,), {'edit_message_text': update.message.reply_text})
+            await handler_function(fake_query, category)
+        return True
 
     # Proceder con la lógica habitual si no se encuentra una palabra clave específica
     for pattern in patterns:
@@ -494,7 +307,7 @@ async def handle_response_by_category(update: Update, patterns, handler_function
         if match:
             try:
                 category_name = match.group(1).strip().title()
-                logger.info(f"Category name extracted: {category_name}")
+                logger.debug("Category name extracted: %s", category_name)
                 fake_query = type('FakeQuery', (object,), {'edit_message_text': update.message.reply_text})
                 await handler_function(fake_query, category_name)
                 return True
@@ -502,58 +315,70 @@ async def handle_response_by_category(update: Update, patterns, handler_function
                 logger.error("No such group in pattern matching")
                 continue
         else:
-            logger.info("No se encontraron nombres de categorías en este mensaje, saltando...")
+            logger.debug("No se encontraron nombres de categorías en este mensaje, saltando...")
     return False
 
 
-# Manejador de mensajes de texto
-async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Maneja los mensajes de texto entrantes de los usuarios."""
-    if context.chat_data.get("session_closed", True):  # La sesión está cerrada por defecto si no se ha establecido
-        await update.message.reply_text("La sesión ha terminado. Para empezar de nuevo, escribe /start.")
-        return
+# Función para manejar la respuesta con el clasificador local antes de recurrir a GPT
+async def handle_response_by_classifier(update: Update) -> bool:
+    # Clasificador local de intenciones para los mensajes que casi coinciden con los patrones
+    intent_classifier = get_intent_classifier()
+    if intent_classifier is None:
+        return False
 
-    user_message = update.message.text.lower()  # Convertir a minúsculas para coincidencia de patrones
-    logger.info(f"Received message from user: {user_message}")
+    prediction = intent_classifier.predict(update.message.text)
+    if prediction is None:
+        return False
 
-    if context.user_data.get('awaiting_rating') or context.user_data.get('awaiting_comment'):
-        await handle_comment(update, context)
-        return
+    logger.info("Intent classifier matched %s (%s) with score %.2f",
+                prediction.label, prediction.payload, prediction.score)
+    fake_query = type('FakeQuery', (object,), {'edit_message_text': update.message.reply_text})
+    if prediction.label == "category":
+        if prediction.payload == 'Almuerzos':
+            await show_lunch_products(update)
+        else:
+            await show_products_by_category_name(fake_query, prediction.payload)
+    elif prediction.label == "product":
+        await show_product_by_name(fake_query, prediction.payload)
+    elif prediction.label in INTENT_HANDLERS:
+        await INTENT_HANDLERS[prediction.label](fake_query)
+    else:
+        return False
+    return True
 
-    # Guardar el mensaje del usuario en el historial con su message_id
-    chat_id = update.message.chat_id
-    if "conversation_history" not in context.chat_data:
-        context.chat_data["conversation_history"] = []
 
-    context.chat_data["conversation_history"].append({
-        "role": "user",
-        "content": user_message,
-        "message_id": update.message.message_id  # Guardar el ID del mensaje del usuario
-    })
+# Respuestas sin GPT: patrones, catálogo, clasificador local y búsqueda semántica
+async def route_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
+    """Intenta responder el mensaje sin GPT; devuelve True si algún manejador lo atendió."""
+    user_message = update.message.text.lower()
 
     # Verificar si el mensaje coincide con saludos o preguntas comunes
     if await handle_common_responses(update, GREETING_PATTERNS, "¡Hola Bienvenido al Costeñito! ¿Cómo puedo ayudarte "
                                                                 "hoy?"):
-        return
+        return True
 
     # Verificar si el mensaje coincide con los patrones de salida
     if match_pattern(EXIT_PATTERNS, user_message):
         await handle_rating(update, context)
-        return
+        return True
+
+    # Presupuesto antes que las cantidades: "tengo 5 dólares para comer" no es un pedido de 5 unidades
+    if await handle_response_by_budget(update, BUDGET_PATTERNS, show_meal_recommendations):
+        return True
 
     # *** MOVEMOS LA DETECCIÓN DE CANTIDAD PRIMERO ***
 
     # 4. Manejar cantidades de productos
     if await handle_response_by_quantity(update, PRODUCT_ORDER_PATTERN, show_product_stock_by_name):
-        return
+        return True
 
     # 5. Manejar cantidad por producto
     if await handle_response_by_quantityofproduct(update, PRODUCT_QUANTITY_PATTERN, show_product_stock_by_productname):
-        return
+        return True
 
     # 6. Manejar precios de productos
     if await handle_response_by_price(update, PRODUCT_PRICE_PATTERN, show_product_price_by_name):
-        return
+        return True
 
     # 1. Verificar si corresponde a una acción específica
     pattern_handlers = [
@@ -576,63 +401,153 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
 
     for patterns, handler_function in pattern_handlers:
         if await handle_response(update, patterns, handler_function):
-            return
+            return True
 
     # 2. Verificar si el mensaje corresponde a una categoría
     if await handle_response_by_category(update, PRODUCT_BY_NAME_CATEGORY_PATTERNS, show_products_by_category_name):
-        return
+        return True
 
     # 3. Si no es una categoría, verificar si es un producto específico
     if await handle_response_by_name(update, show_product_by_name):
+        return True
+
+    # 7. Clasificador local para mensajes que casi coinciden con los patrones (evita la llamada a GPT)
+    if await handle_response_by_classifier(update):
+        return True
+
+    # 7.5 Búsqueda semántica del catálogo ("tengo sed", "gaseosa") antes de recurrir a GPT; sin una petición
+    # de producto, las descripciones de las categorías sólo cuentan si son casi todo el mensaje
+    similar_products = await find_similar_products(user_message, settings.semantic_min_score,
+                                                   settings.semantic_description_min_score)
+    if similar_products:
+        fake_query = type('FakeQuery', (object,), {'edit_message_text': update.message.reply_text})
+        await show_similar_products(fake_query, similar_products)
+        return True
+
+    return False
+
+
+def with_message_text(update: Update, text: str) -> Update:
+    """Copia de la actualización con otro texto (los objetos de telegram son inmutables)."""
+    message = update.message
+    corrected = Message(message_id=message.message_id, date=message.date, chat=message.chat, text=text,
+                        from_user=message.from_user)
+    corrected.set_bot(message.get_bot())
+    return Update(update.update_id, message=corrected)
+
+
+# Manejador de mensajes de texto
+async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Maneja los mensajes de texto entrantes de los usuarios."""
+    if context.chat_data.get("session_closed", True):  # La sesión está cerrada por defecto si no se ha establecido
+        await update.message.reply_text("La sesión ha terminado. Para empezar de nuevo, escribe /start.")
+        return
+
+    user_message = update.message.text.lower()  # Convertir a minúsculas para coincidencia de patrones
+    logger.debug("Received message from user: %s", user_message)
+
+    if context.user_data.get('awaiting_rating') or context.user_data.get('awaiting_comment'):
+        await handle_comment(update, context)
+        return
+
+    # Guardar el mensaje del usuario en el historial con su message_id
+    chat_id = update.message.chat_id
+    if "conversation_history" not in context.chat_data:
+        context.chat_data["conversation_history"] = []
+
+    context.chat_data["conversation_history"].append({
+        "role": "user",
+        "content": user_message,
+        "message_id": update.message.message_id  # Guardar el ID del mensaje del usuario
+    })
+
+    if await route_message(update, context):
         return
 
-    # 7. Si no coincide con nada relacionado a productos o categorías, usar GPT para manejo de conversación general
+    # Sólo si el texto original no coincide con nada: corregir faltas de ortografía ("limonda",
+    # "almuerso") y volver a intentarlo, para que una corrección nunca cambie la respuesta a un mensaje
+    # que ya se entendía
+    corrector = await get_spelling_corrector()
+    corrected_message = corrector.correct(user_message)
+    corrected = corrected_message != user_message
+    if corrected:
+        logger.debug("Spelling corrected: %s -> %s", user_message, corrected_message)
+        metrics.inc("spelling_corrected_messages_total")
+        if await route_message(with_message_text(update, corrected_message), context):
+            # Mensajes corregidos que se atendieron sin recurrir a GPT
+            metrics.inc("spelling_rescued_messages_total")
+            return
+    metrics.inc("gpt_fallback_messages_total", corrected=str(corrected).lower())
+
+    # 8. Si no coincide con nada relacionado a productos o categorías, usar GPT para manejo de conversación general
     if user_message not in context.chat_data["conversation_history"]:
+        # Las llamadas a GPT son de pago: cada usuario tiene un presupuesto propio más estricto
+        user = update.effective_user
+        if not admission.allow_gpt(user.id if user else None):
+            await notify_rejected(update, context, "gpt_rate_limited")
+            return
+        if openai_breaker.is_open:
+            # GPT no responde: respuesta fija en lugar de hacer esperar al usuario
+            metrics.inc("gpt_degraded_replies_total")
+            await update.message.reply_text(responses["gpt_unavailable_response"])
+            return
         messages = [system_context] + context.chat_data["conversation_history"]
 
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                max_tokens=150,
-                temperature=0.5,  # Un poco de creatividad para respuestas más naturales
-            )
-
-            gpt_response = response.choices[0].message['content'].strip()
-
-            # Revisar si la respuesta incluye recomendaciones de productos
-            # Evitar usar recomendaciones de GPT si son de productos específicos
-            if any(keyword in gpt_response.lower() for keyword in ["recomiendo", "te sugiero", "prueba"]):
-                await update.message.reply_text("Lamentablemente no encuentro información a tu pregunta procura "
-                                                "empezar con preguntas claras, puedes decir: quiero pedir tal cosa.")
-            else:
-                sent_message = await update.message.reply_text(
-                    gpt_response)  # Enviar la respuesta y guardar el message_id
-
-                context.chat_data["conversation_history"].append({
-                    "role": "assistant",
-                    "content": gpt_response,
-                    "message_id": sent_message.message_id  # Guardar el ID del mensaje enviado
-                })
-
+            # Límite global de llamadas a GPT simultáneas (app.utils.admission)
+            async with admission.gpt.slot():
+                if settings.gpt_streaming:
+                    # Enviar un mensaje provisional y editarlo a medida que llegan los tokens
+                    gpt_response, sent_message = await stream_gpt_response(
+                        update.message, messages, settings.gpt_stream_edit_interval, **GPT_COMPLETION_KWARGS)
+                    if gpt_response is not None:
+                        context.chat_data["conversation_history"].append({
+                            "role": "assistant",
+                            "content": gpt_response,
+                            "message_id": sent_message.message_id
+                        })
+                    return
+
+                # Asíncrona para no bloquear el event loop y poder cancelarla si el usuario sigue escribiendo
+                response = await openai_breaker.call(
+                    get_openai().ChatCompletion.acreate(messages=messages, **GPT_COMPLETION_KWARGS))
+
+                gpt_response = response.choices[0].message['content'].strip()
+
+                # Revisar si la respuesta incluye recomendaciones de productos
+                if is_filtered_response(gpt_response):
+                    await update.message.reply_text(GPT_FILTERED_RESPONSE)
+                else:
+                    sent_message = await update.message.reply_text(
+                        gpt_response)  # Enviar la respuesta y guardar el message_id
+
+                    context.chat_data["conversation_history"].append({
+                        "role": "assistant",
+                        "content": gpt_response,
+                        "message_id": sent_message.message_id  # Guardar el ID del mensaje enviado
+                    })
+
+        except Overloaded:
+            await notify_rejected(update, context, "overloaded")
+        except (CircuitOpen, DeadlineExceeded):
+            metrics.inc("gpt_degraded_replies_total")
+            await update.message.reply_text(responses["gpt_unavailable_response"])
         except Exception as e:
-            logger.error(f"Error generating response: {e}")
-            await update.message.reply_text("Lo siento, algo salió mal al procesar tu solicitud.")
+            logger.error("Error generating response: %s", e)
+            await update.message.reply_text(GPT_ERROR_RESPONSE)
 
 
 # Función para vaciar el chat y cerrar la sesión
 async def exit_chat(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    from app.telegram_bot import greeting_messages  # Importación retrasada
     chat_id = update.message.chat_id
 
     # Marcar la sesión como cerrada
     context.chat_data["session_closed"] = True
 
     # Borrar mensajes previos de saludo
-    if chat_id in greeting_messages:
-        greeting_message_id = greeting_messages[chat_id]["greeting_message_id"]
+    greeting_message_id = context.chat_data.pop("greeting_message_id", None)
+    if greeting_message_id is not None:
         await context.bot.delete_message(chat_id=chat_id, message_id=greeting_message_id)
-        del greeting_messages[chat_id]
 
     # Eliminar todos los mensajes en el historial del chat
     if "conversation_history" in context.chat_data:
@@ -642,9 +557,9 @@ async def exit_chat(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
                 try:
                     await context.bot.delete_message(chat_id=chat_id, message_id=message_id)
                 except BadRequest as e:
-                    logger.warning(f"Could not delete message {message_id}: {e}")
+                    logger.warning("Could not delete message %s: %s", message_id, e)
             else:
-                logger.warning(f"Message identifier is not specified for message: {message}")
+                logger.warning("Message identifier is not specified for message: %s", message)
         del context.chat_data["conversation_history"]
 
     await update.message.reply_text(
@@ -0,0 +1,173 @@
+"""Clasificador local de intenciones basado en n-gramas de caracteres (TF-IDF + centroides).
+
+Se usa como último filtro antes de recurrir a GPT: los mensajes que casi coinciden con los
+patrones de ``app.GPT.patterns`` (faltas de ortografía, palabras de más, etc.) se clasifican
+en local en menos de un milisegundo. El modelo se entrena con ``scripts/train_intent_classifier.py``
+y se serializa como JSON para cargarlo al iniciar el bot.
+"""
+import json
+import logging
+import math
+import os
+import unicodedata
+from collections import Counter, defaultdict
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+MODEL_VERSION = 1
+DEFAULT_NGRAM_RANGE = (3, 5)
+
+
+class IntentPrediction(NamedTuple):
+    label: str
+    payload: Optional[str]
+    score: float
+
+
+def prepare_text(text: str) -> str:
+    """Pasa el texto a minúsculas, quita los acentos y colapsa los espacios."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch if ch.isalnum() else " " for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.split())
+
+
+def char_ngrams(text: str, ngram_range=DEFAULT_NGRAM_RANGE) -> Counter:
+    """Cuenta los n-gramas de caracteres de cada palabra (con espacios como delimitadores)."""
+    low, high = ngram_range
+    grams = Counter()
+    for word in text.split():
+        padded = f" {word} "
+        for n in range(low, high + 1):
+            for i in range(len(padded) - n + 1):
+                grams[padded[i:i + n]] += 1
+    return grams
+
+
+def _normalize(vector: dict) -> dict:
+    norm = math.sqrt(sum(w * w for w in vector.values()))
+    if not norm:
+        return {}
+    return {gram: w / norm for gram, w in vector.items()}
+
+
+class IntentClassifier:
+    """Clasificador lineal: cada clase es el centroide TF-IDF de sus ejemplos."""
+
+    def __init__(self, idf: dict, classes: list, ngram_range=DEFAULT_NGRAM_RANGE, threshold: float = 0.5):
+        self.idf = idf
+        self.classes = classes  # [(label, payload, {gram: weight})]
+        self.ngram_range = tuple(ngram_range)
+        self.threshold = threshold
+        self._default_idf = max(idf.values(), default=1.0)
+
+        # Índice invertido n-grama -> [(clase, peso)] para puntuar sólo las clases que comparten n-gramas
+        self._postings = defaultdict(list)
+        for class_index, (_, _, weights) in enumerate(classes):
+            for gram, weight in weights.items():
+                self._postings[gram].append((class_index, weight))
+
+    @classmethod
+    def train(cls, examples, ngram_range=DEFAULT_NGRAM_RANGE, threshold: float = 0.5) -> "IntentClassifier":
+        """Entrena el modelo a partir de tuplas ``(texto, label, payload)``."""
+        grouped = defaultdict(list)
+        for text, label, payload in examples:
+            grams = char_ngrams(prepare_text(text), ngram_range)
+            if grams:
+                grouped[(label, payload)].append(grams)
+
+        documents = [grams for group in grouped.values() for grams in group]
+        document_frequency = Counter()
+        for grams in documents:
+            document_frequency.update(grams.keys())
+        total = len(documents)
+        idf = {gram: math.log((1 + total) / (1 + df)) + 1.0 for gram, df in document_frequency.items()}
+
+        classes = []
+        for (label, payload), group in grouped.items():
+            centroid = defaultdict(float)
+            for grams in group:
+                vector = _normalize({gram: (1 + math.log(count)) * idf[gram] for gram, count in grams.items()})
+                for gram, weight in vector.items():
+                    centroid[gram] += weight / len(group)
+            classes.append((label, payload, _normalize(centroid)))
+
+        return cls(idf, classes, ngram_range, threshold)
+
+    def vectorize(self, text: str) -> dict:
+        grams = char_ngrams(prepare_text(text), self.ngram_range)
+        return _normalize({gram: (1 + math.log(count)) * self.idf.get(gram, self._default_idf)
+                           for gram, count in grams.items()})
+
+    def scores(self, text: str) -> dict:
+        """Devuelve la similitud coseno del mensaje con cada clase que comparte algún n-grama."""
+        scores = defaultdict(float)
+        for gram, weight in self.vectorize(text).items():
+            for class_index, class_weight in self._postings.get(gram, ()):
+                scores[class_index] += weight * class_weight
+        return scores
+
+    def predict(self, text: str, threshold: Optional[float] = None) -> Optional[IntentPrediction]:
+        """Devuelve la intención más probable o ``None`` si no supera el umbral."""
+        scores = self.scores(text)
+        if not scores:
+            return None
+        class_index, score = max(scores.items(), key=lambda item: item[1])
+        if score < (self.threshold if threshold is None else threshold):
+            return None
+        label, payload, _ = self.classes[class_index]
+        return IntentPrediction(label, payload, score)
+
+    def to_dict(self) -> dict:
+        return {
+            "version": MODEL_VERSION,
+            "ngram_range": list(self.ngram_range),
+            "threshold": self.threshold,
+            "idf": {gram: round(value, 5) for gram, value in self.idf.items()},
+            "classes": [
+                {"label": label, "payload": payload,
+                 "weights": {gram: round(weight, 5) for gram, weight in weights.items()}}
+                for label, payload, weights in self.classes
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "IntentClassifier":
+        if data.get("version") != MODEL_VERSION:
+            raise ValueError(f"Versión de modelo no soportada: {data.get('version')}")
+        classes = [(item["label"], item["payload"], item["weights"]) for item in data["classes"]]
+        return cls(data["idf"], classes, data["ngram_range"], data["threshold"])
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_intent_classifier(path: str) -> Optional[IntentClassifier]:
+    """Carga el modelo serializado; si no existe o es inválido, el bot sigue funcionando sin él."""
+    if not path or not os.path.exists(path):
+        logger.warning("Intent classifier model not found at %s, skipping local classification", path)
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            classifier = IntentClassifier.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError) as e:
+        logger.error("Could not load intent classifier model from %s: %s", path, e)
+        return None
+    logger.info("Intent classifier loaded with %d classes", len(classifier.classes))
+    return classifier
+
+
+_classifier: Optional[IntentClassifier] = None
+_loaded = False
+
+
+def get_intent_classifier() -> Optional[IntentClassifier]:
+    """El modelo de ``settings.intent_model_path``, cargado la primera vez que se pide (o al calentar)."""
+    global _classifier, _loaded
+    if not _loaded:
+        from app.config import settings
+
+        _classifier = load_intent_classifier(settings.intent_model_path)
+        _loaded = True
+    return _classifier
@@ -0,0 +1,39 @@
+"""Cliente de OpenAI cargado bajo demanda.
+
+``import openai`` arrastra aiohttp, requests y NumPy (unos 0,3 s) y sólo lo necesitan los mensajes que
+acaban en GPT, así que no se importa al cargar los manejadores: lo hace el calentamiento del arranque
+(``app.startup``) en un hilo, en paralelo con el resto, o la primera llamada si no hubo calentamiento.
+"""
+import logging
+import threading
+from urllib.parse import urlparse
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_BASE = "https://api.openai.com/v1"
+
+_openai = None
+_lock = threading.Lock()
+
+
+def get_openai():
+    """El módulo ``openai`` ya configurado (clave y endpoint)."""
+    global _openai
+    if _openai is None:
+        with _lock:
+            if _openai is None:
+                import openai
+
+                openai.api_key = settings.openai_api_key
+                if settings.openai_api_base:
+                    openai.api_base = settings.openai_api_base
+                _openai = openai
+                logger.debug("OpenAI client loaded")
+    return _openai
+
+
+def api_host() -> str:
+    """Host del endpoint de GPT (para resolver su DNS antes de la primera llamada)."""
+    return urlparse(settings.openai_api_base or DEFAULT_API_BASE).hostname
@@ -0,0 +1,213 @@
+"""Patrones de expresiones regulares y palabras clave usadas para enrutar los mensajes de texto.
+
+Se mantienen separados de ``gpt_integration`` para poder reutilizarlos sin importar
+las dependencias del bot (p. ej. desde los scripts de entrenamiento del clasificador).
+"""
+from app.utils.aliases import alias_registry
+
+# Definir constantes para patrones de expresiones regulares
+MENU_PATTERNS = [
+    r'\bmen[úu]\b', r'\bcarta\b', r'\bver opciones\b', r'\bver men[úu]\b', r'\bver carta\b'
+]
+
+# Expresiones regulares para obtener el producto más pedido
+MOST_ORDERED_PRODUCT_PATTERNS = [
+    r'\bproducto m[aá]s pedido\b', r'\borden m[aá]s pedida\b', r'\bproducto m[aá]s vendido\b',
+    r'\borden m[aá]s vendida\b', r'\bcu[aá]l es el producto más pedido\b', r'\bcu[aá]l es el producto m[aá]s popular\b',
+    r'\bcu[aá]l es el producto m[aá]s vendido\b', r'\bcu[aá]l es la orden m[aá]s pedida\b',
+    r'\bcu[aá]l es el pedido m[aá]s popular\b', r'\bcu[aá]l es la venta m[aá]s popular\b',
+    r'\bcu[aá]l es la orden m[aá]s vendida\b', r'\bcu[aá]l es la venta m[aá]s vendida\b',
+]
+
+MOST_SOLD_DRINK_PATTERNS = [
+    r'\bbebida m[aá]s vendida\b', r'\bbebida m[aá]s popular\b', r'\bbebida m[aá]s pedida\b',
+    r'\bcu[aá]l es la bebida más vendida\b', r'\bcu[aá]l es la bebida más popular\b',
+    r'\bcu[aá]l es la bebida más pedida\b', r'\bcu[aá]l es la bebida más solicitada\b',
+    r'[Qq]u[eé] bebida es la m[aá]s vendida\b', r'[Qq]u[eé] bebida es la m[aá]s popular\b'
+]
+
+MOST_SOLD_SPORT_DRINK_PATTERNS = [
+    r'\bbebida deportiva m[aá]s vendida\b', r'\bbebida deportiva m[aá]s popular\b',
+    r'\bbebida deportiva m[aá]s pedida\b',
+    r'\bcu[aá]l es la bebida deportiva más vendida\b', r'\bcu[aá]l es la bebida deportiva más popular\b',
+    r'\bcu[aá]l es la bebida deportiva más pedida\b', r'\bcu[aá]l es la bebida deportiva más solicitada\b',
+    r'[Qq]u[eé] bebida deportiva es la m[aá]s vendida\b', r'[Qq]u[eé] bebida deportiva es la m[aá]s popular\b'
+]
+
+MOST_SOLD_BREAKFAST_PATTERNS = [
+    r'\bdesayuno m[aá]s vendido\b', r'\bdesayuno m[aá]s popular\b', r'\bdesayuno m[aá]s pedido\b',
+    r'\bcu[aá]l es el desayuno m[aá]s vendido\b', r'\bcu[aá]l es el desayuno m[aá]s popular\b',
+    r'\bcu[aá]l es el desayuno m[aá]s pedido\b', r'\bcu[aá]l es el desayuno m[aá]s solicitado\b',
+    r'[Qq]u[eé] desayuno es el m[aá]s vendido\b', r'[Qq]u[eé] desayuno es el m[aá]s popular\b'
+
+]
+
+MOST_SOLD_STARTER_PATTERNS = [
+    r'\bentrada m[aá]s vendida\b', r'\bentrada m[aá]s popular\b', r'\bentrada m[aá]s pedida\b',
+    r'\bcu[aá]l es la entrada m[aá]s vendida\b', r'\bcu[aá]l es la entrada más popular\b',
+    r'\bcu[aá]l es la entrada m[aá]s pedida\b', r'\bcu[aá]l es la entrada más solicitada\b',
+    r'[Qq]u[eé] entrada es la m[aá]s vendida\b', r'[Qq]u[eé] entrada es la m[aá]s popular\b'
+]
+
+MOST_SOLD_SECOND_COURSE_PATTERNS = [
+    r'\bsegundo m[aá]s vendido\b', r'\bsegundo m[aá]s popular\b', r'\bsegundo m[aá]s pedido\b',
+    r'\bcu[aá]l es el segundo más vendido\b', r'\bcu[aá]l es el segundo más popular\b',
+    r'\bcu[aá]l es el segundo más pedido\b', r'\bcu[aá]l es el segundo más solicitado\b',
+    r'[Qq]u[eé] segundo es el m[aá]s vendido\b', r'[Qq]u[eé] segundo es el m[aá]s popular\b'
+]
+
+MOST_SOLD_SNACK_PATTERNS = [
+    r'\bsnack m[aá]s vendido\b', r'\bsnack m[aá]s popular\b', r'\bsnack m[aá]s pedido\b',
+    r'\bcu[aá]l es el snack m[aá]s vendido\b', r'\bcu[aá]l es el snack m[aá]s popular\b',
+    r'\bcu[aá]l es el snack m[aá]s pedido\b', r'\bcu[aá]l es el snack m[aá]s solicitado\b',
+    r'[Qq]u[eé] snack es el m[aá]s vendido\b', r'[Qq]u[eé] snack es el m[aá]s popular\b'
+]
+
+# Expresiones regulares para detectar categorías como "desayunos", "bebidas", etc.
+PRODUCT_BY_NAME_CATEGORY_PATTERNS = [
+    r'\b(?:qu[eé]|me\s+gustar[ií]a)\s+(?:ver|tener|una|la|un)\s+(desayunos?|bebidas?|bebidas deportivas?|entradas?|platos?|snacks?|almuerzos?|segundos?|postres?)\b',
+    r'\b(?:mu[ée]strame|ens[ée][ñn]ame|ver|quiero\s+ver)\s+(?:el\s+)?(?:men[úu]|lista)\s+(?:de\s+)?(\w+)\b',
+    r'\b(?:productos|art[ií]culos|opciones|cosas)\s+(?:de\s+la\s+categor[ií]a\s+)?(\w+)\b',
+    r'\b(?:categor[ií]a\s+de\s+)?(\w+)\s+(?:productos|art[ií]culos|opciones|men[úu])\b',
+    r'\b(?:tienes|hay)\s+(\w+)\s+(?:en\s+(?:el\s+men[úu]|la\s+categor[ií]a))\b',
+    r'\b(?:quiero\s+la\s+lista\s+de\s+(\w+))\b',
+    r'\b(?:cu[áa]les\s+son\s+los\s+productos\s+de\s+la\s+categor[ií]a\s+(\w+))\b',
+]
+
+# Palabra clave -> categoría; los alias se editan en app/utils/text/aliases.json (ver app.utils.aliases)
+CATEGORY_KEYWORDS = alias_registry.category_keywords
+
+# Bloquea si en la búsqueda de productos aparece una palabra que puede ser una categoría
+PRODUCT_BY_NAME_PATTERN = [
+    r'\b(?:tienes|quiero|quisiera|necesito|me\s+gustar[ií]a(?:\s+pedir|ordenar)?|deseo)\s+(?:una|un|la|el)\s+(?!desayuno|almuerzo|segundo|entrada|snack|postre\b)([\w\s]+)\b',
+    r'\b(?:hay)\s+(?!desayuno|almuerzo|segundo|entrada|snack|postre\b)([\w\s]+)\b',
+    r'\b(?:me\s+gustar[ií]a)\s+(?:pedir|ordenar)\s+(?:una|un)\s+(?!desayuno|almuerzo|segundo|entrada|snack|postre\b)([\w\s]+)\b',
+    r'\b(?:quiero\s+la\s+opción\s+(?!desayuno|almuerzo|bebida|segundo|entrada|snack|postre\b)([\w\s]+))\b',
+    r'\b(?:quiero)\s+(?:una|un)\s+(?!desayuno|almuerzo|segundo|entrada|snack|postre\b)([\w\s]+)\b',
+]
+
+# Patrones de expresión regular para extraer la cantidad y el nombre del producto
+PRODUCT_ORDER_PATTERN = [
+    r'\b(?:quiero|quisiera|necesito)\s+(\d+)\s+(.*)',  # Captura varias palabras después del número
+]
+
+# Patrones de expresión regular para consultar la cantidad de un producto
+PRODUCT_QUANTITY_PATTERN = [
+    r'\bcu[aá]nt[oa]s?\s+([\w\s]+)\s+(?:tienes|hay|quedan)(?:\s+en\s+(?:stock|inventario|existencia|bodega|almac['
+    r'eé]n|dep[oó]sito|disponibles))?\b'
+]
+
+# Patrones de expresión regular para consultar el precio por nombre de producto
+PRODUCT_PRICE_PATTERN = [
+    r'\bcu[aá]nto\s+(?:cuesta|vale|valen|cuestan)\s+(?:el|la|los|las)?\s*(.*)\b',
+    r'\bqu[eé]\s+(?:precio|valor|costo)\s+(?:tiene|tienen)\s+(?:el|la|los|las)?\s*(.*)\b',
+    r'\bprecio\s+(?:del|de\s+la|de\s+los|de\s+las)?\s*(.*)\b',
+    r'\bcosto\s+(?:del|de\s+la|de\s+los|de\s+las)?\s*(.*)\b',
+    r'\bvalor\s+(?:del|de\s+la|de\s+los|de\s+las)?\s*(.*)\b'
+]
+
+# Patrones de expresión regular para recomendar comidas según un presupuesto (el grupo 1 es el monto)
+_AMOUNT = r'\$?\s*(\d+(?:[.,]\d{1,2})?)\s*(?:d[oó]lares|usd|\$)?'
+BUDGET_PATTERNS = [
+    r'\bqu[eé]\s+(?:puedo|podr[ií]a)\s+(?:comer|almorzar|pedir|comprar)\s+con\s+' + _AMOUNT,
+    r'\bqu[eé]\s+(?:me\s+)?alcanza\s+con\s+' + _AMOUNT,
+    r'\b(?:tengo|traigo)\s+' + _AMOUNT + r'\s*(?:para\s+(?:comer|almorzar|el\s+almuerzo))',
+    r'\bpresupuesto\s+(?:es\s+)?de\s+' + _AMOUNT,
+    r'\balmuerzo\s+(?:completo\s+)?(?:de|por|con|hasta)\s+(?:menos\s+de\s+)?\$\s*(\d+(?:[.,]\d{1,2})?)',
+]
+
+RECOMMEND_PRODUCT_PATTERNS = {
+    "drink": [
+        r'\bbebida recomendada\b', r'\bqu[eé] bebida recomiendas\b', r'\bqu[eé] bebida me recomiendas\b',
+        r'\bqu[eé] bebida es buena\b', r'\bqu[eé] bebida econ[oó]mica me recomiendas\b',
+        r'\bqu[eé] bebida es buena y econ[oó]mica\b'
+    ],
+    "sport_drink": [
+        r'\bbebida deportiva recomendada\b', r'\bqu[eé] bebida deportiva recomiendas\b',
+        r'\bqu[eé] bebida deportiva me recomiendas\b',
+        r'\bqu[eé] bebida deportiva es buena\b', r'\bqu[eé] bebida deportiva econ[oó]mica me recomiendas\b',
+        r'\bqu[eé] bebida deportiva es buena y econ[oó]mica\b'
+    ],
+    "breakfast": [
+        r'\bdesayuno recomendado\b', r'\bqu[eé] desayuno recomiendas\b', r'\bqu[eé] desayuno me recomiendas\b',
+        r'\bqu[eé] desayuno es bueno\b', r'\bqu[eé] desayuno econ[oó]mico me recomiendas\b',
+        r'\bqu[eé] desayuno es bueno y econ[oó]mico\b'
+    ],
+    "starter": [
+        r'\bentrada recomendada\b', r'\bqu[eé] entrada recomiendas\b', r'\bqu[eé] entrada me recomiendas\b',
+        r'\bqu[eé] entrada es buena\b', r'\bqu[eé] entrada econ[oó]mica me recomiendas\b',
+        r'\bqu[eé] entrada es buena y econ[oó]mica\b'
+    ],
+    "second_course": [
+        r'\bsegundo recomendado\b', r'\bqu[eé] segundo recomiendas\b', r'\bqu[eé] segundo me recomiendas\b',
+        r'\bqu[eé] segundo es bueno\b', r'\bqu[eé] segundo econ[oó]mico me recomiendas\b',
+        r'\bqu[eé] segundo es bueno y econ[oó]mico\b', r'\bqu[eé] plato fuerte recomiendas\b',
+        r'\bqu[eé] plato fuerte me recomiendas\b', r'\bqu[eé] plato fuerte es bueno\b',
+        r'[Qq]u[eé] plato fuerte es el m[aá]s comprado\b', r'\bqu[eé] plato fuerte es el mas vendido\b'
+    ],
+    "snack": [
+        r'\bsnack recomendado\b', r'\bqu[eé] snack recomiendas\b', r'\bqu[eé] snack me recomiendas\b',
+        r'\bqu[eé] snack es bueno\b', r'\bqu[eé] snack econ[oó]mico me recomiendas\b',
+        r'\bqu[eé] snack es bueno y econ[oó]mico\b'
+    ],
+    "main": [
+        r'\balmuerzo recomendado\b', r'\bqu[eé] almuerzo recomiendas\b', r'\bqu[eé] almuerzo me recomiendas\b',
+        r'\bcu[aá]l es el plato m[aá]s popular\b', r'\bcu[aá]l es el plato m[aá]s vendido\b',
+        r'\bcu[aá]l es el plato m[aá]s pedido\b',
+        r'\bqu[eé] plato me recomiendas\b',
+        r'\bqu[eé] almuerzo es bueno\b', r'\bqu[eé] almuerzo econ[oó]mico me recomiendas\b',
+        r'\bqu[eé] almuerzo es bueno y econ[oó]mico\b',
+        r'\bdeseo un almuerzo\b', r'\bqu[eé] almuerzo me recomiendas\b',
+        r'\bdame un almuerzo\b'
+
+    ]
+}
+
+# Definir patrones para saludos y conversaciones comunes
+GREETING_PATTERNS = [
+    r'\bhola\b', r'\bhi\b', r'\bhello\b', r'\bbuenos días\b', r'\bbuenas tardes\b', r'\bbuenas noches\b',
+    r'\bcómo estás\b', r'\bqué tal\b', r'\bqué pasa\b'
+]
+
+EXIT_PATTERNS = [
+    r'\bsalir\b', r'\bsalir del chat\b', r'\bterminar\b', r'\bterminar chat\b', r'\badi[oó]s\b', r'\bchao\b',
+    r'\bnos vemos\b', r'\bhasta luego\b', r'\bnos vemos luego\b', r'\bfinalizar\b', r'\bfinalizar chat\b',
+    r'\bcerrar chat\b', r'\bterminar conversaci[oó]n\b', r'\bterminar chat\b', r'\bes todo\b', r'\bfin\b',
+    r'\bfin del chat\b', r'\bfin de la conversaci[oó]n\b', r'\bfin de la conversación\b',
+    r'\bes todo gracias\b', r'\bno necesito nada m[aá]s\b', r'\bno necesito ayuda\b',
+    r'\bno necesito nada m[aá]s por ahora\b', r'\bno necesito nada m[aá]s gracias\b',
+    r'\bno necesito nada m[aá]s por el momento\b', r'\bsolo eso\b', r'\bgracias\b', r'\bhasta aqu[ií]\b',
+    r'\bhasta aqu[ií] llegamos\b'
+]
+
+# Intenciones de respuesta fija; el clasificador local aprende sus ejemplos a partir de estos patrones
+INTENT_PATTERNS = {
+    "menu": MENU_PATTERNS,
+    "most_ordered_product": MOST_ORDERED_PRODUCT_PATTERNS,
+    "most_sold_drink": MOST_SOLD_DRINK_PATTERNS,
+    "most_sold_sport_drink": MOST_SOLD_SPORT_DRINK_PATTERNS,
+    "most_sold_breakfast": MOST_SOLD_BREAKFAST_PATTERNS,
+    "most_sold_starter": MOST_SOLD_STARTER_PATTERNS,
+    "most_sold_second": MOST_SOLD_SECOND_COURSE_PATTERNS,
+    "most_sold_snack": MOST_SOLD_SNACK_PATTERNS,
+    "recommend_drink": RECOMMEND_PRODUCT_PATTERNS["drink"],
+    "recommend_sport_drink": RECOMMEND_PRODUCT_PATTERNS["sport_drink"],
+    "recommend_breakfast": RECOMMEND_PRODUCT_PATTERNS["breakfast"],
+    "recommend_starter": RECOMMEND_PRODUCT_PATTERNS["starter"],
+    "recommend_second": RECOMMEND_PRODUCT_PATTERNS["second_course"],
+    "recommend_snack": RECOMMEND_PRODUCT_PATTERNS["snack"],
+    "recommend_main": RECOMMEND_PRODUCT_PATTERNS["main"],
+}
+
+
+def all_patterns() -> list:
+    """Todos los patrones del módulo, sin repetir (para compilarlos de antemano al arrancar)."""
+    patterns = []
+    groups = [value for name, value in globals().items() if name.isupper() and isinstance(value, (list, dict))]
+    while groups:
+        group = groups.pop()
+        if isinstance(group, dict):
+            groups.extend(value for value in group.values() if isinstance(value, (list, dict)))
+        else:
+            patterns.extend(pattern for pattern in group if isinstance(pattern, str))
+    return list(dict.fromkeys(patterns))
@@ -0,0 +1,181 @@
+"""Corrección de faltas de ortografía antes de enrutar los mensajes ("limonda" -> "limonada").
+
+Corrector al estilo SymSpell: cada palabra del vocabulario se guarda bajo todas las variantes que
+resultan de borrarle hasta ``MAX_EDIT_DISTANCE`` letras, de modo que una palabra mal escrita se
+corrige generando sólo sus propios borrados y consultando el diccionario (búsquedas O(1)), sin
+comparar con todo el vocabulario. El vocabulario sale del catálogo (productos, categorías y alias)
+y de las palabras de los patrones de ``app.GPT.patterns``; las palabras de las respuestas del bot y
+las del español corriente (``text/common_words.json``: "tarda", "llego", "hora"...) se reconocen como
+correctas para no "corregirlas" hacia un producto.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from typing import Dict, Iterable, Optional, Set
+
+from app.catalog_reader import catalog_reader
+from app.config import settings
+from app.GPT.patterns import (BUDGET_PATTERNS, EXIT_PATTERNS, GREETING_PATTERNS, INTENT_PATTERNS,
+                              PRODUCT_BY_NAME_CATEGORY_PATTERNS, PRODUCT_ORDER_PATTERN, PRODUCT_PRICE_PATTERN,
+                              PRODUCT_QUANTITY_PATTERN)
+from app.utils import metrics
+from app.utils.aliases import alias_registry
+from app.utils.normalization import fold_accents
+from app.utils.responses import responses
+from app.utils.rules import rules
+
+logger = logging.getLogger(__name__)
+
+MAX_EDIT_DISTANCE = 2
+# Como en SymSpell, los borrados se generan sobre el prefijo: acota la memoria con palabras largas
+PREFIX_LENGTH = 7
+# Las palabras más cortas no se corrigen ("sal", "pan" y "te" están a una letra de demasiadas cosas)
+MIN_WORD_LENGTH = 4
+
+_WORD = re.compile(r"[a-zñ]+")
+_MESSAGE_WORD = re.compile(r"[^\W\d_]+")
+# '[áa]' -> 'á' para extraer palabras de las expresiones regulares
+_CHAR_CLASS = re.compile(r"\[([^\]\\])[^\]]*\]")
+
+# Palabras frecuentes del español que no son faltas aunque no estén en el catálogo ni en los patrones
+common_words_file_path = os.path.join(os.path.dirname(__file__), "..", "utils", "text", "common_words.json")
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    results = set()
+    frontier = {word[:PREFIX_LENGTH]}
+    for _ in range(max_distance):
+        frontier = {candidate[:i] + candidate[i + 1:] for candidate in frontier for i in range(len(candidate))}
+        results |= frontier
+    return results
+
+
+def _distance(a: str, b: str, limit: int) -> int:
+    """Distancia de Damerau-Levenshtein (alineamiento óptimo de cadenas); ``limit + 1`` si la supera."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_previous, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous_previous is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2]
+                    and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+def max_distance_for(word: str) -> int:
+    return 1 if len(word) < 8 else MAX_EDIT_DISTANCE
+
+
+class SpellingCorrector:
+    def __init__(self, vocabulary: Dict[str, int], known_words: Iterable[str] = ()):
+        self.vocabulary = vocabulary  # palabra -> frecuencia (desempata entre candidatos)
+        self.known_words = set(known_words) | set(vocabulary)
+        self._deletes: Dict[str, Set[str]] = {}
+        for word in vocabulary:
+            for variant in _deletes(word, MAX_EDIT_DISTANCE) | {word[:PREFIX_LENGTH]}:
+                self._deletes.setdefault(variant, set()).add(word)
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.vocabulary)
+
+    def is_known(self, word: str) -> bool:
+        # Los plurales de palabras conocidas también lo son ("limonadas", "panes")
+        return (word in self.known_words or (word.endswith("s") and word[:-1] in self.known_words)
+                or (word.endswith("es") and word[:-2] in self.known_words))
+
+    def suggest(self, word: str) -> Optional[str]:
+        """Palabra del vocabulario más cercana (a la distancia permitida), o None."""
+        limit = max_distance_for(word)
+        candidates = set()
+        for variant in _deletes(word, limit) | {word[:PREFIX_LENGTH]}:
+            candidates |= self._deletes.get(variant, set())
+
+        best, best_key = None, None
+        for candidate in candidates:
+            distance = _distance(word, candidate, limit)
+            if distance <= limit:
+                key = (distance, -self.vocabulary[candidate], candidate)
+                if best_key is None or key < best_key:
+                    best, best_key = candidate, key
+        return best
+
+    def correct(self, text: str) -> str:
+        """Texto en minúsculas con las palabras desconocidas corregidas (las demás no cambian)."""
+        def replace(match: re.Match) -> str:
+            word = match.group(0)
+            folded = fold_accents(word)
+            if len(folded) < MIN_WORD_LENGTH or self.is_known(folded):
+                return word
+            return self.suggest(folded) or word
+
+        return _MESSAGE_WORD.sub(replace, text.lower())
+
+
+def pattern_words(patterns: Iterable[str]) -> Counter:
+    words = Counter()
+    for pattern in patterns:
+        literal = _CHAR_CLASS.sub(r"\1", pattern.replace("\\b", " ").replace("\\s", " "))
+        words.update(_WORD.findall(fold_accents(literal)))
+    return words
+
+
+def _static_vocabulary() -> Counter:
+    patterns = [pattern for group in INTENT_PATTERNS.values() for pattern in group]
+    for group in (GREETING_PATTERNS, EXIT_PATTERNS, BUDGET_PATTERNS, PRODUCT_BY_NAME_CATEGORY_PATTERNS,
+                  PRODUCT_ORDER_PATTERN, PRODUCT_QUANTITY_PATTERN, PRODUCT_PRICE_PATTERN):
+        patterns.extend(group)
+    words = pattern_words(patterns)
+    for category, aliases in alias_registry.category_aliases.items():
+        words.update(_WORD.findall(fold_accents(" ".join([category, *aliases]))))
+    for product, aliases in alias_registry.product_aliases.items():
+        words.update(_WORD.findall(fold_accents(" ".join([product, *aliases]))))
+    return words
+
+
+def _known_words() -> Set[str]:
+    texts = [value for value in responses.values() if isinstance(value, str)] + list(rules)
+    with open(common_words_file_path, "r", encoding="utf-8") as f:
+        texts.extend(json.load(f)["words"])
+    return set(_WORD.findall(fold_accents(" ".join(texts))))
+
+
+def build_spelling_corrector(product_names: Iterable[str], category_names: Iterable[str]) -> SpellingCorrector:
+    vocabulary = _static_vocabulary()
+    for name in [*product_names, *category_names]:
+        vocabulary.update(_WORD.findall(fold_accents(name)))
+    # Las palabras cortas no se corrigen, así que tampoco sirven como destino de una corrección
+    return SpellingCorrector({word: count for word, count in vocabulary.items() if len(word) >= MIN_WORD_LENGTH},
+                             known_words=_known_words() | set(vocabulary))
+
+
+_corrector: Optional[SpellingCorrector] = None
+_lock = asyncio.Lock()
+
+
+async def get_spelling_corrector() -> SpellingCorrector:
+    """Devuelve el corrector, reconstruyéndolo con el catálogo si no existe o ha caducado."""
+    global _corrector
+    if _corrector is not None and time.monotonic() - _corrector.built_at < settings.catalog_index_ttl:
+        return _corrector
+    async with _lock:
+        if _corrector is None or time.monotonic() - _corrector.built_at >= settings.catalog_index_ttl:
+            started = time.perf_counter()
+            products, categories = await asyncio.gather(catalog_reader.all_products(), catalog_reader.categories())
+            _corrector = await asyncio.to_thread(build_spelling_corrector, [p.name for p in products],
+                                                 [c.name for c in categories])
+            elapsed = time.perf_counter() - started
+            metrics.observe("spelling_corrector_build_seconds", elapsed)
+            logger.info("Spelling corrector built with %d words in %.3f s", len(_corrector), elapsed)
+    return _corrector
@@ -0,0 +1,133 @@
+"""Respuestas de GPT en streaming mediante ediciones progresivas de un mensaje de Telegram.
+
+Se envía un mensaje provisional y se va editando a medida que llegan los tokens, con un intervalo
+mínimo entre ediciones para respetar los límites de Telegram. El filtro de recomendaciones
+("recomiendo", "te sugiero", "prueba") se aplica sobre el texto acumulado en cada paso, así que
+una respuesta filtrada se corta en cuanto aparece la palabra clave.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional, Tuple
+
+from telegram import Message
+from telegram.error import BadRequest, RetryAfter, TelegramError
+
+from app.GPT.openai_client import get_openai
+from app.utils.circuit_breaker import CircuitOpen, DeadlineExceeded, openai_breaker
+
+logger = logging.getLogger(__name__)
+
+# Evitar usar recomendaciones de GPT si son de productos específicos
+GPT_FILTER_KEYWORDS = ("recomiendo", "te sugiero", "prueba")
+GPT_FILTERED_RESPONSE = ("Lamentablemente no encuentro información a tu pregunta procura "
+                         "empezar con preguntas claras, puedes decir: quiero pedir tal cosa.")
+GPT_ERROR_RESPONSE = "Lo siento, algo salió mal al procesar tu solicitud."
+STREAM_PLACEHOLDER = "✍️ ..."
+
+
+def is_filtered_response(text: str) -> bool:
+    """Indica si la respuesta de GPT incluye recomendaciones de productos."""
+    text = text.lower()
+    return any(keyword in text for keyword in GPT_FILTER_KEYWORDS)
+
+
+class ThrottledMessageEditor:
+    """Edita un mensaje como máximo una vez cada ``interval`` segundos."""
+
+    def __init__(self, message: Message, interval: float):
+        self.message = message
+        self.interval = interval
+        self._last_text = message.text
+        self._next_edit_at = 0.0
+
+    async def edit(self, text: str, force: bool = False) -> None:
+        text = text.strip()
+        if not text or text == self._last_text:
+            return
+        now = time.monotonic()
+        if not force and now < self._next_edit_at:
+            return
+        try:
+            await self.message.edit_text(text)
+            self._last_text = text
+            self._next_edit_at = now + self.interval
+        except RetryAfter as e:
+            retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+            logger.warning("Edit rate limited, retrying after %s s", retry_after)
+            if not force:
+                # Se omiten las ediciones intermedias hasta que Telegram lo permita
+                self._next_edit_at = now + float(retry_after)
+                return
+            # La edición final siempre debe llegar
+            await asyncio.sleep(float(retry_after))
+            await self.message.edit_text(text)
+            self._last_text = text
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                raise
+
+
+async def stream_gpt_response(message: Message, messages: list, edit_interval: float = 1.0,
+                              **completion_kwargs) -> Tuple[Optional[str], Message]:
+    """Envía un mensaje provisional y lo va completando con la respuesta de GPT.
+
+    Devuelve el texto final (``None`` si se filtró o falló) y el mensaje enviado. Si el circuito de
+    OpenAI está abierto o se agotó el plazo, borra el mensaje provisional y relanza la excepción para
+    que el llamador sirva la respuesta degradada.
+    """
+    placeholder = await message.reply_text(STREAM_PLACEHOLDER)
+    editor = ThrottledMessageEditor(placeholder, edit_interval)
+    text = ""
+    stream = None
+    try:
+        stream = await openai_breaker.call(
+            get_openai().ChatCompletion.acreate(messages=messages, stream=True, **completion_kwargs))
+        async for chunk in stream:
+            delta = chunk["choices"][0].get("delta", {}).get("content")
+            if not delta:
+                continue
+            text += delta
+            if is_filtered_response(text):
+                await _close_stream(stream)
+                logger.info("Streaming GPT response filtered after %d characters", len(text))
+                await editor.edit(GPT_FILTERED_RESPONSE, force=True)
+                return None, placeholder
+            await editor.edit(text)
+    except asyncio.CancelledError:
+        # La respuesta ya no sirve (app.GPT.coalescing): no dejar el mensaje provisional a medias
+        await _delete_placeholder(placeholder)
+        raise
+    except (CircuitOpen, DeadlineExceeded):
+        await _delete_placeholder(placeholder)
+        raise
+    except Exception as e:
+        if stream is not None and not isinstance(e, TelegramError):
+            # openai_breaker.call sólo cubre la apertura del stream: un corte al leerlo también es un fallo
+            openai_breaker.record_failure()
+        logger.error("Error streaming GPT response: %s", e)
+        await editor.edit(GPT_ERROR_RESPONSE, force=True)
+        return None, placeholder
+
+    text = text.strip()
+    if not text:
+        await editor.edit(GPT_ERROR_RESPONSE, force=True)
+        return None, placeholder
+    await editor.edit(text, force=True)
+    return text, placeholder
+
+
+async def _close_stream(stream) -> None:
+    aclose = getattr(stream, "aclose", None)
+    if aclose is not None:
+        try:
+            await aclose()
+        except Exception as e:  # El cierre es de mejor esfuerzo: la respuesta ya está decidida
+            logger.debug("Could not close GPT stream: %s", e)
+
+
+async def _delete_placeholder(placeholder: Message) -> None:
+    try:
+        await placeholder.delete()
+    except TelegramError as e:
+        logger.debug("Could not delete GPT placeholder: %s", e)
@@ -0,0 +1,59 @@
+"""Registros de sólo lectura del catálogo (categorías y productos).
+
+Los manejadores sólo leen nombre, precio, stock e imagen, así que las consultas seleccionan columnas con
+``select()`` de Core y las convierten en tuplas inmutables, sin crear instancias del ORM (mapa de
+identidad, estado por instancia, relaciones perezosas). Los registros tienen los mismos nombres de
+atributo que los modelos, de modo que el código que formatea ``product.name`` o ``product.price``
+no cambia.
+"""
+from decimal import Decimal
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import select
+
+from app.models import Category, Product
+
+
+class CategoryRecord(NamedTuple):
+    id: int
+    name: str
+    slug: Optional[str]
+
+
+class ProductRecord(NamedTuple):
+    id: int
+    name: str
+    price: Decimal
+    stock: Optional[int]
+    categoryId: Optional[int]
+    image: Optional[str]
+
+
+CATEGORY_COLUMNS = (Category.id, Category.name, Category.slug)
+PRODUCT_COLUMNS = (Product.id, Product.name, Product.price, Product.stock, Product.categoryId,
+                   Product.image)
+
+
+def select_categories(*extra_columns):
+    return select(*CATEGORY_COLUMNS, *extra_columns)
+
+
+def select_products(*extra_columns):
+    """``select()`` de las columnas de ``ProductRecord`` (más las indicadas, p. ej. un agregado)."""
+    return select(*PRODUCT_COLUMNS, *extra_columns)
+
+
+def to_category(row) -> CategoryRecord:
+    return CategoryRecord(*tuple(row)[:len(CATEGORY_COLUMNS)])
+
+
+def to_product(row) -> ProductRecord:
+    return ProductRecord(*tuple(row)[:len(PRODUCT_COLUMNS)])
+
+
+async def fetch_categories(session, query) -> List[CategoryRecord]:
+    return [CategoryRecord(*row) for row in (await session.execute(query)).all()]
+
+
+async def fetch_products(session, query) -> List[ProductRecord]:
+    return [ProductRecord(*row) for row in (await session.execute(query)).all()]
@@ -0,0 +1,91 @@
+"""Índice en memoria del catálogo para las búsquedas que se repiten en cada pulsación (modo inline).
+
+Los nombres se normalizan de una vez con ``normalize_product_names`` y se indexan por palabra; una
+búsqueda exige que cada palabra del texto sea prefijo de alguna palabra del nombre, de modo que
+``@MesaBot limo`` ya encuentra "Limonada". El índice es común a todos los bots del proceso y se
+reconstruye desde la base de datos cuando caduca (``settings.catalog_index_ttl``).
+"""
+import asyncio
+import bisect
+import logging
+import time
+from typing import Dict, List, Optional, Sequence, Set
+
+from app.catalog import ProductRecord
+from app.catalog_reader import catalog_reader
+from app.config import settings
+from app.utils import metrics
+from app.utils.aliases import AliasAutomaton, alias_registry
+from app.utils.normalization import fold_accents, normalize_product_name, normalize_product_names
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogIndex:
+    def __init__(self, products: Sequence[ProductRecord]):
+        self.products = sorted(products, key=lambda p: (p.name, p.id))
+        self.normalized_names = normalize_product_names(p.name for p in self.products)
+        postings: Dict[str, Set[int]] = {}
+        for position, name in enumerate(self.normalized_names):
+            for token in name.split():
+                postings.setdefault(token, set()).add(position)
+        self._postings = postings
+        self._tokens = sorted(postings)
+        # Nombres completos en un mensaje ("sopa de queso"), para no confundirlos con una categoría
+        self.names = AliasAutomaton({fold_accents(p.name): p.name for p in self.products})
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def _prefix_matches(self, prefix: str) -> Set[int]:
+        matches = set()
+        start = bisect.bisect_left(self._tokens, prefix)
+        for token in self._tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            matches |= self._postings[token]
+        return matches
+
+    def search(self, text: str, limit: int = 20) -> List[ProductRecord]:
+        """Productos cuyo nombre contiene (como prefijo de palabra) todas las palabras del texto."""
+        tokens = alias_registry.expand_product_aliases(normalize_product_name(text)).split()
+        if not tokens:
+            return self.products[:limit]
+
+        candidates = None
+        # Primero las palabras más largas: suelen ser las más selectivas
+        for token in sorted(tokens, key=len, reverse=True):
+            matches = self._prefix_matches(token)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+
+        def rank(position):
+            # Coincidencias exactas de palabra primero, después los nombres más cortos
+            name_tokens = self.normalized_names[position].split()
+            exact = sum(token in name_tokens for token in tokens)
+            return -exact, len(name_tokens), position
+
+        return [self.products[position] for position in sorted(candidates, key=rank)[:limit]]
+
+
+_index: Optional[CatalogIndex] = None
+_lock = asyncio.Lock()
+
+
+async def get_catalog_index() -> CatalogIndex:
+    """Devuelve el índice, reconstruyéndolo si no existe o ha caducado."""
+    global _index
+    if _index is not None and time.monotonic() - _index.built_at < settings.catalog_index_ttl:
+        return _index
+    async with _lock:
+        # Otra tarea pudo reconstruirlo mientras se esperaba el lock
+        if _index is None or time.monotonic() - _index.built_at >= settings.catalog_index_ttl:
+            started = time.perf_counter()
+            _index = CatalogIndex(await catalog_reader.all_products())
+            elapsed = time.perf_counter() - started
+            metrics.observe("catalog_index_build_seconds", elapsed)
+            metrics.set_gauge("catalog_index_products", len(_index))
+            logger.info("Catalog index built with %d products in %.3f s", len(_index), elapsed)
+    return _index
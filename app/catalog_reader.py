@@ -0,0 +1,302 @@
+"""Lecturas más frecuentes del catálogo con sentencias preparadas de asyncpg.
+
+Las consultas de forma fija (lista de categorías, productos de una categoría, producto por id y más
+vendido de una categoría) se ejecutan directamente sobre la conexión asyncpg del pool de SQLAlchemy:
+sin sesión del ORM, sin ``session.begin()`` y sin compilar la sentencia en cada llamada. Cada
+sentencia se prepara una vez por conexión y se reutiliza.
+
+Con otros motores (p. ej. SQLite en pruebas) se ejecutan las mismas consultas con Core a través de
+``SessionLocal``. Ambos caminos devuelven los registros de ``app.catalog``.
+
+Todas las lecturas pasan por ``database_breaker`` (app.utils.circuit_breaker). El último catálogo
+completo leído (``all_products`` y ``categories``, que los índices en memoria refrescan cada
+``settings.catalog_index_ttl``) se conserva como instantánea: si la base de datos falla o el circuito
+está abierto, el menú, los precios, las existencias y los más vendidos se sirven desde ella (modo
+degradado). ``app.catalog_snapshot`` la guarda en un archivo local y la restaura al arrancar: hasta la
+primera lectura completa de la base de datos (``refresh``) se responde sólo desde ella.
+"""
+import logging
+import time
+import weakref
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, select, tuple_
+
+from app.catalog import (CategoryRecord, ProductRecord, fetch_categories, fetch_products, select_categories,
+                         select_products, to_product)
+from app.database import SessionLocal, get_engine
+from app.models import Category, OrderProducts, Product
+from app.utils import metrics
+from app.utils.circuit_breaker import database_breaker
+
+logger = logging.getLogger(__name__)
+
+_PRODUCT_FIELDS = 'p.id, p.name, p.price, p.stock, p."categoryId", p.image'
+
+CATEGORIES_SQL = 'SELECT id, name, slug FROM "Category"'
+CATEGORY_BY_ID_SQL = 'SELECT id, name, slug FROM "Category" WHERE id = $1'
+PRODUCTS_BY_CATEGORY_SQL = f'SELECT {_PRODUCT_FIELDS} FROM "Product" p WHERE p."categoryId" = $1'
+PRODUCT_BY_ID_SQL = f'SELECT {_PRODUCT_FIELDS} FROM "Product" p WHERE p.id = $1'
+ALL_PRODUCTS_SQL = f'SELECT {_PRODUCT_FIELDS} FROM "Product" p'
+
+# Paginación por clave (name, id) sobre el índice Product(categoryId, name, id); el cursor es el id del
+# último (o primer) producto de la página anterior
+_PAGE_SQL = f'SELECT {_PRODUCT_FIELDS} FROM "Product" p WHERE p."categoryId" = $1'
+_ANCHOR = '((SELECT a.name FROM "Product" a WHERE a.id = $3), $3)'
+PRODUCTS_FIRST_PAGE_SQL = f'{_PAGE_SQL} ORDER BY p.name, p.id LIMIT $2'
+PRODUCTS_PAGE_AFTER_SQL = f'{_PAGE_SQL} AND (p.name, p.id) > {_ANCHOR} ORDER BY p.name, p.id LIMIT $2'
+PRODUCTS_PAGE_BEFORE_SQL = f'{_PAGE_SQL} AND (p.name, p.id) < {_ANCHOR} ORDER BY p.name DESC, p.id DESC LIMIT $2'
+
+BEST_SELLER_SQL = (f'SELECT {_PRODUCT_FIELDS}, coalesce(sum(op.quantity), 0) AS total_quantity '
+                   'FROM "Product" p JOIN "OrderProducts" op ON op."productId" = p.id '
+                   'WHERE p."categoryId" = $1 GROUP BY p.id ORDER BY total_quantity DESC LIMIT 1')
+
+
+class CatalogSnapshot(NamedTuple):
+    products: List[ProductRecord]
+    categories: List[CategoryRecord]
+    best_sellers: Dict[int, Tuple[int, int]]  # categoryId -> (id del producto, cantidad vendida)
+    taken_at: float  # time.time() de la lectura más antigua de productos y categorías
+
+
+def snapshot_best_seller(snapshot: CatalogSnapshot, category_id: int) -> Optional[Tuple[ProductRecord, int]]:
+    best_seller = snapshot.best_sellers.get(category_id)
+    if best_seller is None:
+        return None
+    product = next((p for p in snapshot.products if p.id == best_seller[0]), None)
+    return (product, best_seller[1]) if product is not None else None
+
+
+def snapshot_page(snapshot: CatalogSnapshot, category_id: int, limit: int, after_id: Optional[int] = None,
+                  before_id: Optional[int] = None) -> List[ProductRecord]:
+    """``CatalogReader.products_page`` sobre la instantánea."""
+    products = sorted((p for p in snapshot.products if p.categoryId == category_id), key=lambda p: (p.name, p.id))
+    backwards = after_id is None and before_id is not None
+    anchor_id = before_id if backwards else after_id
+    if anchor_id is None:
+        return products[:limit]
+    anchor = next(((p.name, p.id) for p in snapshot.products if p.id == anchor_id), None)
+    if anchor is None:
+        return []
+    if backwards:
+        return [p for p in products if (p.name, p.id) < anchor][-limit:]
+    return [p for p in products if (p.name, p.id) > anchor][:limit]
+
+
+class CatalogReader:
+    def __init__(self, engine=None, session_factory=SessionLocal):
+        # Sin engine se usa el del proceso (app.database.get_engine), que se crea al arrancar
+        self._engine = engine
+        self.session_factory = session_factory
+        # Sentencias preparadas por conexión de asyncpg; se liberan con la conexión
+        self._statements = weakref.WeakKeyDictionary()
+        # Funciones (sql, segundos) avisadas tras cada consulta directa; estas consultas no pasan por
+        # los eventos del engine (ver app.utils.query_budget)
+        self.observers = []
+        self._products: Optional[Tuple[List[ProductRecord], float]] = None
+        self._categories: Optional[Tuple[List[CategoryRecord], float]] = None
+        self._best_sellers: Dict[int, Tuple[int, int]] = {}
+        # Con una instantánea restaurada de disco se responde desde ella hasta que refresh() lo consiga
+        self.prefer_snapshot = False
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._engine = get_engine()
+        return self._engine
+
+    @engine.setter
+    def engine(self, engine) -> None:
+        self._engine = engine
+
+    @property
+    def use_asyncpg(self) -> bool:
+        return self.engine.dialect.driver == "asyncpg"
+
+    @property
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        """Último catálogo completo leído de la base de datos (None hasta leer productos y categorías)."""
+        if self._products is None or self._categories is None:
+            return None
+        return CatalogSnapshot(self._products[0], self._categories[0], dict(self._best_sellers),
+                               min(self._products[1], self._categories[1]))
+
+    def restore(self, snapshot: CatalogSnapshot) -> None:
+        """Carga una instantánea guardada y responde desde ella hasta la próxima lectura completa."""
+        self._products = (list(snapshot.products), snapshot.taken_at)
+        self._categories = (list(snapshot.categories), snapshot.taken_at)
+        self._best_sellers = dict(snapshot.best_sellers)
+        self.prefer_snapshot = True
+
+    async def refresh(self) -> CatalogSnapshot:
+        """Lee de la base de datos todo lo que guarda la instantánea y deja de preferir la restaurada."""
+        await database_breaker.call(self._live_all_products())
+        await database_breaker.call(self._live_categories())
+        await database_breaker.call(self._live_best_sellers())
+        if self.prefer_snapshot:
+            logger.info("Catalog caught up with the database")
+            self.prefer_snapshot = False
+        return self.snapshot
+
+    async def _read(self, name: str, live, fallback: Callable[[CatalogSnapshot], object]):
+        """Ejecuta la consulta a través del cortacircuitos; si falla, responde desde la instantánea."""
+        if self.prefer_snapshot and self.snapshot is not None:
+            live.close()
+            metrics.inc("catalog_snapshot_reads_total", query=name)
+            return fallback(self.snapshot)
+        try:
+            return await database_breaker.call(live)
+        except Exception as e:
+            snapshot = self.snapshot
+            if snapshot is None:
+                raise
+            metrics.inc("catalog_degraded_reads_total", query=name)
+            logger.warning("Serving %s from the catalog snapshot (%.0f s old): %r", name,
+                           time.time() - snapshot.taken_at, e)
+            return fallback(snapshot)
+
+    async def _fetch(self, sql: str, *args) -> list:
+        async with self.engine.connect() as conn:
+            raw_connection = await conn.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+            statements = self._statements.setdefault(driver_connection, {})
+            statement = statements.get(sql)
+            if statement is None:
+                statement = statements[sql] = await driver_connection.prepare(sql)
+            started = time.perf_counter()
+            rows = await statement.fetch(*args)
+        for observer in self.observers:
+            observer(sql, time.perf_counter() - started)
+        return rows
+
+    async def _execute_core(self, fetch, query):
+        async with self.session_factory() as session:
+            return await fetch(session, query)
+
+    async def _live_categories(self) -> List[CategoryRecord]:
+        if self.use_asyncpg:
+            categories = [CategoryRecord(*row) for row in await self._fetch(CATEGORIES_SQL)]
+        else:
+            categories = await self._execute_core(fetch_categories, select_categories())
+        self._categories = (categories, time.time())
+        return categories
+
+    async def categories(self) -> List[CategoryRecord]:
+        return await self._read("categories", self._live_categories(), lambda snapshot: list(snapshot.categories))
+
+    async def _live_category_by_id(self, category_id: int) -> Optional[CategoryRecord]:
+        if self.use_asyncpg:
+            rows = [CategoryRecord(*row) for row in await self._fetch(CATEGORY_BY_ID_SQL, category_id)]
+        else:
+            rows = await self._execute_core(fetch_categories, select_categories().where(Category.id == category_id))
+        return rows[0] if rows else None
+
+    async def category_by_id(self, category_id: int) -> Optional[CategoryRecord]:
+        return await self._read("category_by_id", self._live_category_by_id(category_id),
+                                lambda snapshot: next((c for c in snapshot.categories if c.id == category_id), None))
+
+    async def _live_products_by_category(self, category_id: int) -> List[ProductRecord]:
+        if self.use_asyncpg:
+            return [ProductRecord(*row) for row in await self._fetch(PRODUCTS_BY_CATEGORY_SQL, category_id)]
+        return await self._execute_core(fetch_products, select_products().where(Product.categoryId == category_id))
+
+    async def products_by_category(self, category_id: int) -> List[ProductRecord]:
+        return await self._read("products_by_category", self._live_products_by_category(category_id),
+                                lambda snapshot: [p for p in snapshot.products if p.categoryId == category_id])
+
+    async def _live_all_products(self) -> List[ProductRecord]:
+        if self.use_asyncpg:
+            products = [ProductRecord(*row) for row in await self._fetch(ALL_PRODUCTS_SQL)]
+        else:
+            products = await self._execute_core(fetch_products, select_products())
+        self._products = (products, time.time())
+        return products
+
+    async def all_products(self) -> List[ProductRecord]:
+        """Catálogo completo (para los índices en memoria)."""
+        return await self._read("all_products", self._live_all_products(), lambda snapshot: list(snapshot.products))
+
+    async def _live_products_page(self, category_id: int, limit: int, after_id: Optional[int],
+                                  before_id: Optional[int]) -> List[ProductRecord]:
+        backwards = after_id is None and before_id is not None
+        anchor_id = before_id if backwards else after_id
+        if self.use_asyncpg:
+            if anchor_id is None:
+                rows = await self._fetch(PRODUCTS_FIRST_PAGE_SQL, category_id, limit)
+            else:
+                sql = PRODUCTS_PAGE_BEFORE_SQL if backwards else PRODUCTS_PAGE_AFTER_SQL
+                rows = await self._fetch(sql, category_id, limit, anchor_id)
+            products = [ProductRecord(*row) for row in rows]
+        else:
+            query = select_products().where(Product.categoryId == category_id)
+            order = (Product.name, Product.id)
+            if anchor_id is not None:
+                key = tuple_(Product.name, Product.id)
+                anchor_name = select(Product.name).where(Product.id == anchor_id).scalar_subquery()
+                anchor = tuple_(anchor_name, anchor_id)
+                query = query.where(key < anchor if backwards else key > anchor)
+                if backwards:
+                    order = (Product.name.desc(), Product.id.desc())
+            products = await self._execute_core(fetch_products, query.order_by(*order).limit(limit))
+        return products[::-1] if backwards else products
+
+    async def products_page(self, category_id: int, limit: int, after_id: Optional[int] = None,
+                            before_id: Optional[int] = None) -> List[ProductRecord]:
+        """Hasta ``limit`` productos de la categoría ordenados por (name, id).
+
+        Con ``after_id`` devuelve los que siguen a ese producto y con ``before_id`` los que lo preceden
+        (también en orden ascendente).
+        """
+        return await self._read("products_page", self._live_products_page(category_id, limit, after_id, before_id),
+                                lambda snapshot: snapshot_page(snapshot, category_id, limit, after_id, before_id))
+
+    async def _live_product_by_id(self, product_id: int) -> Optional[ProductRecord]:
+        if self.use_asyncpg:
+            rows = [ProductRecord(*row) for row in await self._fetch(PRODUCT_BY_ID_SQL, product_id)]
+        else:
+            rows = await self._execute_core(fetch_products, select_products().where(Product.id == product_id))
+        return rows[0] if rows else None
+
+    async def product_by_id(self, product_id: int) -> Optional[ProductRecord]:
+        return await self._read("product_by_id", self._live_product_by_id(product_id),
+                                lambda snapshot: next((p for p in snapshot.products if p.id == product_id), None))
+
+    async def _live_best_seller(self, category_id: int) -> Optional[Tuple[ProductRecord, int]]:
+        if self.use_asyncpg:
+            rows = await self._fetch(BEST_SELLER_SQL, category_id)
+            return (to_product(rows[0]), rows[0]["total_quantity"]) if rows else None
+
+        total_quantity = func.coalesce(func.sum(OrderProducts.quantity), 0)
+        query = (select_products(total_quantity.label('total_quantity'))
+                 .join(OrderProducts)
+                 .where(Product.categoryId == category_id)
+                 .group_by(Product.id)
+                 .order_by(total_quantity.desc())
+                 .limit(1))
+        async with self.session_factory() as session:
+            row = (await session.execute(query)).first()
+        return (to_product(row), row.total_quantity) if row else None
+
+    async def _live_best_sellers(self) -> Dict[int, Tuple[int, int]]:
+        """Más vendido de cada categoría en una sola consulta (para la instantánea)."""
+        # quantity admite NULL: sin coalesce una suma sin cantidades sería None
+        query = (select(Product.categoryId, Product.id, func.coalesce(func.sum(OrderProducts.quantity), 0))
+                 .join(OrderProducts)
+                 .group_by(Product.categoryId, Product.id))
+        async with self.session_factory() as session:
+            rows = (await session.execute(query)).all()
+        best_sellers: Dict[int, Tuple[int, int]] = {}
+        for category_id, product_id, quantity in rows:
+            current = best_sellers.get(category_id)
+            if current is None or (quantity, -product_id) > (current[1], -current[0]):
+                best_sellers[category_id] = (product_id, int(quantity))
+        self._best_sellers = best_sellers
+        return best_sellers
+
+    async def best_seller(self, category_id: int) -> Optional[Tuple[ProductRecord, int]]:
+        """Producto más vendido de la categoría y su cantidad total vendida."""
+        return await self._read("best_seller", self._live_best_seller(category_id),
+                                lambda snapshot: snapshot_best_seller(snapshot, category_id))
+
+
+catalog_reader = CatalogReader()
@@ -0,0 +1,118 @@
+"""Copia local del catálogo para arrancar sin esperar a la base de datos.
+
+El bot guarda cada ``settings.catalog_snapshot_interval`` segundos las categorías, los productos y el
+más vendido de cada categoría en un archivo SQLite (``settings.catalog_snapshot_file``; unas decenas de
+KB para miles de productos). Al arrancar lo carga en milisegundos en ``catalog_reader``, que responde
+desde él hasta que la primera lectura completa de PostgreSQL lo consigue, de modo que un reinicio en
+plena hora de comidas no se nota y el bot funciona aunque la base de datos aún no esté disponible.
+
+El archivo se escribe en uno temporal y se renombra, así que nunca se lee a medias.
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from decimal import Decimal
+from typing import Optional
+
+from app.catalog import CategoryRecord, ProductRecord
+from app.catalog_reader import CatalogReader, CatalogSnapshot, catalog_reader
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Se incrementa si cambian las tablas; un archivo de otra versión se ignora
+FORMAT_VERSION = 1
+
+# Segundos entre reintentos mientras la base de datos no responde
+RETRY_INTERVAL = 15.0
+
+_SCHEMA = (
+    "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    "CREATE TABLE category (id INTEGER PRIMARY KEY, name TEXT NOT NULL, slug TEXT)",
+    # El precio como texto para conservar el Decimal exacto
+    "CREATE TABLE product (id INTEGER PRIMARY KEY, name TEXT NOT NULL, price TEXT NOT NULL, stock INTEGER, "
+    "category_id INTEGER, image TEXT)",
+    "CREATE TABLE best_seller (category_id INTEGER PRIMARY KEY, product_id INTEGER NOT NULL, "
+    "quantity INTEGER NOT NULL)",
+)
+
+
+def save_catalog_snapshot(path: str, snapshot: CatalogSnapshot) -> None:
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                         [("format_version", str(FORMAT_VERSION)), ("taken_at", repr(snapshot.taken_at))])
+        conn.executemany("INSERT INTO category VALUES (?, ?, ?)", snapshot.categories)
+        conn.executemany("INSERT INTO product VALUES (?, ?, ?, ?, ?, ?)",
+                         [(p.id, p.name, str(p.price), p.stock, p.categoryId, p.image) for p in snapshot.products])
+        conn.executemany("INSERT INTO best_seller VALUES (?, ?, ?)",
+                         [(category_id, product_id, quantity)
+                          for category_id, (product_id, quantity) in snapshot.best_sellers.items()])
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+
+def load_catalog_snapshot(path: str) -> Optional[CatalogSnapshot]:
+    """La instantánea guardada, o None si no existe o no se puede leer."""
+    if not os.path.exists(path):
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            if int(meta.get("format_version", 0)) != FORMAT_VERSION:
+                logger.warning("Ignoring catalog snapshot %s with format %s", path, meta.get("format_version"))
+                return None
+            categories = [CategoryRecord(*row) for row in conn.execute("SELECT id, name, slug FROM category")]
+            products = [ProductRecord(id, name, Decimal(price), stock, category_id, image)
+                        for id, name, price, stock, category_id, image
+                        in conn.execute("SELECT id, name, price, stock, category_id, image FROM product")]
+            best_sellers = {category_id: (product_id, quantity) for category_id, product_id, quantity
+                            in conn.execute("SELECT category_id, product_id, quantity FROM best_seller")}
+        finally:
+            conn.close()
+    except (sqlite3.Error, ValueError) as e:
+        logger.warning("Could not read catalog snapshot %s: %s", path, e)
+        return None
+    return CatalogSnapshot(products, categories, best_sellers, float(meta["taken_at"]))
+
+
+def restore_catalog_snapshot(path: str, reader: CatalogReader = catalog_reader) -> bool:
+    """Carga la instantánea en ``reader`` al arrancar; devuelve si había una."""
+    started = time.perf_counter()
+    snapshot = load_catalog_snapshot(path)
+    if snapshot is None:
+        return False
+    reader.restore(snapshot)
+    elapsed = time.perf_counter() - started
+    metrics.observe("catalog_snapshot_load_seconds", elapsed)
+    logger.info("Catalog snapshot restored: %d products, %.0f s old, loaded in %.3f s",
+                len(snapshot.products), time.time() - snapshot.taken_at, elapsed)
+    return True
+
+
+async def run_catalog_snapshot_writer(path: str, interval: float, reader: CatalogReader = catalog_reader) -> None:
+    """Tarea de fondo: lee el catálogo de la base de datos y guarda la instantánea cada ``interval`` segundos.
+
+    La primera vuelta se hace en el acto: es la que pone al día una instantánea restaurada.
+    """
+    while True:
+        try:
+            snapshot = await reader.refresh()
+            await asyncio.to_thread(save_catalog_snapshot, path, snapshot)
+            metrics.set_gauge("catalog_snapshot_products", len(snapshot.products))
+            logger.debug("Catalog snapshot saved to %s", path)
+            delay = interval
+        except Exception as e:  # La base de datos puede no estar disponible todavía: se reintenta
+            logger.warning("Could not refresh the catalog snapshot: %r", e)
+            delay = min(interval, RETRY_INTERVAL)
+        await asyncio.sleep(delay)
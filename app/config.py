@@ -1,13 +1,126 @@
 from dotenv import load_dotenv
+from typing import List, NamedTuple
 import os
 
 load_dotenv()  # Carga las variables del archivo .env
 
 
+class BotConfig(NamedTuple):
+    label: str  # Identifica al bot en métricas y logs ("mesa1", "mesa2"...)
+    token: str
+    name: str
+
+
+def load_bot_configs(bot_ids: str) -> List[BotConfig]:
+    """Configuración de los bots ``BOT_TOKEN_<n>`` / ``BOT_NAME_<n>`` indicados (p. ej. "1,2,3")."""
+    configs = []
+    for bot_id in (i.strip() for i in bot_ids.split(",")):
+        token = os.getenv(f"BOT_TOKEN_{bot_id}") if bot_id else None
+        if token:
+            configs.append(BotConfig(f"mesa{bot_id}", token, os.getenv(f"BOT_NAME_{bot_id}", "MesaBot")))
+    return configs
+
+
 class Settings:
     openai_api_key = os.getenv("OPENAI_API_KEY")
-    bot_token = os.getenv("BOT_TOKEN_3")
+    # Bots que atiende este proceso (comparten engine, cachés y cliente de GPT)
+    bots = load_bot_configs(os.getenv("BOT_IDS", "3"))
     database_url = os.getenv("DATABASE_URL")
+    # Registrar cada sentencia SQL (muy costoso; sólo para depurar)
+    database_echo = os.getenv("DATABASE_ECHO", "false").lower() in ("1", "true", "yes")
+    # Logging: nivel, formato ("json" o "text") y fracción de los mensajes DEBUG que se conservan
+    log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+    log_format = os.getenv("LOG_FORMAT", "json").lower()
+    log_debug_sample_rate = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+    # Permite apuntar el cliente de OpenAI a otro endpoint compatible (p. ej. scripts/fake_openai_stream.py)
+    openai_api_base = os.getenv("OPENAI_API_BASE")
+    # Respuestas de GPT en streaming editando el mensaje a medida que llegan los tokens
+    gpt_streaming = os.getenv("GPT_STREAMING", "false").lower() in ("1", "true", "yes")
+    gpt_stream_edit_interval = float(os.getenv("GPT_STREAM_EDIT_INTERVAL", "1.0"))
+    # Límites de las llamadas salientes a Telegram (mensajes por segundo)
+    telegram_global_rate = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+    telegram_chat_rate = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+    telegram_chat_burst = float(os.getenv("TELEGRAM_CHAT_BURST", "3"))
+    telegram_group_rate = float(os.getenv("TELEGRAM_GROUP_RATE", str(20 / 60)))
+    telegram_max_retries = int(os.getenv("TELEGRAM_MAX_RETRIES", "2"))
+    # Instantánea de métricas que el bot escribe y la API expone en /metrics
+    metrics_file = os.getenv("METRICS_FILE", "bot_metrics.json")
+    metrics_interval = float(os.getenv("METRICS_INTERVAL", "15"))
+    # Modelo serializado del clasificador local de intenciones (scripts/train_intent_classifier.py)
+    intent_model_path = os.getenv("INTENT_MODEL_PATH", os.path.join(os.path.dirname(__file__), "GPT",
+                                                                     "intent_model.json"))
+    # Índice del catálogo en memoria: segundos hasta reconstruirlo desde la base de datos
+    catalog_index_ttl = float(os.getenv("CATALOG_INDEX_TTL", "300"))
+    # Copia local del catálogo (app.catalog_snapshot) con la que el bot arranca sin esperar a la base de datos
+    catalog_snapshot_file = os.getenv("CATALOG_SNAPSHOT_FILE", "catalog_snapshot.sqlite3")
+    catalog_snapshot_interval = float(os.getenv("CATALOG_SNAPSHOT_INTERVAL", "300"))
+    # Calentamiento antes de atender actualizaciones (app.startup): conexiones del pool que se abren y
+    # segundos máximos que puede durar
+    warmup_connections = int(os.getenv("WARMUP_CONNECTIONS", "5"))
+    warmup_timeout = float(os.getenv("WARMUP_TIMEOUT", "10"))
+    # Servidor de la API (app.start_fastapi). "production": varios workers, uvloop y httptools, sin recarga;
+    # "development": un proceso que se reinicia al cambiar el código
+    api_mode = os.getenv("API_MODE", "production").lower()
+    api_host = os.getenv("API_HOST", "0.0.0.0")
+    api_port = int(os.getenv("API_PORT", "8085"))
+    api_workers = int(os.getenv("API_WORKERS", str(min(4, os.cpu_count() or 1))))
+    # Mayor que el tiempo de inactividad del proxy o balanceador de delante (evita 502 al reutilizar conexiones)
+    api_keep_alive = int(os.getenv("API_KEEP_ALIVE", "65"))
+    # Segundos para terminar las peticiones en curso al apagar antes de cortarlas
+    api_graceful_shutdown = int(os.getenv("API_GRACEFUL_SHUTDOWN", "20"))
+    api_backlog = int(os.getenv("API_BACKLOG", "2048"))
+    # Conexiones simultáneas por worker a partir de las cuales se responde 503 (vacío: sin límite)
+    api_limit_concurrency = int(os.getenv("API_LIMIT_CONCURRENCY")) if os.getenv("API_LIMIT_CONCURRENCY") else None
+    # Modo inline: espera antes de responder (descarta las consultas que el usuario sigue escribiendo)
+    # y segundos que Telegram puede cachear las respuestas en sus servidores
+    inline_debounce = float(os.getenv("INLINE_DEBOUNCE", "0.35"))
+    inline_cache_time = int(os.getenv("INLINE_CACHE_TIME", "300"))
+    # Mensajes de texto: segundos que se espera a que el usuario termine una ráfaga ("hola" / "quiero" /
+    # "2 limonadas") antes de atenderla como un único mensaje, y espera máxima desde el primero (0 desactiva)
+    message_debounce = float(os.getenv("MESSAGE_DEBOUNCE", "0.8"))
+    message_debounce_max_wait = float(os.getenv("MESSAGE_DEBOUNCE_MAX_WAIT", "2.5"))
+    # Control de admisión (app.utils.admission): mensajes y botones por usuario (por segundo y ráfaga),
+    # preguntas que pueden acabar en GPT por usuario (por minuto y ráfaga) y límites globales de
+    # manejadores y llamadas a GPT simultáneos; con más de *_MAX_WAITING esperando se rechaza la petición
+    user_rate_limit = float(os.getenv("USER_RATE_LIMIT", "0.5"))
+    user_rate_burst = float(os.getenv("USER_RATE_BURST", "5"))
+    gpt_user_rate_limit = float(os.getenv("GPT_USER_RATE_LIMIT", "4"))
+    gpt_user_rate_burst = float(os.getenv("GPT_USER_RATE_BURST", "3"))
+    max_concurrent_handlers = int(os.getenv("MAX_CONCURRENT_HANDLERS", "50"))
+    handlers_max_waiting = int(os.getenv("HANDLERS_MAX_WAITING", "200"))
+    max_concurrent_gpt = int(os.getenv("MAX_CONCURRENT_GPT", "8"))
+    gpt_max_waiting = int(os.getenv("GPT_MAX_WAITING", "16"))
+    # Cortacircuitos (app.utils.circuit_breaker): fallos seguidos que abren el circuito, segundos que
+    # permanece abierto y tiempos máximos de cada consulta a la base de datos y de cada llamada a GPT.
+    # UPDATE_DEADLINE acota lo que pueden esperar a las dependencias todas las llamadas de una actualización
+    circuit_failure_threshold = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    circuit_reset_timeout = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+    database_call_timeout = float(os.getenv("DATABASE_CALL_TIMEOUT", "5"))
+    database_statement_timeout = float(os.getenv("DATABASE_STATEMENT_TIMEOUT", "5"))
+    openai_timeout = float(os.getenv("OPENAI_TIMEOUT", "20"))
+    update_deadline = float(os.getenv("UPDATE_DEADLINE", "30"))
+    # Sesiones abandonadas (app.utils.session_sweeper): segundos sin actividad tras los que se cierran y se
+    # liberan sus datos, cada cuánto se revisan y si se borran también sus mensajes, como al salir
+    session_idle_ttl = float(os.getenv("SESSION_IDLE_TTL", "1800"))
+    session_sweep_interval = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+    session_sweep_delete_messages = os.getenv("SESSION_SWEEP_DELETE_MESSAGES", "false").lower() in ("1", "true", "yes")
+    # Búsqueda semántica (app.semantic_search): dimensiones del vector (memoria: productos x dim x 4 B) y
+    # similitud mínima para responder con ella en lugar de pasar el mensaje a GPT
+    semantic_search_dim = int(os.getenv("SEMANTIC_SEARCH_DIM", "2048"))
+    semantic_min_score = float(os.getenv("SEMANTIC_MIN_SCORE", "0.35"))
+    # Fuera de una petición de producto ("quiero ...") una coincidencia que sólo viene de la descripción de
+    # una categoría ("mañana", "salado") necesita este umbral: los mensajes ajenos al menú la contienen a menudo
+    semantic_description_min_score = float(os.getenv("SEMANTIC_DESCRIPTION_MIN_SCORE", "0.7"))
+    # Imágenes de productos: Product.image es una URL o un nombre que se completa con PRODUCT_IMAGE_URL
+    # ("https://.../{image}.jpg") o se busca en PRODUCT_IMAGES_DIR; las miniaturas generadas por
+    # scripts/generate_product_thumbnails.py se prefieren si existen
+    product_image_url = os.getenv("PRODUCT_IMAGE_URL")
+    product_images_dir = os.getenv("PRODUCT_IMAGES_DIR")
+    product_thumbnails_dir = os.getenv("PRODUCT_THUMBNAILS_DIR", "product_thumbnails")
+    # Chat (p. ej. un canal privado) al que se suben las imágenes nuevas para obtener su file_id antes
+    # de que las pida un usuario; sin él no hay precarga
+    media_cache_chat_id = os.getenv("MEDIA_CACHE_CHAT_ID")
+    media_warmup_interval = float(os.getenv("MEDIA_WARMUP_INTERVAL", "900"))
 
 
 settings = Settings()
@@ -1,15 +1,56 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.ext.declarative import declarative_base
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.migrations import run_migrations
+from app.models import Base  # noqa: F401  (los modelos usan este Base)
 
 DATABASE_URL = settings.database_url
 
-engine = create_async_engine(DATABASE_URL, echo=True)
-SessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
-Base = declarative_base()
+
+def engine_options(url: str) -> dict:
+    """Tiempos máximos de conexión y de cada sentencia (sólo PostgreSQL).
+
+    Las migraciones anulan ``statement_timeout`` en su conexión (app.migrations).
+    """
+    if not url or "+asyncpg" not in url:
+        return {}
+    timeout = settings.database_statement_timeout
+    return {
+        "pool_timeout": timeout,
+        "connect_args": {
+            "timeout": timeout,  # Establecer la conexión
+            "server_settings": {"statement_timeout": str(int(timeout * 1000))},  # En milisegundos
+        },
+    }
+
+
+def create_database_engine(url: str = DATABASE_URL) -> AsyncEngine:
+    """Engine con las opciones del proyecto."""
+    return create_async_engine(url, echo=settings.database_echo, **engine_options(url))
+
+
+# El engine del proceso no se crea al importar el módulo (importar el bot o la API no exige DATABASE_URL ni
+# carga el driver): lo crea get_engine() durante el arranque, que enlaza entonces SessionLocal a él
+_engine: Optional[AsyncEngine] = None
+SessionLocal = sessionmaker(class_=AsyncSession, expire_on_commit=False)
+
+
+def get_engine() -> AsyncEngine:
+    """El engine del proceso, creado en la primera llamada (todos los módulos comparten este)."""
+    global _engine
+    if _engine is None:
+        _engine = create_database_engine()
+        SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+async def dispose_engine() -> None:
+    """Cierra las conexiones del pool (si el engine llegó a crearse)."""
+    if _engine is not None:
+        await _engine.dispose()
 
 
 async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await run_migrations(get_engine())
@@ -1,14 +1,89 @@
+import asyncio
+import logging
+import time
+
 from fastapi import FastAPI
-from app.database import init_db
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import dispose_engine, get_engine, init_db
+from app.utils.metrics import read_snapshot
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
+# Segundos máximos entre reintentos de las migraciones mientras la base de datos no responde
+INIT_DB_MAX_BACKOFF = 30.0
+
+
+async def init_db_with_retry() -> None:
+    delay = 1.0
+    while True:
+        try:
+            await init_db()
+            app.state.db_ready = True
+            return
+        except Exception as e:
+            logger.warning("Database initialization failed, retrying in %.0f s: %r", delay, e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, INIT_DB_MAX_BACKOFF)
+
 
 @app.on_event("startup")
 async def startup_event():
-    await init_db()
+    # Las migraciones no retrasan el arranque: /health y /metrics responden aunque PostgreSQL aún no esté listo
+    app.state.db_ready = False
+    app.state.init_db_task = asyncio.create_task(init_db_with_retry())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Uvicorn ya ha terminado (o cortado) las peticiones en curso: cerrar las conexiones del pool
+    app.state.init_db_task.cancel()
+    await dispose_engine()
 
 
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to the FastAPI Telegram Bot"}
+
+
+@app.get("/metrics")
+async def read_metrics():
+    # Las métricas las escribe el proceso del bot; aquí sólo se sirve la última instantánea
+    return read_snapshot(settings.metrics_file)
+
+
+async def _ping_database() -> None:
+    async with get_engine().connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+@app.get("/health")
+async def read_health():
+    """Estado de la base de datos (vista desde la API) y de los cortacircuitos del bot.
+
+    ``degraded``: algún circuito del bot está abierto (sirve el catálogo de la última lectura y
+    respuestas fijas en lugar de GPT). Responde 503 si la API no llega a la base de datos.
+    """
+    try:
+        await asyncio.wait_for(_ping_database(), settings.database_call_timeout)
+        database_ok = True
+    except Exception:
+        database_ok = False
+
+    snapshot = read_snapshot(settings.metrics_file)
+    circuits = {entry["labels"].get("circuit"): "open" if entry["value"] else "closed"
+                for entry in snapshot.get("gauges", {}).get("circuit_open", [])}
+    status = "down" if not database_ok else "degraded" if "open" in circuits.values() else "ok"
+    body = {
+        "status": status,
+        "database": "ok" if database_ok else "unreachable",
+        "migrations": "applied" if getattr(app.state, "db_ready", False) else "pending",
+        "circuits": circuits,
+        # Antigüedad de la instantánea de métricas del bot (si deja de escribirse, el bot no está vivo)
+        "bot_snapshot_age": round(time.time() - snapshot["timestamp"], 1) if "timestamp" in snapshot else None,
+    }
+    return JSONResponse(body, status_code=503 if not database_ok else 200)
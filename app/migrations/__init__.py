@@ -0,0 +1,136 @@
+"""Migraciones del esquema de la base de datos.
+
+Cada migración es un módulo de ``app/migrations/versions`` llamado ``vNNNN_descripcion.py`` con una
+función ``upgrade(conn)`` que recibe una conexión síncrona (se ejecuta con ``run_sync``). Las versiones
+aplicadas se guardan en la tabla ``schema_migrations`` y ``run_migrations`` aplica en orden las que
+falten, cada una en su propia transacción junto con su registro.
+
+Una migración con ``TRANSACTIONAL = False`` se ejecuta en PostgreSQL fuera de una transacción
+(``AUTOCOMMIT``), como exige ``CREATE INDEX CONCURRENTLY``; ``create_index`` construye así los índices
+de las tablas en las que escribe la mini app sin bloquear sus escrituras. Las migraciones no dependen
+de ``app.models``: describen el esquema tal como era en su versión.
+
+Uso desde la línea de comandos::
+
+    python -m app.migrations status
+    python -m app.migrations upgrade
+"""
+import importlib
+import logging
+import pkgutil
+from typing import List, NamedTuple
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, func, select, text
+
+from app.migrations import versions
+
+logger = logging.getLogger(__name__)
+
+# Clave del bloqueo consultivo que serializa las migraciones entre procesos (sólo PostgreSQL)
+_ADVISORY_LOCK_KEY = 0x6D657361
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("version", String, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.current_timestamp(), nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: str
+    description: str
+    upgrade: callable
+    transactional: bool
+
+
+def load_migrations() -> List[Migration]:
+    migrations = []
+    for module_info in sorted(pkgutil.iter_modules(versions.__path__), key=lambda m: m.name):
+        version, _, description = module_info.name[1:].partition("_")
+        module = importlib.import_module(f"{versions.__name__}.{module_info.name}")
+        migrations.append(Migration(version, description.replace("_", " "), module.upgrade,
+                                    getattr(module, "TRANSACTIONAL", True)))
+    return migrations
+
+
+def _applied_versions(conn) -> set:
+    schema_migrations.create(conn, checkfirst=True)
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def _record(conn, migration: Migration) -> None:
+    conn.execute(schema_migrations.insert().values(version=migration.version, description=migration.description))
+
+
+def create_index(conn, name: str, table: str, definition: str) -> None:
+    """Crea el índice si no existe; en PostgreSQL con ``CONCURRENTLY`` (migraciones no transaccionales).
+
+    ``definition`` es lo que sigue a ``ON "tabla"``: ``'("categoryId", price)'``, ``'USING gin (...)'``.
+    """
+    if conn.dialect.name != "postgresql":
+        conn.execute(text(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" {definition}'))
+        return
+    # Una construcción concurrente interrumpida deja el índice marcado como inválido: se rehace
+    invalid = conn.execute(text("SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                                "WHERE c.relname = :name AND pg_table_is_visible(c.oid) AND NOT i.indisvalid"),
+                           {"name": name}).first()
+    if invalid:
+        conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+    conn.execute(text(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "{table}" {definition}'))
+
+
+async def _apply(conn, migration: Migration) -> None:
+    if migration.transactional or conn.dialect.name != "postgresql":
+        async with conn.begin():
+            await conn.run_sync(migration.upgrade)
+            await conn.run_sync(_record, migration)
+        return
+    isolation_level = conn.sync_connection.default_isolation_level
+    await conn.execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        await conn.run_sync(migration.upgrade)
+        await conn.commit()
+    finally:
+        await conn.execution_options(isolation_level=isolation_level)
+    # Si falla antes de registrarse se vuelve a ejecutar: estas migraciones deben poder repetirse
+    async with conn.begin():
+        await conn.run_sync(_record, migration)
+
+
+async def run_migrations(engine) -> List[str]:
+    """Aplica las migraciones pendientes y devuelve sus versiones."""
+    newly_applied = []
+    async with engine.connect() as conn:
+        postgres = conn.dialect.name == "postgresql"
+        if postgres:
+            # Crear índices puede tardar más que el statement_timeout de las consultas normales (app.database)
+            await conn.execute(text("SET statement_timeout = 0"))
+            await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+            await conn.commit()
+        try:
+            async with conn.begin():
+                applied = await conn.run_sync(_applied_versions)
+            for migration in load_migrations():
+                if migration.version in applied:
+                    continue
+                logger.info("Applying migration %s (%s)", migration.version, migration.description)
+                await _apply(conn, migration)
+                newly_applied.append(migration.version)
+        finally:
+            if postgres:
+                await conn.rollback()
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+                await conn.execute(text("RESET statement_timeout"))
+                await conn.commit()
+    if newly_applied:
+        logger.info("Database schema migrated to %s", newly_applied[-1])
+    return newly_applied
+
+
+async def migration_status(engine) -> List[tuple]:
+    """Lista ``(version, descripción, aplicada)`` de todas las migraciones conocidas."""
+    async with engine.begin() as conn:
+        applied = await conn.run_sync(_applied_versions)
+    return [(m.version, m.description, m.version in applied) for m in load_migrations()]
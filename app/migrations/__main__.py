@@ -0,0 +1,26 @@
+import argparse
+import asyncio
+
+from app.database import get_engine
+from app.migrations import migration_status, run_migrations
+from app.utils.logging_config import setup_logging
+
+
+async def main(command: str) -> None:
+    engine = get_engine()
+    try:
+        if command == "upgrade":
+            applied = await run_migrations(engine)
+            print(f"Aplicadas: {', '.join(applied)}" if applied else "El esquema ya está al día.")
+        else:
+            for version, description, applied in await migration_status(engine):
+                print(f"{version}  {'aplicada ' if applied else 'pendiente'}  {description}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migraciones del esquema de la base de datos")
+    parser.add_argument("command", choices=["status", "upgrade"], nargs="?", default="status")
+    setup_logging()
+    asyncio.run(main(parser.parse_args().command))
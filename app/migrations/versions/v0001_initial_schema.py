@@ -0,0 +1,51 @@
+"""Tablas originales del bot; las que ya existen (creadas por la mini app) no se tocan.
+
+El esquema se describe aquí tal como era en esta versión (sin los índices ni las tablas que añaden las
+migraciones posteriores), independiente de ``app.models``.
+"""
+from sqlalchemy import TIMESTAMP, Column, ForeignKey, Integer, MetaData, Numeric, String, Table, Text, func
+
+metadata = MetaData()
+
+Table(
+    "Category", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, index=True),
+    Column("slug", String, index=True),
+)
+
+Table(
+    "Product", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, index=True),
+    Column("price", Numeric(10, 2), index=True),
+    Column("stock", Integer, index=True),
+    Column("image", String),
+    Column("categoryId", Integer, ForeignKey("Category.id")),
+)
+
+Table(
+    "orders", metadata,
+    Column("id", Integer, primary_key=True),
+)
+
+Table(
+    "OrderProducts", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("orderId", Integer, ForeignKey("orders.id")),
+    Column("productId", Integer, ForeignKey("Product.id")),
+    Column("quantity", Integer),
+)
+
+Table(
+    "Recommendation", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("userName", String, nullable=False),
+    Column("rating", Integer, nullable=False),
+    Column("comment", Text, nullable=False),
+    Column("createdAt", TIMESTAMP(timezone=True), server_default=func.current_timestamp(), nullable=False),
+)
+
+
+def upgrade(conn) -> None:
+    metadata.create_all(conn, checkfirst=True)
@@ -0,0 +1,32 @@
+"""Extensiones e índices de la búsqueda de productos por nombre (ver ``app.search``).
+
+Los índices GIN de "Product" se construyen con ``CONCURRENTLY`` para no bloquear las escrituras de la
+mini app.
+"""
+from sqlalchemy import text
+
+from app.migrations import create_index
+
+TRANSACTIONAL = False
+
+STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() no es IMMUTABLE y no puede usarse en índices; este envoltorio sí
+    "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS "
+    "$$ SELECT public.unaccent('public.unaccent', $1) $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT",
+]
+
+INDEXES = [
+    ("ix_product_name_trgm", "USING gin (f_unaccent(lower(name)) gin_trgm_ops)"),
+    ("ix_product_name_fts", "USING gin (to_tsvector('spanish', f_unaccent(name)))"),
+]
+
+
+def upgrade(conn) -> None:
+    if conn.dialect.name != "postgresql":
+        return
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
+    for name, definition in INDEXES:
+        create_index(conn, name, "Product", definition)
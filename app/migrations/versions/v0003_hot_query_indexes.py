@@ -0,0 +1,28 @@
+"""Índices compuestos para las consultas más frecuentes del bot.
+
+* ``OrderProducts(productId, quantity)``: sumas de ventas por producto sin leer la tabla.
+* ``Product(categoryId, price)``: productos de una categoría y el más económico (``ORDER BY price``).
+* ``Recommendation(createdAt)``: valoraciones más recientes.
+
+La mini app escribe en estas tablas mientras el bot arranca: en PostgreSQL los índices se construyen
+con ``CONCURRENTLY``, fuera de una transacción.
+"""
+from sqlalchemy import text
+
+from app.migrations import create_index
+
+TRANSACTIONAL = False
+
+INDEXES = [
+    ("ix_OrderProducts_productId_quantity", "OrderProducts", '("productId", quantity)'),
+    ("ix_Product_categoryId_price", "Product", '("categoryId", price)'),
+    ("ix_Recommendation_createdAt", "Recommendation", '("createdAt")'),
+]
+
+
+def upgrade(conn) -> None:
+    for name, table, definition in INDEXES:
+        create_index(conn, name, table, definition)
+    if conn.dialect.name == "postgresql":
+        # Estadísticas al día para que el planificador tenga en cuenta los índices nuevos
+        conn.execute(text('ANALYZE "OrderProducts", "Product", "Recommendation"'))
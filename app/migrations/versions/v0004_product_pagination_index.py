@@ -0,0 +1,9 @@
+"""Índice para paginar los productos de una categoría por (name, id) (``CatalogReader.products_page``)."""
+from app.migrations import create_index
+
+# CREATE INDEX CONCURRENTLY en PostgreSQL: "Product" recibe escrituras de la mini app
+TRANSACTIONAL = False
+
+
+def upgrade(conn) -> None:
+    create_index(conn, "ix_Product_categoryId_name_id", "Product", '("categoryId", name, id)')
@@ -0,0 +1,16 @@
+"""Tabla con los file_id de Telegram de las imágenes de productos ya subidas."""
+from sqlalchemy import TIMESTAMP, BigInteger, Column, MetaData, String, Table, func
+
+metadata = MetaData()
+
+Table(
+    "TelegramFile", metadata,
+    Column("botId", BigInteger, primary_key=True),
+    Column("image", String, primary_key=True),
+    Column("fileId", String, nullable=False),
+    Column("updatedAt", TIMESTAMP(timezone=True), server_default=func.current_timestamp(), nullable=False),
+)
+
+
+def upgrade(conn) -> None:
+    metadata.create_all(conn, checkfirst=True)
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Text, TIMESTAMP, func
+from sqlalchemy import Column, Integer, BigInteger, String, Numeric, ForeignKey, Text, TIMESTAMP, func
 from sqlalchemy.orm import relationship, declarative_base
 
+# El esquema (tablas e índices) lo crean las migraciones de app/migrations; aquí sólo se mapea
 Base = declarative_base()
 
 
@@ -47,3 +48,14 @@ class Recommendation(Base):
     rating = Column(Integer, nullable=False)
     comment = Column(Text, nullable=False)
     createdAt = Column(TIMESTAMP(timezone=True), server_default=func.current_timestamp(), nullable=False)
+
+
+# file_id de Telegram de las imágenes ya subidas (cada bot tiene los suyos)
+
+class TelegramFile(Base):
+    __tablename__ = 'TelegramFile'
+    botId = Column(BigInteger, primary_key=True)
+    image = Column(String, primary_key=True)
+    fileId = Column(String, nullable=False)
+    updatedAt = Column(TIMESTAMP(timezone=True), server_default=func.current_timestamp(),
+                       onupdate=func.current_timestamp(), nullable=False)
@@ -0,0 +1,154 @@
+"""Recomendación de comidas por presupuesto ("¿qué puedo comer con $3?").
+
+El catálogo se carga en memoria como una lista ordenada por precio (en centavos) por categoría, sin
+los productos agotados. Una comida es un producto de cada plato de ``DEFAULT_MEAL`` (entrada + segundo
++ bebida); para cada combinación de los primeros platos el último se elige con ``bisect`` (el más
+caro que aún cabe en el presupuesto) y la búsqueda se poda con los precios mínimos y máximos de los
+platos restantes, de modo que con catálogos de miles de productos sólo se visitan unas decenas de
+combinaciones. Se devuelven las ``limit`` comidas que más aprovechan el presupuesto, con una entrada
+distinta cada una para que haya variedad.
+
+Como ``app.catalog_index``, el recomendador es común a todos los bots del proceso y se reconstruye
+cuando caduca (``settings.catalog_index_ttl``).
+"""
+import asyncio
+import bisect
+import heapq
+import logging
+import time
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.catalog import CategoryRecord, ProductRecord
+from app.catalog_reader import catalog_reader
+from app.config import settings
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEAL = ("Entradas", "Segundos", "Bebidas")
+
+# Combinaciones visitadas como máximo por consulta (acota el peor caso con presupuestos imposibles
+# de aprovechar al centavo en catálogos muy grandes)
+MAX_VISITS = 20_000
+
+
+class MealCombo(NamedTuple):
+    products: Tuple[ProductRecord, ...]
+    total: Decimal
+
+
+def _cents(price) -> int:
+    return int(round(Decimal(price) * 100))
+
+
+class MealRecommender:
+    def __init__(self, products: Sequence[ProductRecord], categories: Sequence[CategoryRecord]):
+        self.category_names = category_names = {category.id: category.name for category in categories}
+        by_course: Dict[str, List[ProductRecord]] = {}
+        for product in products:
+            # stock None: platos preparados, sin control de existencias
+            if product.stock is not None and product.stock <= 0:
+                continue
+            by_course.setdefault(category_names.get(product.categoryId), []).append(product)
+
+        self._courses: Dict[str, Tuple[List[int], List[ProductRecord]]] = {}
+        for name, items in by_course.items():
+            items.sort(key=lambda p: (p.price, p.id))
+            self._courses[name] = ([_cents(p.price) for p in items], items)
+        self.size = sum(len(items) for _, items in self._courses.values())
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def cheapest(self, course: str, budget=None) -> Optional[ProductRecord]:
+        """Producto disponible más barato de un plato (si cabe en el presupuesto)."""
+        prices, items = self._courses.get(course, ((), ()))
+        if not items or (budget is not None and prices[0] > _cents(budget)):
+            return None
+        return items[0]
+
+    def combos(self, budget, courses: Sequence[str] = DEFAULT_MEAL, limit: int = 5) -> List[MealCombo]:
+        """Hasta ``limit`` comidas (un producto por plato) que no superan ``budget``, las de mayor total primero."""
+        budget_cents = _cents(budget)
+        tables = [self._courses.get(course) for course in courses]
+        if not courses or limit <= 0 or any(not table or not table[1] for table in tables):
+            return []
+        prices = [table[0] for table in tables]
+        last = len(prices) - 1
+
+        # Lo mínimo y lo máximo que pueden sumar los platos que quedan después del nivel i
+        min_rest = [sum(p[0] for p in prices[i + 1:]) for i in range(len(prices))]
+        max_rest = [sum(p[-1] for p in prices[i + 1:]) for i in range(len(prices))]
+
+        best: List[Tuple[int, Tuple[int, ...]]] = []  # montículo con las mejores comidas (total, índices)
+        visits = 0
+
+        def floor(found: int) -> int:
+            # Un total que no supere esto no entra en el resultado
+            return max(found, best[0][0] if len(best) == limit else -1)
+
+        def search(level: int, spent: int, chosen: Tuple[int, ...], found: int):
+            """Mejor (total, índices) de los niveles restantes que supera ``found``, o None."""
+            nonlocal visits
+            remaining = budget_cents - spent
+            if level == last:
+                visits += 1
+                i = bisect.bisect_right(prices[level], remaining) - 1
+                if i < 0 or spent + prices[level][i] <= floor(found):
+                    return None
+                return spent + prices[level][i], chosen + (i,)
+
+            result = None
+            # Del más caro que todavía deja sitio para los platos restantes hacia abajo
+            start = bisect.bisect_right(prices[level], remaining - min_rest[level]) - 1
+            for i in range(start, -1, -1):
+                price = prices[level][i]
+                if spent + price + max_rest[level] <= floor(found) or visits >= MAX_VISITS:
+                    break  # Los siguientes son más baratos: no pueden mejorar
+                candidate = search(level + 1, spent + price, chosen + (i,), found)
+                if candidate is not None:
+                    result, found = candidate, candidate[0]
+                    if found == budget_cents:
+                        break  # Presupuesto aprovechado al centavo
+            return result
+
+        first_prices = prices[0]
+        start = bisect.bisect_right(first_prices, budget_cents - min_rest[0]) - 1
+        for i in range(start, -1, -1):
+            if first_prices[i] + max_rest[0] <= floor(-1) or visits >= MAX_VISITS:
+                break
+            # Una comida por entrada: la que mejor aprovecha el presupuesto con ella
+            candidate = search(1, first_prices[i], (i,), -1) if last else (first_prices[i], (i,))
+            if candidate is None:
+                continue
+            if len(best) < limit:
+                heapq.heappush(best, candidate)
+            elif candidate[0] > best[0][0]:
+                heapq.heapreplace(best, candidate)
+            if len(best) == limit and best[0][0] == budget_cents:
+                break
+
+        return [MealCombo(tuple(table[1][i] for table, i in zip(tables, indices)), Decimal(total) / 100)
+                for total, indices in sorted(best, key=lambda entry: (-entry[0], entry[1]))]
+
+
+_recommender: Optional[MealRecommender] = None
+_lock = asyncio.Lock()
+
+
+async def get_meal_recommender() -> MealRecommender:
+    """Devuelve el recomendador, reconstruyéndolo si no existe o ha caducado."""
+    global _recommender
+    if _recommender is not None and time.monotonic() - _recommender.built_at < settings.catalog_index_ttl:
+        return _recommender
+    async with _lock:
+        if _recommender is None or time.monotonic() - _recommender.built_at >= settings.catalog_index_ttl:
+            started = time.perf_counter()
+            products, categories = await asyncio.gather(catalog_reader.all_products(), catalog_reader.categories())
+            _recommender = MealRecommender(products, categories)
+            elapsed = time.perf_counter() - started
+            metrics.observe("meal_recommender_build_seconds", elapsed)
+            logger.info("Meal recommender built with %d products in %.3f s", len(_recommender), elapsed)
+    return _recommender
@@ -0,0 +1,110 @@
+"""Búsqueda de productos por nombre.
+
+En PostgreSQL una sola consulta combina coincidencia por subcadena, similitud de trigramas
+(``pg_trgm``) y búsqueda de texto completo en español, todo sin acentos (``unaccent``) y apoyado
+en índices GIN, en lugar de un ``ILIKE '%...%'`` que siempre recorre la tabla entera.
+La migración ``v0002_product_search`` crea las extensiones, la función inmutable ``f_unaccent`` y los
+índices; las expresiones de ``_postgres_query`` deben coincidir con las de esos índices.
+
+En otros motores (p. ej. SQLite en pruebas) se usa una búsqueda por subcadena y, si se pide
+coincidencia difusa, ``fuzzywuzzy`` sobre los nombres.
+"""
+import logging
+from typing import List, Optional
+
+from sqlalchemy import case, func, literal_column, or_, select
+from sqlalchemy.exc import DBAPIError
+
+from app.catalog import ProductRecord, fetch_products, select_products
+from app.models import Product
+
+logger = logging.getLogger(__name__)
+
+# Literal (no parámetro) para que la expresión coincida con la del índice de texto completo
+_TS_CONFIG = literal_column("'spanish'")
+
+# Umbral por defecto de pg_trgm.word_similarity_threshold, con el que filtra el operador <%
+WORD_SIMILARITY_THRESHOLD = 0.6
+
+# None: aún no se sabe si la base de datos tiene el esquema de búsqueda instalado
+_trigram_available: Optional[bool] = None
+
+# SQLSTATE de función u objeto inexistente (falta pg_trgm, unaccent o f_unaccent): el esquema no está
+# instalado. Cualquier otro error (timeout, conexión) es pasajero y no desactiva la búsqueda
+MISSING_SCHEMA_SQLSTATES = {"42883", "42704"}
+
+
+def _postgres_query(term: str, min_similarity: Optional[float], limit: Optional[int]):
+    name_key = func.f_unaccent(func.lower(Product.name))
+    term_key = func.f_unaccent(func.lower(term))
+    is_substring = name_key.contains(term_key)
+    full_text = func.to_tsvector(_TS_CONFIG, func.f_unaccent(Product.name)).op("@@")(
+        func.plainto_tsquery(_TS_CONFIG, term_key))
+    score = func.word_similarity(term_key, name_key)
+
+    conditions = [is_substring, full_text]
+    if min_similarity is not None:
+        # <% usa el índice de trigramas pero filtra con pg_trgm.word_similarity_threshold (ver
+        # _postgres_search); el umbral pedido se aplica con word_similarity
+        conditions.append(term_key.op("<%")(name_key) & (score >= min_similarity))
+
+    query = (select_products()
+             .where(or_(*conditions))
+             .order_by(case((is_substring, 0), else_=1), score.desc(), Product.name))
+    return query.limit(limit) if limit else query
+
+
+async def _postgres_search(session, term: str, min_similarity: Optional[float], limit: Optional[int]):
+    if min_similarity is not None and min_similarity < WORD_SIMILARITY_THRESHOLD:
+        # Con un umbral menor que el del operador, <% descartaría coincidencias válidas: se baja sólo en
+        # esta transacción (is_local). Con los umbrales habituales no hace falta esta consulta extra
+        await session.execute(select(func.set_config("pg_trgm.word_similarity_threshold",
+                                                     str(min_similarity), True)))
+    return await fetch_products(session, _postgres_query(term, min_similarity, limit))
+
+
+async def _portable_search(session, term: str, min_similarity: Optional[float], limit: Optional[int]):
+    query = select_products().where(func.lower(Product.name).contains(term.lower(), autoescape=True))
+    products = await fetch_products(session, query.limit(limit) if limit else query)
+    if products or min_similarity is None:
+        return products
+
+    from fuzzywuzzy import process
+
+    all_products = await fetch_products(session, select_products())
+    by_name = {product.name.lower(): product for product in all_products}
+    best_match = process.extractOne(term.lower(), list(by_name), score_cutoff=min_similarity * 100)
+    return [by_name[best_match[0]]] if best_match else []
+
+
+async def search_products(session, term: str, min_similarity: Optional[float] = None,
+                          limit: Optional[int] = None) -> List[ProductRecord]:
+    """Busca productos cuyo nombre contenga el término o coincida en texto completo.
+
+    Con ``min_similarity`` (0-1) también se aceptan coincidencias difusas por trigramas. Los
+    resultados se ordenan poniendo primero las coincidencias por subcadena y después por similitud.
+    """
+    global _trigram_available
+    term = term.strip()
+    if not term:
+        return []
+    if session.bind.dialect.name != "postgresql" or _trigram_available is False:
+        return await _portable_search(session, term, min_similarity, limit)
+
+    if _trigram_available:
+        return await _postgres_search(session, term, min_similarity, limit)
+
+    # Primera búsqueda del proceso: comprobar dentro de un savepoint que el esquema existe
+    try:
+        async with session.begin_nested():
+            products = await _postgres_search(session, term, min_similarity, limit)
+    except DBAPIError as e:
+        if getattr(e.orig, "sqlstate", None) in MISSING_SCHEMA_SQLSTATES:
+            logger.warning("Trigram search unavailable, falling back to substring search: %s", e)
+            _trigram_available = False
+        else:
+            # Se vuelve a comprobar en la próxima búsqueda
+            logger.warning("Trigram search failed, using substring search for this query: %s", e)
+        return await _portable_search(session, term, min_similarity, limit)
+    _trigram_available = True
+    return products
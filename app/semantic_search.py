@@ -0,0 +1,237 @@
+"""Búsqueda semántica de productos ("algo frío para tomar", "gaseosa") sin modelos externos.
+
+Los nombres de los productos (con sus alias) y las frases de cada categoría (nombre, alias y
+descripciones de ``app/utils/text/aliases.json``) se representan con n-gramas de caracteres y
+palabras proyectados con el truco del hashing en ``settings.semantic_search_dim`` dimensiones: no hay
+vocabulario que entrenar ni nada que descargar. Los vectores normalizados forman una matriz de NumPy;
+una consulta es un único producto matriz-vector (similitud coseno) y ``argpartition`` para el top-k.
+Cada producto puntúa por su nombre, y la frase de su categoría que mejor coincide suma un refuerzo sobre
+esa puntuación; los productos cuyo nombre coincide van siempre delante de los que sólo coinciden por la
+categoría ("pollo": la sopa de pollo antes que el resto de segundos). Las descripciones
+son palabras sueltas ("mañana", "salado") que también aparecen en mensajes ajenos al catálogo ("¿a qué
+hora abren mañana?"), así que ``search`` admite un umbral propio y más alto para ellas.
+
+Al refrescar el catálogo sólo se vuelven a calcular los vectores de los productos nuevos o
+modificados. NumPy se importa al construir el primer índice (no al importar el módulo: son unos 40 ms
+del arranque); si no está instalado la búsqueda semántica queda desactivada.
+"""
+import asyncio
+import logging
+import math
+import time
+import zlib
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.catalog import CategoryRecord, ProductRecord
+from app.catalog_reader import catalog_reader
+from app.config import settings
+from app.GPT.intent_classifier import char_ngrams, prepare_text
+from app.utils import metrics
+from app.utils.aliases import alias_registry
+from app.utils.normalization import normalize_product_name
+
+logger = logging.getLogger(__name__)
+
+# Módulo numpy, cargado por load_numpy()
+np = None
+
+# Palabras sin contenido que no deben acercar una consulta a ningún producto
+STOP_WORDS = frozenset(
+    "a al algo alguna alguno algun con de del el en es esta este hay la las lo los me mi para por que "
+    "quiero quisiera tienes tiene un una uno unos unas y o te se su sus tu dame deseo necesito".split())
+
+# Los trigramas ("ola", "sta") acercan demasiados mensajes ajenos al catálogo; las palabras completas
+# cuentan como varios n-gramas
+NGRAM_RANGE = (4, 5)
+WORD_WEIGHT = 3
+
+# Peso del refuerzo por la categoría (nombre, alias o descripción): se aplica sobre lo que le falta a la
+# puntuación del nombre para llegar a 1, así que un producto sin coincidencia en el nombre llega a 0.8
+CATEGORY_WEIGHT = 0.8
+PRODUCT_ALIAS_WEIGHT = 0.8
+TIE_BREAK = 0.01
+
+
+class _IndexData(NamedTuple):
+    products: List[ProductRecord]
+    matrix: object  # Filas de los productos seguidas de las de las frases de categorías
+    phrase_categories: object
+    phrase_is_description: object
+    category_count: int
+    product_categories: object
+
+
+class HashingVectorizer:
+    """N-gramas de caracteres (4-5) y palabras completas proyectados en ``dim`` dimensiones."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def features(self, text: str) -> Counter:
+        words = [word for word in prepare_text(text).split() if word not in STOP_WORDS]
+        features = char_ngrams(" ".join(words), NGRAM_RANGE)
+        for word in words:
+            features[f"w:{word}"] += WORD_WEIGHT
+        return features
+
+    def vector(self, text: str, weight: float = 1.0, out=None):
+        """Suma al vector ``out`` (o a uno nuevo) los rasgos del texto con TF sublineal."""
+        if out is None:
+            out = np.zeros(self.dim, dtype=np.float32)
+        for feature, count in self.features(text).items():
+            h = zlib.crc32(feature.encode("utf-8"))
+            # Un bit del hash decide el signo para que las colisiones tiendan a cancelarse
+            sign = 1.0 if (h >> 31) & 1 else -1.0
+            out[h % self.dim] += sign * weight * (1.0 + math.log(count))
+        return out
+
+
+def load_numpy() -> bool:
+    """Importa NumPy la primera vez; devuelve False si no está instalado."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:  # Búsqueda semántica desactivada
+            return False
+        np = numpy
+    return True
+
+
+def _normalized(vector):
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticIndex:
+    def __init__(self, dim: int):
+        if not load_numpy():
+            raise RuntimeError("La búsqueda semántica necesita NumPy")
+        self.vectorizer = HashingVectorizer(dim)
+        # Se sustituye de una vez porque update() corre en un hilo mientras se busca
+        self._data = _IndexData([], np.zeros((0, dim), dtype=np.float32), np.zeros(0, dtype=np.intp),
+                                np.zeros(0, dtype=bool), 0, np.zeros(0, dtype=np.intp))
+        self._signatures: Dict[int, tuple] = {}
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data.products)
+
+    def _embed(self, product: ProductRecord):
+        vector = _normalized(self.vectorizer.vector(product.name))
+        normalized_name = normalize_product_name(product.name)
+        aliases = [alias for canonical, product_aliases in alias_registry.product_aliases.items()
+                   if normalize_product_name(canonical) in normalized_name for alias in product_aliases]
+        if aliases:
+            vector += PRODUCT_ALIAS_WEIGHT * _normalized(self.vectorizer.vector(" ".join(aliases)))
+        return _normalized(vector)
+
+    def _category_phrases(self, categories: Sequence[CategoryRecord]):
+        """Una fila por frase (nombre, alias o descripción) de cada categoría, la categoría de cada fila y
+        si la frase es una descripción."""
+        vectors, owners, is_description = [], [], []
+        for position, category in enumerate(categories):
+            phrases = [(phrase, False) for phrase in [category.name,
+                                                      *alias_registry.category_aliases.get(category.name, ())]]
+            phrases += [(phrase, True) for phrase in alias_registry.descriptions.get(category.name, ())]
+            for phrase, description in phrases:
+                vector = _normalized(self.vectorizer.vector(phrase))
+                if vector.any():
+                    vectors.append(vector)
+                    owners.append(position)
+                    is_description.append(description)
+        matrix = np.array(vectors, dtype=np.float32).reshape(len(vectors), self.vectorizer.dim)
+        return matrix, np.array(owners, dtype=np.intp), np.array(is_description, dtype=bool)
+
+    def update(self, products: Sequence[ProductRecord], categories: Sequence[CategoryRecord]) -> int:
+        """Sustituye el catálogo; devuelve cuántos productos hubo que vectorizar de nuevo."""
+        previous = self._data
+        previous_rows = {product.id: row for row, product in enumerate(previous.products)}
+
+        product_matrix = np.empty((len(products), self.vectorizer.dim), dtype=np.float32)
+        signatures = {}
+        embedded = 0
+        for row, product in enumerate(products):
+            signature = product.name
+            previous_row = previous_rows.get(product.id)
+            if previous_row is not None and self._signatures.get(product.id) == signature:
+                product_matrix[row] = previous.matrix[previous_row]
+            else:
+                product_matrix[row] = self._embed(product)
+                embedded += 1
+            signatures[product.id] = signature
+
+        phrase_matrix, phrase_categories, phrase_is_description = self._category_phrases(categories)
+        positions = {category.id: position for position, category in enumerate(categories)}
+        # Los productos sin categoría conocida apuntan a una posición extra con puntuación 0
+        product_categories = np.array([positions.get(product.categoryId, len(categories)) for product in products],
+                                      dtype=np.intp)
+        self._data = _IndexData(list(products), np.vstack([product_matrix, phrase_matrix]), phrase_categories,
+                                phrase_is_description, len(categories), product_categories)
+        self._signatures = signatures
+        self.built_at = time.monotonic()
+        return embedded
+
+    def search(self, text: str, k: int = 5, min_score: float = 0.0,
+               description_min_score: Optional[float] = None) -> List[Tuple[ProductRecord, float]]:
+        """Los ``k`` productos más parecidos al texto (similitud coseno >= ``min_score``).
+
+        Con ``description_min_score`` una coincidencia que sólo viene de la descripción de la categoría
+        cuenta únicamente si llega a ese umbral.
+        """
+        data = self._data
+        products = data.products
+        if not products:
+            return []
+        # Los alias de productos añaden el nombre al que apuntan ("coca" -> "coca cola")
+        normalized = normalize_product_name(text)
+        expanded = alias_registry.expand_product_aliases(normalized)
+        query = _normalized(self.vectorizer.vector(text if expanded == normalized else f"{text} {expanded}"))
+        if not query.any():
+            return []
+
+        similarities = data.matrix @ query
+        name_scores = similarities[:len(products)]
+        phrase_scores = similarities[len(products):]
+        if description_min_score is not None:
+            weak = data.phrase_is_description & (CATEGORY_WEIGHT * phrase_scores < description_min_score)
+            phrase_scores = np.where(weak, 0.0, phrase_scores)
+        category_scores = np.zeros(data.category_count + 1, dtype=np.float32)
+        np.maximum.at(category_scores, data.phrase_categories, phrase_scores)
+        # La categoría refuerza la puntuación del nombre sin superar 1; primero los productos cuyo nombre
+        # coincide y, entre los demás, el nombre desempata dentro de la categoría
+        name_scores = np.clip(name_scores, 0.0, 1.0)
+        scores = name_scores + CATEGORY_WEIGHT * category_scores[data.product_categories] * (1.0 - name_scores)
+        ranking = scores + (name_scores >= min_score) + TIE_BREAK * name_scores
+
+        k = min(k, len(products))
+        top = np.argpartition(-ranking, k - 1)[:k]
+        top = top[np.argsort(-ranking[top])]
+        return [(products[i], float(scores[i])) for i in top if scores[i] >= min_score]
+
+
+_index: Optional[SemanticIndex] = None
+_lock = asyncio.Lock()
+
+
+async def get_semantic_index() -> Optional[SemanticIndex]:
+    """Devuelve el índice (None sin NumPy), actualizándolo si ha caducado."""
+    global _index
+    if np is None and not await asyncio.to_thread(load_numpy):
+        return None
+    if _index is not None and time.monotonic() - _index.built_at < settings.catalog_index_ttl:
+        return _index
+    async with _lock:
+        if _index is None or time.monotonic() - _index.built_at >= settings.catalog_index_ttl:
+            started = time.perf_counter()
+            products, categories = await asyncio.gather(catalog_reader.all_products(), catalog_reader.categories())
+            index = _index if _index is not None else SemanticIndex(settings.semantic_search_dim)
+            embedded = await asyncio.to_thread(index.update, products, categories)
+            _index = index
+            elapsed = time.perf_counter() - started
+            metrics.observe("semantic_index_build_seconds", elapsed)
+            metrics.set_gauge("semantic_index_products", len(index))
+            logger.info("Semantic index updated: %d products (%d embedded) in %.3f s",
+                        len(index), embedded, elapsed)
+    return _index
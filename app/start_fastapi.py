@@ -1,5 +1,53 @@
+"""Arranque del servidor ASGI de la API.
+
+``settings.api_mode`` elige entre:
+
+* ``production``: ``settings.api_workers`` procesos, bucle ``uvloop`` y parser ``httptools`` (si están
+  instalados; si no, los de la biblioteca estándar), sin vigilar archivos, keep-alive largo para
+  reutilizar conexiones detrás de un proxy y apagado ordenado: al recibir SIGTERM se dejan de aceptar
+  conexiones y las peticiones en curso tienen ``settings.api_graceful_shutdown`` segundos para terminar;
+* ``development``: un único proceso que se reinicia al cambiar el código (``reload``).
+"""
+import importlib.util
+import logging
+from typing import Optional
+
 import uvicorn
 
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def server_options(mode: Optional[str] = None) -> dict:
+    mode = mode or settings.api_mode
+    options = {"host": settings.api_host, "port": settings.api_port}
+    if mode == "development":
+        return {**options, "reload": True}
+
+    loop = "uvloop" if _installed("uvloop") else "asyncio"
+    http = "httptools" if _installed("httptools") else "h11"
+    if (loop, http) != ("uvloop", "httptools"):
+        logger.warning("uvloop/httptools not installed, serving with loop=%s http=%s", loop, http)
+    return {
+        **options,
+        "workers": settings.api_workers,
+        "loop": loop,
+        "http": http,
+        "reload": False,
+        "timeout_keep_alive": settings.api_keep_alive,
+        "timeout_graceful_shutdown": settings.api_graceful_shutdown,
+        "backlog": settings.api_backlog,
+        "limit_concurrency": settings.api_limit_concurrency,
+        # El registro de accesos por petición cuesta más que servir /metrics; los errores se siguen registrando
+        "access_log": False,
+        "proxy_headers": True,
+    }
+
 
 def start_fastapi():
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8085, reload=True)
+    uvicorn.run("app.main:app", **server_options())
@@ -0,0 +1,117 @@
+"""Secuencia de arranque del bot con el tiempo de cada fase.
+
+Antes de empezar a recibir actualizaciones (``run_bots``) se calienta todo lo que la primera petición
+pagaría en su propia latencia:
+
+* ``database_pool``: abre ``settings.warmup_connections`` conexiones del pool a la vez;
+* ``catalog_caches``: índice del catálogo, corrector ortográfico, recomendador y búsqueda semántica
+  (desde la copia local del catálogo si la base de datos aún no responde);
+* ``intent_classifier``: carga el modelo serializado;
+* ``routers``: compila las expresiones regulares de ``app.GPT.patterns`` (quedan en la caché de ``re``);
+* ``llm``: importa el cliente de OpenAI en un hilo y resuelve el DNS de su endpoint.
+
+Las fases corren en paralelo y, como mucho, ``settings.warmup_timeout`` segundos: una dependencia que no
+responde no retrasa el arranque, sólo deja esa parte sin calentar. Los tiempos se registran en el log y
+en el gauge ``startup_phase_seconds{phase=...}``.
+"""
+import asyncio
+import logging
+import re
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from sqlalchemy import text
+
+from app.catalog_index import get_catalog_index
+from app.config import settings
+from app.database import get_engine
+from app.GPT.intent_classifier import get_intent_classifier
+from app.GPT.openai_client import api_host, get_openai
+from app.GPT.patterns import all_patterns
+from app.GPT.spelling import get_spelling_corrector
+from app.recommendations import get_meal_recommender
+from app.semantic_search import get_semantic_index
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name: str, elapsed: float) -> None:
+        self.phases[name] = elapsed
+        metrics.set_gauge("startup_phase_seconds", elapsed, phase=name)
+
+    def summary(self) -> str:
+        total = time.perf_counter() - self.started
+        metrics.set_gauge("startup_seconds", total)
+        phases = ", ".join(f"{name}={elapsed:.3f}s" for name, elapsed in self.phases.items())
+        return f"{total:.3f}s ({phases})"
+
+
+async def _warm_database_pool() -> None:
+    async def connect():
+        async with get_engine().connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(connect() for _ in range(settings.warmup_connections)))
+
+
+async def _warm_catalog_caches() -> None:
+    await asyncio.gather(get_catalog_index(), get_spelling_corrector(), get_meal_recommender(),
+                         get_semantic_index())
+
+
+async def _warm_intent_classifier() -> None:
+    await asyncio.to_thread(get_intent_classifier)
+
+
+async def _warm_routers() -> None:
+    for pattern in all_patterns():
+        re.compile(pattern)
+
+
+async def _warm_llm() -> None:
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(asyncio.to_thread(get_openai), loop.getaddrinfo(api_host(), 443))
+
+
+WARMUP_PHASES = {
+    "database_pool": _warm_database_pool,
+    "catalog_caches": _warm_catalog_caches,
+    "intent_classifier": _warm_intent_classifier,
+    "routers": _warm_routers,
+    "llm": _warm_llm,
+}
+
+
+async def warm_up(timer: StartupTimer, timeout: float) -> None:
+    """Ejecuta las fases de calentamiento en paralelo; los fallos se registran pero no detienen el arranque."""
+    async def run(name, warm):
+        started = time.perf_counter()
+        try:
+            await warm()
+        except Exception as e:
+            logger.warning("Warm-up phase %s failed: %r", name, e)
+        finally:
+            timer.record(f"warmup.{name}", time.perf_counter() - started)
+
+    tasks = [asyncio.create_task(run(name, warm)) for name, warm in WARMUP_PHASES.items()]
+    with timer.phase("warmup"):
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+    if pending:
+        logger.warning("Warm-up timed out after %.1f s; %d phases left cold", timeout, len(pending))
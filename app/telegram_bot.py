@@ -1,21 +1,31 @@
+import asyncio
+import signal
 from datetime import datetime
+from typing import List
+
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes, MessageHandler, filters
+from telegram.ext import (Application, CommandHandler, CallbackQueryHandler, ContextTypes, InlineQueryHandler,
+                          MessageHandler, TypeHandler, filters)
 
-from app.GPT.gpt_integration import handle_text
-from app.config import settings
-from app.utils.keyboards import get_otros_keyboard, show_categories, show_products, show_most_ordered_product
-from app.utils.logging_config import setup_logging
+from app.GPT.coalescing import handle_text_burst
+from app.catalog_snapshot import restore_catalog_snapshot, run_catalog_snapshot_writer
+from app.config import BotConfig, settings
+from app.database import dispose_engine, get_engine
+from app.startup import StartupTimer, warm_up
+from app.utils.keyboards import (get_otros_keyboard, show_categories, show_products, show_most_ordered_product,
+                                 show_product_detail, parse_products_page_callback)
+from app.utils import metrics
+from app.utils.admission import admission_control
+from app.utils.inline_search import inline_query
+from app.utils.media_cache import warm_up_product_images
+from app.utils.logging_config import setup_logging, set_log_context
+from app.utils.rate_limiter import OutboundRateLimiter
 from app.utils.rating import handle_rating, handle_comment
 from app.utils.responses import responses
+from app.utils.session_sweeper import run_session_sweeper, touch
 
 logger = setup_logging()
 
-bot_name = "MesaBot"
-
-# Almacena el chat_id y message_id del mensaje de saludo
-greeting_messages = {}
-
 
 def get_greeting() -> str:
     current_hour = datetime.now().hour
@@ -44,13 +54,13 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         return
 
     greeting = get_greeting()
-    logger.info(f"Chat ID: {chat_id}")
+    logger.debug("Chat ID: %s", chat_id)
 
     greeting_message = responses["greeting_message"].format(
         greeting=greeting,
         user_first_name=user_first_name,
         chat_id=f"`{chat_id}`",
-        bot_name=bot_name
+        bot_name=context.bot_data["bot_config"].name
     )
 
     keyboard = [
@@ -63,24 +73,19 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 
     if isinstance(update, Update) and update.message:
         sent_message = await update.message.reply_text(greeting_message, parse_mode='Markdown')
-        greeting_messages[chat_id] = {
-            "greeting_message_id": sent_message.message_id,
-            "chat_id": chat_id
-        }
+        # Se borra al salir (exit_chat); chat_data es propio de cada bot y chat
+        context.chat_data["greeting_message_id"] = sent_message.message_id
         await update.message.reply_text(responses["menu_message"], reply_markup=reply_markup)
     elif isinstance(update, Update) and update.callback_query:
-        await update.callback_query.message.edit_text(greeting_message, parse_mode='Markdown')
-        greeting_messages[chat_id] = {
-            "greeting_message_id": update.callback_query.message.message_id,
-            "chat_id": chat_id
-        }
+        # El saludo se sobrescribe de inmediato con el menú, así que basta con una sola edición
+        context.chat_data["greeting_message_id"] = update.callback_query.message.message_id
         await update.callback_query.message.edit_text(responses["menu_message"], reply_markup=reply_markup)
 
 
 async def button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
     await query.answer()
-    logger.info(f"Callback data received: {query.data}")
+    logger.debug("Callback data received: %s", query.data)
 
     chat_id = query.message.chat_id
 
@@ -88,10 +93,6 @@ async def button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if "session_closed" not in context.chat_data:
         context.chat_data["session_closed"] = True
 
-    query = update.callback_query
-    await query.answer()
-    logger.info(f"Callback data received: {query.data}")
-
     # Verificar si la sesión está cerrada
     if context.chat_data.get("session_closed", True):
         await query.message.reply_text("La sesión ha terminado. Para empezar de nuevo, escribe /start.")
@@ -104,8 +105,10 @@ async def button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     elif query.data == "menu":
         await show_categories(query)
     elif query.data.startswith("category_"):
-        category_id = int(query.data.split("_")[1])
-        await show_products(query, category_id)
+        category_id, after_id, before_id = parse_products_page_callback(query.data)
+        await show_products(query, category_id, after_id=after_id, before_id=before_id)
+    elif query.data.startswith("product_"):
+        await show_product_detail(query, int(query.data.split("_")[1]))
     elif query.data == "pedido":
         response = responses["pedido_response"]
         keyboard = [[InlineKeyboardButton("Regresar al Inicio ↩", callback_data="return_start")]]
@@ -142,18 +145,120 @@ async def button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         reply_markup = get_otros_keyboard()
         await query.edit_message_text(text=responses["other_questions_message"], reply_markup=reply_markup)
     elif query.data == "return_categories":
-        logger.info("Returning to categories")
+        logger.debug("Returning to categories")
         await show_categories(query)
 
 
-def run_bot():
-    application = Application.builder().token(settings.bot_token).build()
+async def bind_log_context(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Asocia los registros de esta actualización a su bot, chat y update_id."""
+    if isinstance(update, Update):
+        label = context.bot_data["bot_config"].label
+        chat_id = update.effective_chat.id if update.effective_chat else None
+        set_log_context(chat_id=chat_id, update_id=update.update_id, bot=label)
+        metrics.inc("telegram_updates_total", bot=label)
+        # Última actividad del chat y del usuario (app.utils.session_sweeper cierra las sesiones inactivas)
+        if update.effective_chat:
+            touch(context.chat_data)
+        if update.effective_user:
+            touch(context.user_data)
+
+
+def build_rate_limiter(bot_config: BotConfig) -> OutboundRateLimiter:
+    return OutboundRateLimiter(
+        global_rate=settings.telegram_global_rate,
+        chat_rate=settings.telegram_chat_rate,
+        chat_burst=settings.telegram_chat_burst,
+        group_rate=settings.telegram_group_rate,
+        max_retries=settings.telegram_max_retries,
+        bot_label=bot_config.label,
+    )
+
+
+def build_application(bot_config: BotConfig) -> Application:
+    # Cada bot tiene su propio limitador (los límites de Telegram son por token); el engine de la base
+    # de datos, el clasificador de intenciones y el cliente de GPT son globales del módulo y se comparten
+    application = (Application.builder()
+                   .token(bot_config.token)
+                   .rate_limiter(build_rate_limiter(bot_config))
+                   .build())
+    application.bot_data["bot_config"] = bot_config
 
     # Establecer session_closed como True por defecto para todos los usuarios
     application.chat_data_defaults = {"session_closed": True}
 
+    # Grupo -1: se ejecuta antes que el resto de handlers para cada actualización
+    application.add_handler(TypeHandler(Update, bind_log_context), group=-1)
     application.add_handler(CommandHandler("start", start))
-    application.add_handler(CallbackQueryHandler(button))
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text))
+    # Límite por usuario y de manejadores simultáneos antes de cualquier consulta (app.utils.admission)
+    application.add_handler(CallbackQueryHandler(admission_control(button)))
+    # block=False: la espera del debounce no debe frenar el resto de actualizaciones
+    application.add_handler(InlineQueryHandler(inline_query, block=False))
+    # block=False también aquí: cada mensaje espera a que termine la ráfaga del chat, que se cobra una sola vez
+    # al límite por usuario (app.GPT.coalescing)
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text_burst, block=False))
     application.add_handler(MessageHandler(filters.TEXT, handle_comment))  # Para manejar los comentarios
-    application.run_polling()
+    return application
+
+
+async def run_bots(bot_configs: List[BotConfig]) -> None:
+    """Atiende varios bots en el mismo event loop hasta recibir SIGINT o SIGTERM."""
+    applications = [build_application(bot_config) for bot_config in bot_configs]
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:  # Windows
+            signal.signal(sig, lambda *_: loop.call_soon_threadsafe(stop_event.set))
+
+    timer = StartupTimer()
+    # El engine (y el driver de la base de datos) se crea aquí, no al importar los módulos
+    with timer.phase("database_engine"):
+        get_engine()
+    # Responder desde la copia local del catálogo hasta que la base de datos esté disponible
+    with timer.phase("catalog_snapshot"):
+        restore_catalog_snapshot(settings.catalog_snapshot_file)
+    catalog_snapshot_writer = asyncio.create_task(run_catalog_snapshot_writer(
+        settings.catalog_snapshot_file, settings.catalog_snapshot_interval))
+    # Volcar periódicamente las métricas (de todos los bots) para que la API las exponga en /metrics
+    metrics_writer = asyncio.create_task(metrics.run_snapshot_writer(settings.metrics_file, settings.metrics_interval))
+    started = []
+    background_tasks = []
+    try:
+        # Conexiones, cachés, patrones y cliente de GPT listos antes de recibir la primera actualización
+        await warm_up(timer, settings.warmup_timeout)
+        for application in applications:
+            label = application.bot_data["bot_config"].label
+            with timer.phase(f"start.{label}"):
+                await application.initialize()
+                await application.start()
+                started.append(application)
+                await application.updater.start_polling()
+            logger.info("Bot %s started", label)
+            if settings.media_cache_chat_id:
+                # Subir por adelantado las imágenes de productos que este bot aún no tiene en caché
+                background_tasks.append(asyncio.create_task(warm_up_product_images(
+                    application.bot, settings.media_cache_chat_id, settings.media_warmup_interval)))
+            # Cerrar las sesiones abandonadas y liberar sus datos
+            background_tasks.append(asyncio.create_task(run_session_sweeper(
+                application, settings.session_idle_ttl, settings.session_sweep_interval,
+                settings.session_sweep_delete_messages)))
+        logger.info("Startup finished in %s", timer.summary())
+        await stop_event.wait()
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        for application in reversed(started):
+            if application.updater.running:
+                await application.updater.stop()
+            await application.stop()
+            await application.shutdown()
+        catalog_snapshot_writer.cancel()
+        metrics_writer.cancel()
+        await dispose_engine()
+
+
+def run_bot():
+    if not settings.bots:
+        raise RuntimeError("No hay bots configurados: revisa BOT_IDS y las variables BOT_TOKEN_<n>")
+    asyncio.run(run_bots(settings.bots))
@@ -0,0 +1,183 @@
+"""Control de admisión de las peticiones entrantes (mensajes de texto y botones).
+
+Cada mensaje puede acabar en varias consultas a la base de datos y en una llamada de pago a GPT, así
+que antes de atenderlo:
+
+* cada usuario tiene un cubo de tokens (``settings.user_rate_limit`` por segundo, ráfagas de
+  ``settings.user_rate_burst``) y otro más estricto para las preguntas que acaban en GPT
+  (``settings.gpt_user_rate_limit`` por minuto). Los mensajes de texto se cobran una vez por ráfaga
+  ya agrupada (``app.GPT.coalescing``), no por cada fragmento;
+* el número de manejadores y de llamadas a GPT simultáneos está limitado para todo el proceso;
+  cuando ya hay demasiadas peticiones esperando turno se rechazan en el acto (``Overloaded``) en
+  lugar de acumular una cola que respondería tarde a todos.
+
+Al usuario se le avisa como mucho una vez cada ``NOTICE_INTERVAL`` segundos, para que el aviso no
+multiplique el tráfico que se está frenando. Los rechazos se cuentan en
+``admission_rejected_total{reason=...}``.
+"""
+import asyncio
+import functools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from app.config import settings
+from app.utils import metrics
+from app.utils.circuit_breaker import update_deadline
+from app.utils.rate_limiter import TokenBucket
+from app.utils.responses import responses
+
+logger = logging.getLogger(__name__)
+
+# Segundos mínimos entre dos avisos de rechazo al mismo usuario
+NOTICE_INTERVAL = 30.0
+# Cada cuántas comprobaciones se purgan los cubos de usuarios inactivos
+_PRUNE_EVERY = 1000
+
+
+class Overloaded(Exception):
+    """Hay demasiadas peticiones esperando turno: se descarta en lugar de encolarla."""
+
+
+class ConcurrencyLimit:
+    """Semáforo con un máximo de tareas esperando turno."""
+
+    def __init__(self, name: str, limit: int, max_waiting: int):
+        self.name = name
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore.locked() and self.waiting >= self.max_waiting:
+            raise Overloaded(self.name)
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        metrics.observe("admission_wait_seconds", time.perf_counter() - started, limit=self.name)
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+
+class AdmissionController:
+    def __init__(self, user_rate: float, user_burst: float, gpt_rate: float, gpt_burst: float,
+                 max_handlers: int, handlers_max_waiting: int, max_gpt: int, gpt_max_waiting: int):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.gpt_rate = gpt_rate
+        self.gpt_burst = gpt_burst
+        self._user_buckets: Dict[int, TokenBucket] = {}
+        self._gpt_buckets: Dict[int, TokenBucket] = {}
+        self._checks = 0
+        self.handlers = ConcurrencyLimit("handlers", max_handlers, handlers_max_waiting)
+        self.gpt = ConcurrencyLimit("gpt", max_gpt, gpt_max_waiting)
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        return cls(settings.user_rate_limit, settings.user_rate_burst, settings.gpt_user_rate_limit / 60,
+                   settings.gpt_user_rate_burst, settings.max_concurrent_handlers, settings.handlers_max_waiting,
+                   settings.max_concurrent_gpt, settings.gpt_max_waiting)
+
+    def _consume(self, buckets: Dict[int, TokenBucket], user_id: Optional[int], rate: float,
+                 burst: float) -> bool:
+        if user_id is None or rate <= 0:
+            return True
+        self._checks += 1
+        if self._checks % _PRUNE_EVERY == 0:
+            self._prune()
+        bucket = buckets.get(user_id)
+        if bucket is None:
+            bucket = buckets[user_id] = TokenBucket(rate, burst)
+        return bucket.try_consume()
+
+    def allow_user(self, user_id: Optional[int]) -> bool:
+        return self._consume(self._user_buckets, user_id, self.user_rate, self.user_burst)
+
+    def allow_gpt(self, user_id: Optional[int]) -> bool:
+        return self._consume(self._gpt_buckets, user_id, self.gpt_rate, self.gpt_burst)
+
+    def _prune(self) -> None:
+        # Un cubo lleno equivale a no tenerlo: se vuelve a crear si el usuario escribe
+        for buckets in (self._user_buckets, self._gpt_buckets):
+            for user_id in [user_id for user_id, bucket in buckets.items() if bucket.is_idle()]:
+                del buckets[user_id]
+        metrics.set_gauge("admission_tracked_users", len(self._user_buckets))
+
+    def report(self) -> None:
+        for limit in (self.handlers, self.gpt):
+            metrics.set_gauge("admission_active", limit.active, limit=limit.name)
+            metrics.set_gauge("admission_waiting", limit.waiting, limit=limit.name)
+
+
+admission = AdmissionController.from_settings()
+
+
+async def notify_rejected(update: Update, context: ContextTypes.DEFAULT_TYPE, reason: str) -> None:
+    """Cuenta el rechazo y, si no se le ha avisado hace poco, se lo explica al usuario."""
+    bot_label = context.bot_data["bot_config"].label
+    metrics.inc("admission_rejected_total", bot=bot_label, reason=reason)
+    logger.info("Request rejected by admission control: %s", reason)
+
+    now = time.monotonic()
+    user_data = context.user_data if update.effective_user else {}
+    if now - user_data.get("admission_notice_at", float("-inf")) < NOTICE_INTERVAL:
+        if update.callback_query:
+            await update.callback_query.answer()
+        return
+    user_data["admission_notice_at"] = now
+    text = responses[f"{reason}_response"]
+    if update.callback_query:
+        await update.callback_query.answer(text, show_alert=True)
+    elif update.effective_message:
+        await update.effective_message.reply_text(text)
+
+
+async def run_admitted(handler, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Ejecuta el manejador con un hueco de ``admission.handlers`` (o avisa de la sobrecarga)."""
+    try:
+        async with admission.handlers.slot():
+            admission.report()
+            # Plazo común para todas las llamadas a la base de datos y a GPT de esta actualización
+            with update_deadline(settings.update_deadline):
+                await handler(update, context)
+    except Overloaded:
+        await notify_rejected(update, context, "overloaded")
+    finally:
+        admission.report()
+
+
+async def admit_user(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
+    """Cobra la petición al cubo del usuario; si está vacío, avisa y devuelve False."""
+    user = update.effective_user
+    if admission.allow_user(user.id if user else None):
+        return True
+    await notify_rejected(update, context, "rate_limited")
+    return False
+
+
+def admission_control(handler):
+    """Decorador de manejadores: límite por usuario y hueco global (``run_admitted``).
+
+    Los mensajes de texto no lo usan: ``app.GPT.coalescing`` cobra cada ráfaga agrupada con
+    ``admit_user`` y pide el hueco cuando de verdad va a atenderla.
+    """
+    @functools.wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        if await admit_user(update, context):
+            await run_admitted(handler, update, context)
+
+    return wrapper
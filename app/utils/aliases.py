@@ -0,0 +1,173 @@
+"""Registro de alias de categorías y productos ("gaseosa" -> Bebidas, "coca" -> "coca cola").
+
+Los alias se editan en ``text/aliases.json`` y se compilan en autómatas de Aho-Corasick que
+encuentran todos los alias de un mensaje en una sola pasada, sea cual sea su número. Sólo cuentan
+las coincidencias de palabras completas y, cuando se solapan, gana la más larga ("bebida deportiva"
+antes que "bebida"). Un alias de categoría dentro de un producto ("cola" en "quiero una coca cola") no
+cuenta: el mensaje pide el producto, no la categoría.
+"""
+import json
+import logging
+import os
+from collections import deque
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from app.utils.normalization import fold_accents, normalize_product_name
+
+logger = logging.getLogger(__name__)
+
+aliases_file_path = os.path.join(os.path.dirname(__file__), 'text', 'aliases.json')
+
+
+class AliasMatch(NamedTuple):
+    start: int
+    end: int
+    alias: str
+    value: str
+
+
+def _is_word_boundary(text: str, start: int, end: int) -> bool:
+    return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+class AliasAutomaton:
+    """Autómata de Aho-Corasick sobre ``{alias: valor}``; ``fold`` se aplica a los alias y al texto."""
+
+    def __init__(self, aliases: Dict[str, str], fold: Callable[[str], str] = fold_accents):
+        self._fold = fold
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[tuple]] = [[]]
+        self.size = 0
+
+        for alias, value in aliases.items():
+            key = fold(alias).strip()
+            if not key:
+                continue
+            node = 0
+            for char in key:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = self._goto[node][char] = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = next_node
+            if self._out[node]:
+                logger.warning("Duplicate alias %r (%s / %s), keeping the first", key, self._out[node][0][1], value)
+                continue
+            self._out[node].append((len(key), value, key))
+            self.size += 1
+
+        # Enlaces de fallo por anchura: cada nodo hereda las salidas de su sufijo propio más largo
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def fold(self, text: str) -> str:
+        return self._fold(text)
+
+    def find_all(self, text: str, folded: bool = False) -> List[AliasMatch]:
+        """Alias de ``text`` sin solapamientos, de izquierda a derecha y el más largo en cada posición.
+
+        Las posiciones se refieren al texto tras aplicar ``fold`` (o a ``text`` si ya viene con
+        ``folded=True``).
+        """
+        if not folded:
+            text = self._fold(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        found = []
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, value, alias in out[node]:
+                start = i + 1 - length
+                if _is_word_boundary(text, start, i + 1):
+                    found.append(AliasMatch(start, i + 1, alias, value))
+
+        found.sort(key=lambda match: (match.start, match.start - match.end))
+        matches, end = [], 0
+        for match in found:
+            if match.start >= end:
+                matches.append(match)
+                end = match.end
+        return matches
+
+    def first(self, text: str) -> Optional[str]:
+        """Valor del primer alias del texto, o None."""
+        matches = self.find_all(text)
+        return matches[0].value if matches else None
+
+    def replace(self, text: str) -> str:
+        """Texto (tras ``fold``) con cada alias sustituido por su valor."""
+        text = self._fold(text)
+        parts, position = [], 0
+        for match in self.find_all(text, folded=True):
+            parts.append(text[position:match.start])
+            parts.append(match.value)
+            position = match.end
+        parts.append(text[position:])
+        return "".join(parts)
+
+
+class AliasRegistry:
+    def __init__(self, categories: Dict[str, List[str]], products: Dict[str, List[str]],
+                 descriptions: Optional[Dict[str, List[str]]] = None):
+        self.category_aliases = categories
+        self.product_aliases = products
+        # Frases que describen cada categoría; sólo las usa la búsqueda semántica (app.semantic_search)
+        self.descriptions = descriptions or {}
+        # Cada nombre es también alias de sí mismo, para que gane a sus alias más cortos ("coca cola"
+        # no debe convertirse en "coca cola cola")
+        self.category_keywords = {alias: category for category, aliases in categories.items()
+                                  for alias in [category.lower(), *aliases]}
+        self.categories = AliasAutomaton(self.category_keywords, fold=fold_accents)
+        # Los alias de productos se comparan con nombres ya normalizados (normalize_product_name)
+        product_aliases = {normalize_product_name(alias): normalize_product_name(product)
+                           for product, aliases in products.items() for alias in [product, *aliases]}
+        self.products = AliasAutomaton(product_aliases, fold=fold_accents)
+        # Los mismos alias sobre el mensaje tal cual (sin normalizar), para ver qué palabras son de un producto
+        self.product_phrases = AliasAutomaton({alias: product for product, aliases in products.items()
+                                               for alias in [product, *aliases]}, fold=fold_accents)
+
+    def find_category(self, text: str, product_names: Optional[AliasAutomaton] = None) -> Optional[str]:
+        """Categoría del primer alias de categoría del mensaje que no forma parte de un producto.
+
+        Se descartan los alias contenidos en una coincidencia más larga de un alias de producto o de
+        ``product_names`` (los nombres del catálogo, ver ``app.catalog_index``).
+        """
+        folded = fold_accents(text)
+        products = self.product_phrases.find_all(folded, folded=True)
+        if product_names is not None:
+            products += product_names.find_all(folded, folded=True)
+        for match in self.categories.find_all(folded, folded=True):
+            if not any(product.start <= match.start and match.end <= product.end
+                       and product.end - product.start > match.end - match.start for product in products):
+                return match.value
+        return None
+
+    def expand_product_aliases(self, normalized_name: str) -> str:
+        """Sustituye los alias de productos por el nombre con el que se buscan (texto ya normalizado)."""
+        return self.products.replace(normalized_name)
+
+
+def load_alias_registry(path: str = aliases_file_path) -> AliasRegistry:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return AliasRegistry(data.get("categories", {}), data.get("products", {}), data.get("descriptions", {}))
+
+
+alias_registry = load_alias_registry()
@@ -0,0 +1,150 @@
+"""Cortacircuitos para las dependencias lentas o caídas (PostgreSQL y la API de OpenAI).
+
+Cada llamada protegida tiene un tiempo máximo: el menor entre el del cortacircuitos y lo que quede del
+plazo de la actualización en curso (``update_deadline``, que fija ``app.utils.admission``). Tras
+``failure_threshold`` fallos seguidos (errores o tiempos agotados) el circuito se abre y las llamadas
+fallan en el acto con ``CircuitOpen`` durante ``reset_timeout`` segundos, en lugar de hacer esperar a
+cada usuario; después se deja pasar una única llamada de prueba y, si sale bien, el circuito se cierra.
+
+Mientras un circuito está abierto los llamadores sirven una versión degradada (el catálogo de la
+última lectura en ``app.catalog_reader``, respuestas fijas en lugar de GPT). El estado se publica en
+el gauge ``circuit_open{circuit=...}``, que la API expone en ``/health``.
+"""
+import asyncio
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Optional, TypeVar
+
+from app.config import settings
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Instante (time.monotonic) en que vence el plazo de la actualización que se está atendiendo
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("update_deadline", default=None)
+
+
+@contextmanager
+def update_deadline(seconds: float):
+    """Plazo para todas las llamadas protegidas hechas dentro del bloque (y de sus tareas)."""
+    token = _deadline.set(time.monotonic() + seconds if seconds > 0 else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _discard(awaitable) -> None:
+    # Evita el aviso "coroutine was never awaited" de las llamadas que no se llegan a hacer
+    if asyncio.iscoroutine(awaitable):
+        awaitable.close()
+
+
+class CircuitOpen(Exception):
+    """El circuito está abierto: la dependencia no se llama."""
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Se agotó el plazo de la actualización antes de poder hacer la llamada."""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float, call_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.call_timeout = call_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        metrics.set_gauge("circuit_open", 0, circuit=name)
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("Circuit %s: %s -> %s", self.name, self.state, state)
+            self.state = state
+            metrics.set_gauge("circuit_open", 1 if state == OPEN else 0, circuit=self.name)
+
+    @property
+    def is_open(self) -> bool:
+        """Si una llamada ahora fallaría en el acto (sin contar la de prueba pendiente)."""
+        if self.state == OPEN:
+            return time.monotonic() - self.opened_at < self.reset_timeout
+        return self.state == HALF_OPEN and self._probing
+
+    def _allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._probing = False
+        self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        metrics.inc("circuit_failures_total", circuit=self.name)
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    async def call(self, awaitable: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Espera ``awaitable`` con el tiempo máximo que corresponda; lanza ``CircuitOpen`` si está abierto."""
+        timeout = self.call_timeout if timeout is None else timeout
+        left = remaining_time()
+        # Si manda el plazo de la actualización, agotarlo no es un fallo de la dependencia
+        limited_by_deadline = left is not None and left < timeout
+        if limited_by_deadline:
+            if left <= 0:
+                _discard(awaitable)
+                raise DeadlineExceeded(self.name)
+            timeout = left
+        if not self._allow():
+            _discard(awaitable)
+            metrics.inc("circuit_rejected_total", circuit=self.name)
+            raise CircuitOpen(self.name)
+        try:
+            result = await asyncio.wait_for(awaitable, timeout)
+        except asyncio.CancelledError:
+            self._probing = False
+            raise
+        except asyncio.TimeoutError:
+            if limited_by_deadline:
+                self._probing = False
+                raise DeadlineExceeded(self.name) from None
+            logger.warning("Call through circuit %s timed out after %.1f s", self.name, timeout)
+            self.record_failure()
+            raise
+        except Exception as e:
+            logger.warning("Call through circuit %s failed: %r", self.name, e)
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+database_breaker = CircuitBreaker("database", settings.circuit_failure_threshold, settings.circuit_reset_timeout,
+                                  settings.database_call_timeout)
+openai_breaker = CircuitBreaker("openai", settings.circuit_failure_threshold, settings.circuit_reset_timeout,
+                                settings.openai_timeout)
@@ -0,0 +1,55 @@
+"""Modo inline: ``@MesaBot limonada`` busca productos desde cualquier chat.
+
+Las consultas se responden desde el índice en memoria de ``app.catalog_index``. Telegram envía una
+consulta por cada tecla pulsada, así que cada una espera ``settings.inline_debounce`` segundos y sólo
+se responde si el usuario no ha escrito nada más entretanto. Las respuestas no son personales y
+Telegram las cachea ``settings.inline_cache_time`` segundos.
+
+Requiere activar el modo inline del bot en @BotFather (``/setinline``).
+"""
+import asyncio
+import logging
+
+from telegram import InlineQueryResultArticle, InputTextMessageContent, Update
+from telegram.ext import ContextTypes
+
+from app.catalog import ProductRecord
+from app.catalog_index import get_catalog_index
+from app.config import settings
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Telegram admite como mucho 50 resultados por respuesta
+INLINE_RESULTS_LIMIT = 20
+
+
+def product_result(product: ProductRecord) -> InlineQueryResultArticle:
+    price = f"${product.price:.2f}"
+    description = price if product.stock is None else f"{price} - Cantidad: {product.stock}"
+    return InlineQueryResultArticle(
+        id=str(product.id),
+        title=product.name,
+        description=description,
+        input_message_content=InputTextMessageContent(
+            f"{product.name} - {description}\nRecuerda todos los pedidos se hacen a travez de la mini App 👀"),
+    )
+
+
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    inline = update.inline_query
+    bot_label = context.bot_data["bot_config"].label
+    context.user_data["latest_inline_query"] = inline.id
+
+    await asyncio.sleep(settings.inline_debounce)
+    if context.user_data.get("latest_inline_query") != inline.id:
+        # El usuario siguió escribiendo: ya hay una consulta más reciente
+        metrics.inc("inline_queries_debounced_total", bot=bot_label)
+        return
+
+    index = await get_catalog_index()
+    products = index.search(inline.query, limit=INLINE_RESULTS_LIMIT)
+    metrics.inc("inline_queries_answered_total", bot=bot_label)
+    logger.debug("Inline query %r: %d results", inline.query, len(products))
+    await inline.answer([product_result(product) for product in products],
+                        cache_time=settings.inline_cache_time, is_personal=False)
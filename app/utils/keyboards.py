@@ -1,14 +1,25 @@
+import asyncio
 from typing import Optional
 
 from sqlalchemy import func
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from app.database import SessionLocal
-from app.models import Category, Product, OrderProducts
-from sqlalchemy.future import select
+from app.catalog import ProductRecord, select_products, to_product
+from app.catalog_index import get_catalog_index
+from app.catalog_reader import catalog_reader
+from app.models import Product, OrderProducts
+from app.recommendations import DEFAULT_MEAL, get_meal_recommender
+from app.search import search_products
+from app.utils import metrics
+from app.utils.circuit_breaker import database_breaker
+from app.utils.media_cache import send_product_photo
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Resultados de la búsqueda por nombre cuando se hace en memoria (modo degradado)
+SEARCH_FALLBACK_LIMIT = 20
+
 
 def get_otros_keyboard() -> InlineKeyboardMarkup:
     """Returns the keyboard for 'Preguntas acerca del Bot'."""
@@ -27,11 +38,9 @@ def get_otros_keyboard() -> InlineKeyboardMarkup:
 # Consulta para obtener todas las categorías
 async def show_categories(query: Update.callback_query):
     """Fetches categories from the database and shows them as inline buttons."""
-    logger.info("Fetching categories from the database")
-    async with SessionLocal() as session:
-        async with session.begin():
-            categories = (await session.execute(select(Category))).scalars().all()
-            logger.info(f"Found categories: {categories}")
+    logger.debug("Fetching categories from the database")
+    categories = await catalog_reader.categories()
+    logger.debug("Found %d categories", len(categories))
 
     if not categories:
         await query.edit_message_text(text="No hay categorías disponibles.")
@@ -46,22 +55,52 @@ async def show_categories(query: Update.callback_query):
     await query.edit_message_text(text="Selecciona una categoría:", reply_markup=reply_markup)
 
 
-# Consulta para obtener los productos de una categoría
-async def show_products(query, category_id):
-    async with SessionLocal() as session:
-        async with session.begin():
-            products = (await session.execute(select(Product).where(Product.categoryId == category_id))).scalars().all()
+# Productos por página en el teclado de una categoría
+PRODUCTS_PAGE_SIZE = 10
+
+
+def products_page_callback(category_id: int, direction: str, product_id: int) -> str:
+    """Callback de los botones ◀ / ▶: 'category_<id>_<next|prev>_<id del producto ancla>'.
+
+    El cursor es sólo el id del producto (no su nombre), así que cabe de sobra en los 64 bytes que
+    admite Telegram.
+    """
+    return f"category_{category_id}_{direction}_{product_id}"
+
+
+def parse_products_page_callback(data: str):
+    """Devuelve (category_id, after_id, before_id) a partir del callback de una categoría."""
+    parts = data.split("_")
+    category_id = int(parts[1])
+    if len(parts) == 4:
+        anchor_id = int(parts[3])
+        return (category_id, anchor_id, None) if parts[2] == "next" else (category_id, None, anchor_id)
+    return category_id, None, None
+
+
+# Consulta para obtener los productos de una categoría (una página)
+async def show_products(query, category_id, after_id: Optional[int] = None, before_id: Optional[int] = None):
+    # Se pide un producto más para saber si hay otra página en la dirección del desplazamiento
+    products, category = await asyncio.gather(
+        catalog_reader.products_page(category_id, PRODUCTS_PAGE_SIZE + 1, after_id=after_id, before_id=before_id),
+        catalog_reader.category_by_id(category_id))
+    category_name = category.name if category else None
 
     if not products:
         await query.edit_message_text(text="No hay productos disponibles en esta categoría.")
         return
 
+    if before_id is not None:
+        # Hacia atrás sobra el primero; siempre hay página siguiente (la que se acaba de dejar)
+        has_prev, has_next = len(products) > PRODUCTS_PAGE_SIZE, True
+        products = products[-PRODUCTS_PAGE_SIZE:]
+    else:
+        has_prev, has_next = after_id is not None, len(products) > PRODUCTS_PAGE_SIZE
+        products = products[:PRODUCTS_PAGE_SIZE]
+
     # IDs o nombres de las categorías donde no se mostrará el stock
     categorias_sin_stock = ["Desayunos", "Entradas", "Segundos"]
 
-    # Aquí puedes hacer una consulta para obtener el nombre de la categoría si solo tienes el ID
-    category_name = (await session.execute(select(Category.name).where(Category.id == category_id))).scalar()
-
     keyboard = []
     for product in products:
         if category_name in categorias_sin_stock:
@@ -74,28 +113,54 @@ async def show_products(query, category_id):
                 [InlineKeyboardButton(f"{product.name} - ${product.price} - Cantidad:{product.stock}",
                                       callback_data=f"product_{product.id}")])
 
+    navigation = []
+    if has_prev:
+        navigation.append(InlineKeyboardButton(
+            "◀", callback_data=products_page_callback(category_id, "prev", products[0].id)))
+    if has_next:
+        navigation.append(InlineKeyboardButton(
+            "▶", callback_data=products_page_callback(category_id, "next", products[-1].id)))
+    if navigation:
+        keyboard.append(navigation)
+
     keyboard.append([InlineKeyboardButton("Regresar a Categorías ↩", callback_data="return_categories")])
     reply_markup = InlineKeyboardMarkup(keyboard)
     await query.edit_message_text(text="Selecciona un producto:", reply_markup=reply_markup)
 
 
+# Ficha de un producto: se envía como mensaje nuevo para no perder la lista de productos
+async def show_product_detail(query: Update.callback_query, product_id: int) -> None:
+    product = await catalog_reader.product_by_id(product_id)
+    if product is None:
+        await query.message.reply_text("Este producto ya no está disponible.")
+        return
+
+    caption = f"{product.name} - ${product.price:.2f}"
+    if product.stock is not None:
+        caption += f" - Cantidad: {product.stock}"
+    caption += "\nRecuerda todos los pedidos se hacen a travez de la mini App 👀"
+
+    try:
+        if await send_product_photo(query.get_bot(), query.message.chat_id, product, caption):
+            return
+    except Exception as e:
+        logger.error("Error al enviar la foto del producto %s: %s", product_id, e)
+    await query.message.reply_text(caption)
+
+
 # Obtener productos por nombre de categoría
 async def get_products_by_category_name(category_name: str):
-    async with SessionLocal() as session:
-        async with session.begin():
-            # Consulta para obtener el ID de la categoría
-            result = await session.execute(select(Category.id).where(Category.name == category_name))
-            category_id = result.scalar_one_or_none()
-
-            # Consulta para obtener los productos de la categoría
-            products = (await session.execute(select(Product).where(Product.categoryId == category_id))).scalars().all()
-    return products
+    # Pocas categorías: se busca el ID en la lista en lugar de hacer otra consulta por nombre
+    category_id = next((c.id for c in await catalog_reader.categories() if c.name == category_name), None)
+    if category_id is None:
+        return []
+    return await catalog_reader.products_by_category(category_id)
 
 
 # Consulta para obtener los productos de una categoría por nombre
 async def show_products_by_category_name(query: Update.callback_query, category_name: str) -> None:
     """Muestra los productos de una categoría específica basada en su nombre."""
-    logger.info(f"Buscando productos de la categoría con nombre: {category_name}")
+    logger.debug("Buscando productos de la categoría con nombre: %s", category_name)
     try:
         products = await get_products_by_category_name(category_name)
 
@@ -122,27 +187,21 @@ async def show_products_by_category_name(query: Update.callback_query, category_
             reply_markup = InlineKeyboardMarkup(keyboard)
             await query.edit_message_text(text=response, reply_markup=reply_markup)
     except Exception as e:
-        logger.error(f"Error al buscar los productos por nombre de categoría: {e}")
-        print("Ocurrió un error al buscar los productos de la categoría.")
+        logger.error("Error al buscar los productos por nombre de categoría: %s", e)
 
 
 # Consulta para obtener dos listas de categorías juntas la de entradas y segundos para obtener la categoría de almuerzos
 async def get_lunch_categories():
-    async with SessionLocal() as session:
-        async with session.begin():
-            # Consulta para obtener las categorías de entradas y segundos
-            entradas_category = (
-                await session.execute(select(Category).where(Category.name == "Entradas"))).scalar_one()
-            segundos_category = (
-                await session.execute(select(Category).where(Category.name == "Segundos"))).scalar_one()
-    return entradas_category, segundos_category
+    # Desde catalog_reader para que el menú siga disponible en modo degradado
+    categories = {category.name: category for category in await catalog_reader.categories()}
+    return categories["Entradas"], categories["Segundos"]
 
 
 # Mostrar productos de la categoría de almuerzos
 async def show_lunch_products(query_or_update) -> None:
     """Muestra los productos de la categoría de almuerzos."""
     global edit_message, query
-    logger.info("Buscando productos de la categoría de almuerzos")
+    logger.debug("Buscando productos de la categoría de almuerzos")
     try:
         # Determinar si la llamada viene de un callback_query o de un mensaje de texto
         if isinstance(query_or_update, Update) and query_or_update.callback_query:
@@ -204,28 +263,39 @@ async def show_lunch_products(query_or_update) -> None:
             else:
                 await query.reply_text(text=response, reply_markup=reply_markup)
     except Exception as e:
-        logger.error(f"Error al buscar los productos de la categoría de almuerzos: {e}")
+        logger.error("Error al buscar los productos de la categoría de almuerzos: %s", e)
         if edit_message:
             await query.edit_message_text(text="Ocurrió un error al buscar los productos de la categoría de almuerzos.")
         else:
             await query.reply_text(text="Ocurrió un error al buscar los productos de la categoría de almuerzos.")
 
 
-# Consulta para obtener el producto más pedido u ordenado
-async def show_most_ordered_product(query: Update.callback_query) -> None:
-    """Fetches and shows the most ordered product."""
-    logger.info("Fetching the most ordered product")
+# Consulta para obtener el producto que aparece en más pedidos
+async def get_most_ordered_product() -> Optional[ProductRecord]:
     async with SessionLocal() as session:
         async with session.begin():
             result = await session.execute(
-                select(Product)
+                select_products()
                 .join(OrderProducts)
                 .group_by(Product.id)
                 .order_by(func.count(OrderProducts.id).desc())
                 .limit(1)
             )
-            most_ordered_product = result.scalars().first()
-            logger.info(f"Most ordered product: {most_ordered_product}")
+            row = result.first()
+    return to_product(row) if row else None
+
+
+# Consulta para obtener el producto más pedido u ordenado
+async def show_most_ordered_product(query: Update.callback_query) -> None:
+    """Fetches and shows the most ordered product."""
+    logger.debug("Fetching the most ordered product")
+    try:
+        most_ordered_product = await database_breaker.call(get_most_ordered_product())
+    except Exception as e:
+        # Sin pedidos en la instantánea del catálogo: no hay respuesta en modo degradado
+        logger.warning("Most ordered product unavailable: %r", e)
+        most_ordered_product = None
+    logger.debug("Most ordered product: %s", most_ordered_product.name if most_ordered_product else None)
 
     if most_ordered_product:
         price = f"{most_ordered_product.price:.2f}"  # Format price to 2 decimal places
@@ -240,24 +310,14 @@ async def show_most_ordered_product(query: Update.callback_query) -> None:
 
 # Consulta para obtener el producto más vendido de una categoría
 async def get_most_sold_product(category_id: int):
-    async with SessionLocal() as session:
-        async with session.begin():
-            result = await session.execute(
-                select(Product, func.sum(OrderProducts.quantity).label('total_quantity'))
-                .join(OrderProducts)
-                .where(Product.categoryId == category_id)
-                .group_by(Product.id)
-                .order_by(func.sum(OrderProducts.quantity).desc())
-                .limit(1)
-            )
-            most_sold_product = result.first()
-    return most_sold_product
+    # (producto, cantidad total vendida)
+    return await catalog_reader.best_seller(category_id)
 
 
 # Consulta para obtener la bebida más vendida
 async def show_most_sold_drink(query: Update.callback_query) -> None:
     """Fetches and shows the most sold drink."""
-    logger.info("Fetching the most sold drink")
+    logger.debug("Fetching the most sold drink")
     bebidas_category_id = 1
     try:
         most_sold_drink = await get_most_sold_product(bebidas_category_id)
@@ -273,14 +333,14 @@ async def show_most_sold_drink(query: Update.callback_query) -> None:
         reply_markup = InlineKeyboardMarkup(keyboard)
         await query.edit_message_text(text=response, reply_markup=reply_markup)
     except Exception as e:
-        logger.error(f"Error en show_most_sold_drink: {e}")
+        logger.error("Error en show_most_sold_drink: %s", e)
         await query.edit_message_text(text="Ocurrió un error al obtener la bebida más vendida.")
 
 
 # Consulta para obtener la bebida deportiva más vendida
 async def show_most_sold_sport_drink(query: Update.callback_query) -> None:
     """Fetches and shows the most sold sport drink."""
-    logger.info("Fetching the most sold sport drink")
+    logger.debug("Fetching the most sold sport drink")
     bebidas_deportivas_category_id = 2
     most_sold_sport_drink = await get_most_sold_product(bebidas_deportivas_category_id)
 
@@ -299,7 +359,7 @@ async def show_most_sold_sport_drink(query: Update.callback_query) -> None:
 # Consulta para obtener el desayuno más vendido
 async def show_most_sold_breakfast(query: Update.callback_query) -> None:
     """Fetches and shows the most sold breakfast."""
-    logger.info("Fetching the most sold breakfast")
+    logger.debug("Fetching the most sold breakfast")
     desayunos_category_id = 3
     most_sold_breakfast = await get_most_sold_product(desayunos_category_id)
 
@@ -318,7 +378,7 @@ async def show_most_sold_breakfast(query: Update.callback_query) -> None:
 # Consulta para obtener la entrada más vendida
 async def show_most_sold_starter(query: Update.callback_query) -> None:
     """Fetches and shows the most sold starter."""
-    logger.info("Fetching the most sold starter")
+    logger.debug("Fetching the most sold starter")
     entradas_category_id = 4
     most_sold_starter = await get_most_sold_product(entradas_category_id)
 
@@ -337,7 +397,7 @@ async def show_most_sold_starter(query: Update.callback_query) -> None:
 # Consulta para obtener el segundo más vendido
 async def show_most_sold_second(query: Update.callback_query) -> None:
     """Fetches and shows the most sold second."""
-    logger.info("Fetching the most sold second")
+    logger.debug("Fetching the most sold second")
     segundos_category_id = 5
     most_sold_second = await get_most_sold_product(segundos_category_id)
 
@@ -356,7 +416,7 @@ async def show_most_sold_second(query: Update.callback_query) -> None:
 # Consulta para obtener el snack más vendido
 async def show_most_sold_snack(query: Update.callback_query) -> None:
     """Fetches and shows the most sold snack."""
-    logger.info("Fetching the most sold snack")
+    logger.debug("Fetching the most sold snack")
     snacks_category_id = 6
     most_sold_snack = await get_most_sold_product(snacks_category_id)
 
@@ -372,25 +432,44 @@ async def show_most_sold_snack(query: Update.callback_query) -> None:
     await query.edit_message_text(text=response, reply_markup=reply_markup)
 
 
-# Consulta para obtener el producto más económico de una categoría
-async def get_cheapest_product(category_id: int) -> Product:
+# Producto disponible (con stock) más económico de una categoría, desde el recomendador en memoria
+async def get_cheapest_product(category_id: int) -> Optional[ProductRecord]:
     """Consulta para obtener el producto más económico de una categoría."""
-    async with SessionLocal() as session:
-        async with session.begin():
-            result = await session.execute(
-                select(Product)
-                .where(Product.categoryId == category_id)
-                .order_by(Product.price.asc())  # Ordena por precio ascendente
-                .limit(1)
-            )
-            cheapest_product = result.scalar_one_or_none()
-    return cheapest_product
+    recommender = await get_meal_recommender()
+    return recommender.cheapest(recommender.category_names.get(category_id))
+
+
+# Comidas completas (entrada + segundo + bebida) que caben en un presupuesto
+async def show_meal_recommendations(query: Update.callback_query, budget) -> None:
+    """Muestra las comidas que mejor aprovechan el presupuesto indicado por el usuario."""
+    logger.debug("Buscando comidas para un presupuesto de %s", budget)
+    recommender = await get_meal_recommender()
+    combos = recommender.combos(budget)
+
+    if combos:
+        response = f"Con ${budget:.2f} te alcanza para:\n"
+        for combo in combos:
+            names = " + ".join(product.name for product in combo.products)
+            response += f"- {names}: ${combo.total:.2f}\n"
+        response += "Recuerda todos los pedidos se hacen a travez de la mini App 👀"
+    else:
+        cheapest = [recommender.cheapest(course) for course in DEFAULT_MEAL]
+        if all(cheapest):
+            minimum = sum(product.price for product in cheapest)
+            response = (f"Con ${budget:.2f} no alcanza para una entrada, un segundo y una bebida. "
+                        f"La comida más económica cuesta ${minimum:.2f}.")
+        else:
+            response = "No hay productos disponibles para armar una comida en este momento."
+
+    keyboard = [[InlineKeyboardButton("Regresar a las Preguntas ↩", callback_data="return_otros")]]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+    await query.edit_message_text(text=response, reply_markup=reply_markup)
 
 
 # Consulta para obtener el producto más económico de la categoría de bebidas
 async def recommend_drink_by_price(query: Update.callback_query) -> None:
     """Fetches and shows the cheapest drink."""
-    logger.info("Fetching the cheapest drink")
+    logger.debug("Fetching the cheapest drink")
     bebidas_category_id = 1
     cheapest_drink = await get_cheapest_product(bebidas_category_id)
 
@@ -408,7 +487,7 @@ async def recommend_drink_by_price(query: Update.callback_query) -> None:
 # Consulta para obtener el producto más económico de la categoría de bebidas deportivas
 async def recommend_sport_drink_by_price(query: Update.callback_query) -> None:
     """Fetches and shows the cheapest sport drink."""
-    logger.info("Fetching the cheapest sport drink")
+    logger.debug("Fetching the cheapest sport drink")
     bebidas_deportivas_category_id = 2
     cheapest_sport_drink = await get_cheapest_product(bebidas_deportivas_category_id)
 
@@ -426,7 +505,7 @@ async def recommend_sport_drink_by_price(query: Update.callback_query) -> None:
 # Consulta para obtener el producto más económico de la categoría de desayunos
 async def recommend_breakfast_by_price(query: Update.callback_query) -> None:
     """Fetches and shows the cheapest breakfast."""
-    logger.info("Fetching the cheapest breakfast")
+    logger.debug("Fetching the cheapest breakfast")
     desayunos_category_id = 3
     cheapest_breakfast = await get_cheapest_product(desayunos_category_id)
 
@@ -444,7 +523,7 @@ async def recommend_breakfast_by_price(query: Update.callback_query) -> None:
 # Consulta para obtener el producto más económico de la categoría de entradas
 async def recommend_starter_by_price(query: Update.callback_query) -> None:
     """Fetches and shows the cheapest starter."""
-    logger.info("Fetching the cheapest starter")
+    logger.debug("Fetching the cheapest starter")
     entradas_category_id = 4
     cheapest_starter = await get_cheapest_product(entradas_category_id)
 
@@ -462,7 +541,7 @@ async def recommend_starter_by_price(query: Update.callback_query) -> None:
 # Consulta para obtener el producto más económico de la categoría de segundos
 async def recommend_second_by_price(query: Update.callback_query) -> None:
     """Fetches and shows the cheapest second."""
-    logger.info("Fetching the cheapest second")
+    logger.debug("Fetching the cheapest second")
     segundos_category_id = 5
     cheapest_second = await get_cheapest_product(segundos_category_id)
 
@@ -480,7 +559,7 @@ async def recommend_second_by_price(query: Update.callback_query) -> None:
 # Consulta para obtener el producto más económico de la categoría de snacks
 async def recommend_snack_by_price(query: Update.callback_query) -> None:
     """Fetches and shows the cheapest snack."""
-    logger.info("Fetching the cheapest snack")
+    logger.debug("Fetching the cheapest snack")
     snacks_category_id = 6
     cheapest_snack = await get_cheapest_product(snacks_category_id)
 
@@ -498,7 +577,7 @@ async def recommend_snack_by_price(query: Update.callback_query) -> None:
 # Consulta para obtener el plato principal más vendido
 async def show_most_sold_main(query: Update.callback_query) -> None:
     """Fetches and shows the most sold main."""
-    logger.info("Fetching the most sold main")
+    logger.debug("Fetching the most sold main")
     entradas_category_id = 4
     segundos_category_id = 5
 
@@ -526,19 +605,41 @@ async def show_most_sold_main(query: Update.callback_query) -> None:
 
 
 # Traer productos por coincidencia parcial de su nombre
-async def get_products_by_name(product_name: str) -> list[Product]:
-    async with SessionLocal() as session:
-        async with session.begin():
-            # Usamos '%' antes y después del nombre para buscar coincidencias parciales
-            products = (
-                await session.execute(select(Product).where(Product.name.like(f"%{product_name}%")))).scalars().all()
-    return products
+async def get_products_by_name(product_name: str, min_similarity: Optional[float] = None,
+                               limit: Optional[int] = None) -> list[ProductRecord]:
+    async def search():
+        async with SessionLocal() as session:
+            async with session.begin():
+                # Subcadena o texto completo, sin distinguir mayúsculas ni acentos (índices de app.search)
+                return await search_products(session, product_name, min_similarity=min_similarity, limit=limit)
+
+    try:
+        return await database_breaker.call(search())
+    except Exception as e:
+        # Modo degradado: índice en memoria (construido desde la instantánea del catálogo si hace falta)
+        logger.warning("Searching %r in the in-memory catalog index: %r", product_name, e)
+        metrics.inc("catalog_degraded_reads_total", query="search_products")
+        index = await get_catalog_index()
+        return index.search(product_name, limit=limit or SEARCH_FALLBACK_LIMIT)
+
+
+# Productos parecidos a lo que pidió el usuario (búsqueda semántica), como botones de producto
+async def show_similar_products(query: Update.callback_query, products: list[ProductRecord]) -> None:
+    keyboard = []
+    for product in products:
+        product_info = f"{product.name} - ${product.price}"
+        if product.stock is not None:
+            product_info += f" - Cantidad: {product.stock}"
+        keyboard.append([InlineKeyboardButton(product_info, callback_data=f"product_{product.id}")])
+    keyboard.append([InlineKeyboardButton("Regresar a Categorías ↩", callback_data="return_categories")])
+    reply_markup = InlineKeyboardMarkup(keyboard)
+    await query.edit_message_text(text="Esto es lo que te podemos ofrecer:", reply_markup=reply_markup)
 
 
 # Consulta para obtener un producto por su nombre
 async def show_product_by_name(query: Update.callback_query, product_name: str) -> None:
     """Muestra la información de un producto específico basado en su nombre."""
-    logger.info(f"Buscando el producto con nombre: {product_name}")
+    logger.debug("Buscando el producto con nombre: %s", product_name)
     try:
         products = await get_products_by_name(product_name)
 
@@ -573,15 +674,15 @@ async def show_product_by_name(query: Update.callback_query, product_name: str)
         reply_markup = InlineKeyboardMarkup(keyboard)
         await query.edit_message_text(text=response, reply_markup=reply_markup)
     except Exception as e:
-        logger.error(f"Error al buscar el producto por nombre: {e}")
+        logger.error("Error al buscar el producto por nombre: %s", e)
         await query.edit_message_text(text="Ocurrió un error al buscar el producto.")
 
 
 # Consulta para obtener el stock por nombre de producto y cantidad solicitada
 async def show_product_stock_by_name(query: Update.callback_query, product_name: str, requested_quantity: int) -> None:
     """Muestra el stock de un producto específico basado en su nombre y la cantidad solicitada por el usuario."""
-    logger.info(
-        f"Buscando el stock del producto con nombre: {product_name} y cantidad solicitada: {requested_quantity}")
+    logger.debug("Buscando el stock del producto con nombre: %s y cantidad solicitada: %s",
+                 product_name, requested_quantity)
 
     # Validación de cantidad solicitada
     if requested_quantity <= 0:
@@ -631,7 +732,7 @@ async def show_product_stock_by_name(query: Update.callback_query, product_name:
         reply_markup = InlineKeyboardMarkup(keyboard)
         await query.edit_message_text(text=response, reply_markup=reply_markup)
     except Exception as e:
-        logger.error(f"Error al buscar el stock del producto por nombre: {e}")
+        logger.error("Error al buscar el stock del producto por nombre: %s", e)
         await query.edit_message_text(text="Ocurrió un error al buscar el stock del producto.")
 
 
@@ -639,7 +740,7 @@ async def show_product_stock_by_name(query: Update.callback_query, product_name:
 async def show_product_stock_by_productname(query: Update.callback_query, product_name: str,
                                             product_quantity: Optional[int] = None) -> None:
     """Muestra el stock de un producto específico basado en su nombre."""
-    logger.info(f"Buscando el stock del producto con nombre: {product_name}")
+    logger.debug("Buscando el stock del producto con nombre: %s", product_name)
     try:
         products = await get_products_by_name(product_name)
 
@@ -669,14 +770,14 @@ async def show_product_stock_by_productname(query: Update.callback_query, produc
         reply_markup = InlineKeyboardMarkup(keyboard)
         await query.edit_message_text(text=response, reply_markup=reply_markup)
     except Exception as e:
-        logger.error(f"Error al buscar el stock del producto por nombre: {e}")
+        logger.error("Error al buscar el stock del producto por nombre: %s", e)
         await query.edit_message_text(text="Ocurrió un error al buscar el stock del producto.")
 
 
 # Consulta para obtener el precio por nombre de producto
 async def show_product_price_by_name(query: Update.callback_query, product_name: str) -> None:
     """Muestra el precio de un producto específico basado en su nombre."""
-    logger.info(f"Buscando el precio del producto con nombre: {product_name}")
+    logger.debug("Buscando el precio del producto con nombre: %s", product_name)
     try:
         products = await get_products_by_name(product_name)
 
@@ -697,6 +798,6 @@ async def show_product_price_by_name(query: Update.callback_query, product_name:
         reply_markup = InlineKeyboardMarkup(keyboard)
         await query.edit_message_text(text=response, reply_markup=reply_markup)
     except Exception as e:
-        logger.error(f"Error al buscar el precio del producto por nombre: {e}")
+        logger.error("Error al buscar el precio del producto por nombre: %s", e)
         await query.edit_message_text(text="Ocurrió un error al buscar el precio del producto.")
 
@@ -1,18 +1,120 @@
 # app/utils/logging_config.py
+"""Configuración de logging no bloqueante.
+
+Los handlers del bot sólo encolan los registros (``QueueHandler``); un ``QueueListener`` en otro hilo
+los formatea (JSON o texto) y los escribe, de modo que el event loop nunca espera a la consola.
+Cada registro lleva el bot, el ``chat_id`` y el ``update_id`` de la actualización que se está
+procesando y los mensajes DEBUG de alto volumen se muestrean.
+"""
+import atexit
+import contextvars
+import json
 import logging
+import logging.handlers
+import queue
+import random
+from datetime import datetime, timezone
 
+from app.config import settings
 
-def setup_logging():
-    logging.basicConfig(
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
-    )
-    logger = logging.getLogger(__name__)
-    logger.setLevel(logging.INFO)  # Asegurarse de que el nivel del logger esté configurado a INFO
+TEXT_FORMAT = ("%(asctime)s - %(name)s - %(levelname)s - [bot=%(bot)s chat=%(chat_id)s update=%(update_id)s] "
+               "%(message)s")
+
+# Identificadores de la actualización en curso (por tarea de asyncio)
+chat_id_var = contextvars.ContextVar("chat_id", default=None)
+update_id_var = contextvars.ContextVar("update_id", default=None)
+bot_var = contextvars.ContextVar("bot", default=None)
+
+_listener = None
+
+
+def set_log_context(chat_id=None, update_id=None, bot=None) -> None:
+    """Asocia los registros siguientes de la tarea actual a un bot, un chat y una actualización."""
+    chat_id_var.set(chat_id)
+    update_id_var.set(update_id)
+    bot_var.set(bot)
+
+
+class CorrelationFilter(logging.Filter):
+    """Añade ``bot``, ``chat_id`` y ``update_id`` al registro en el hilo que lo emite."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.bot = bot_var.get()
+        record.chat_id = chat_id_var.get()
+        record.update_id = update_id_var.get()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Deja pasar sólo una fracción de los registros DEBUG."""
+
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.sample_rate = sample_rate
 
-    # Asegurarse de que el logger tenga al menos un handler
-    if not logger.handlers:
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.sample_rate >= 1:
+            return True
+        return random.random() < self.sample_rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in ("bot", "chat_id", "update_id"):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        record.__dict__.setdefault("bot", None)
+        record.__dict__.setdefault("chat_id", None)
+        record.__dict__.setdefault("update_id", None)
+        return super().format(record)
+
+
+class _CorrelatedQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Sólo se resuelven aquí los argumentos del mensaje (podrían cambiar después); el formateo
+        # completo y la escritura ocurren en el hilo del QueueListener
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging():
+    global _listener
+    if _listener is None:
         handler = logging.StreamHandler()
-        handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
-        logger.addHandler(handler)
+        handler.setFormatter(JsonFormatter() if settings.log_format == "json" else _TextFormatter(TEXT_FORMAT))
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = _CorrelatedQueueHandler(log_queue)
+        queue_handler.addFilter(DebugSamplingFilter(settings.log_debug_sample_rate))
+        queue_handler.addFilter(CorrelationFilter())
 
+        root = logging.getLogger()
+        root.handlers = [queue_handler]
+        root.setLevel(settings.log_level)
+
+        _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+    logger = logging.getLogger(__name__)
     return logger
@@ -0,0 +1,154 @@
+"""Fotos de productos enviadas por ``file_id`` de Telegram.
+
+Cada imagen se sube una sola vez por bot: Telegram devuelve un ``file_id`` que se guarda en la tabla
+``TelegramFile`` y en memoria, y los envíos siguientes sólo mandan ese identificador (sin volver a
+transferir la imagen). Los ``file_id`` son propios de cada bot, por eso la clave es (bot, imagen).
+
+``warm_up_product_images`` sube en segundo plano las imágenes que aún no tienen ``file_id`` a
+``settings.media_cache_chat_id``, de modo que el primer usuario que abre un producto ya no espera la
+subida.
+"""
+import asyncio
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple, Union
+
+from sqlalchemy import select
+from telegram import Bot, InlineKeyboardMarkup
+from telegram.error import BadRequest
+
+from app.catalog import ProductRecord
+from app.catalog_reader import catalog_reader
+from app.config import settings
+from app.database import SessionLocal
+from app.models import TelegramFile
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def thumbnail_path(image: str) -> Path:
+    """Ruta de la miniatura de una imagen (la genera scripts/generate_product_thumbnails.py)."""
+    stem = re.sub(r"[^\w.-]+", "_", os.path.splitext(os.path.basename(image))[0]) or "image"
+    return Path(settings.product_thumbnails_dir) / f"{stem}.jpg"
+
+
+def image_source(image: str) -> Optional[Union[str, Path]]:
+    """Qué se sube para una imagen: su miniatura, el fichero local o una URL que descarga Telegram."""
+    thumbnail = thumbnail_path(image)
+    if thumbnail.is_file():
+        return thumbnail
+    if image.startswith(("http://", "https://")):
+        return image
+    if settings.product_images_dir:
+        local = Path(settings.product_images_dir) / image
+        if local.is_file():
+            return local
+    if settings.product_image_url:
+        return settings.product_image_url.format(image=image)
+    return None
+
+
+class FileIdCache:
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self._file_ids: Dict[Tuple[int, str], str] = {}
+        self._loaded: Set[int] = set()
+        self._lock = asyncio.Lock()
+
+    async def _load(self, bot_id: int) -> None:
+        async with self._lock:
+            if bot_id in self._loaded:
+                return
+            async with self.session_factory() as session:
+                rows = (await session.execute(
+                    select(TelegramFile.image, TelegramFile.fileId).where(TelegramFile.botId == bot_id))).all()
+            for image, file_id in rows:
+                self._file_ids[(bot_id, image)] = file_id
+            self._loaded.add(bot_id)
+            logger.info("Loaded %d cached Telegram file ids for bot %s", len(rows), bot_id)
+
+    async def get(self, bot_id: int, image: str) -> Optional[str]:
+        if bot_id not in self._loaded:
+            await self._load(bot_id)
+        return self._file_ids.get((bot_id, image))
+
+    async def missing(self, bot_id: int, images) -> Set[str]:
+        if bot_id not in self._loaded:
+            await self._load(bot_id)
+        return {image for image in images if (bot_id, image) not in self._file_ids}
+
+    async def store(self, bot_id: int, image: str, file_id: str) -> None:
+        self._file_ids[(bot_id, image)] = file_id
+        async with self.session_factory() as session:
+            async with session.begin():
+                await session.merge(TelegramFile(botId=bot_id, image=image, fileId=file_id))
+
+    def forget(self, bot_id: int, image: str) -> None:
+        # Un file_id rechazado se vuelve a subir; la fila se sobrescribe en el siguiente store()
+        self._file_ids.pop((bot_id, image), None)
+
+
+file_ids = FileIdCache(SessionLocal)
+
+
+async def _upload(bot: Bot, chat_id, image: str, **kwargs):
+    source = image_source(image)
+    if source is None:
+        return None
+    message = await bot.send_photo(chat_id=chat_id, photo=source, **kwargs)
+    # La última PhotoSize es la de mayor resolución
+    await file_ids.store(bot.id, image, message.photo[-1].file_id)
+    metrics.inc("telegram_photo_uploads_total")
+    return message
+
+
+async def send_product_photo(bot: Bot, chat_id: int, product: ProductRecord, caption: str,
+                             reply_markup: Optional[InlineKeyboardMarkup] = None) -> bool:
+    """Envía la foto del producto; devuelve False si el producto no tiene una imagen utilizable."""
+    if not product.image:
+        return False
+    file_id = await file_ids.get(bot.id, product.image)
+    if file_id:
+        try:
+            await bot.send_photo(chat_id=chat_id, photo=file_id, caption=caption, reply_markup=reply_markup)
+            metrics.inc("telegram_photo_cache_hits_total")
+            return True
+        except BadRequest as e:
+            logger.warning("Cached file id for %s rejected, uploading again: %s", product.image, e)
+            file_ids.forget(bot.id, product.image)
+
+    message = await _upload(bot, chat_id, product.image, caption=caption, reply_markup=reply_markup)
+    return message is not None
+
+
+async def upload_missing_images(bot: Bot, chat_id) -> int:
+    """Sube al chat de precarga las imágenes del catálogo sin file_id y borra los mensajes."""
+    images = {product.image for product in await catalog_reader.all_products() if product.image}
+    uploaded = 0
+    for image in sorted(await file_ids.missing(bot.id, images)):
+        try:
+            message = await _upload(bot, chat_id, image, disable_notification=True)
+        except BadRequest as e:
+            logger.warning("Could not upload product image %s: %s", image, e)
+            continue
+        if message is not None:
+            uploaded += 1
+            await message.delete()
+    return uploaded
+
+
+async def warm_up_product_images(bot: Bot, chat_id, interval: float) -> None:
+    """Tarea en segundo plano: cada ``interval`` segundos sube las imágenes nuevas del catálogo."""
+    while True:
+        try:
+            uploaded = await upload_missing_images(bot, chat_id)
+            if uploaded:
+                logger.info("Warmed up %d product images for bot %s", uploaded, bot.id)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Product image warm-up failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,124 @@
+"""Métricas en memoria del proceso del bot (contadores, gauges e histogramas simples).
+
+El bot escribe periódicamente una instantánea en JSON (``settings.metrics_file``) que la API de
+FastAPI expone en ``/metrics``, ya que ambos corren en procesos distintos.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores (en segundos) de los buckets de los histogramas
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted(labels.items()))
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def to_dict(self) -> dict:
+        bounds = [str(b) for b in self.buckets] + ["+Inf"]
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "buckets": dict(zip(bounds, self.counts)),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def snapshot(self) -> dict:
+        def flatten(items, convert=lambda v: v):
+            result = {}
+            for (name, labels), value in items:
+                result.setdefault(name, []).append({"labels": dict(labels), "value": convert(value)})
+            return result
+
+        with self._lock:
+            return {
+                "timestamp": time.time(),
+                "counters": flatten(self.counters.items()),
+                "gauges": flatten(self.gauges.items()),
+                "histograms": flatten(self.histograms.items(), Histogram.to_dict),
+            }
+
+
+registry = MetricsRegistry()
+inc = registry.inc
+set_gauge = registry.set_gauge
+observe = registry.observe
+snapshot = registry.snapshot
+
+
+def write_snapshot(path: str) -> None:
+    """Escribe la instantánea de forma atómica para que el lector nunca vea un archivo a medias."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+async def run_snapshot_writer(path: str, interval: float) -> None:
+    """Tarea de fondo que vuelca las métricas cada ``interval`` segundos."""
+    while True:
+        try:
+            write_snapshot(path)
+        except OSError as e:
+            logger.warning("Could not write metrics snapshot to %s: %s", path, e)
+        await asyncio.sleep(interval)
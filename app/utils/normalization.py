@@ -0,0 +1,68 @@
+"""Normalización de nombres de productos para las búsquedas.
+
+Equivale a la antigua cadena de ``re.sub`` de ``normalize_product_name`` pero en una sola pasada:
+tabla de ``str.translate`` para los acentos, un único patrón precompilado para artículos y plurales
+y memoización de las entradas repetidas. ``normalize_product_names`` normaliza el catálogo completo
+de una vez al cargarlo.
+"""
+import re
+from functools import lru_cache
+
+# Vocales acentuadas -> vocal simple (después de pasar a minúsculas)
+_ACCENTS_TABLE = str.maketrans({
+    **dict.fromkeys("áàäâ", "a"),
+    **dict.fromkeys("éèëê", "e"),
+    **dict.fromkeys("íìïî", "i"),
+    **dict.fromkeys("óòöô", "o"),
+    **dict.fromkeys("úùüû", "u"),
+})
+_INVALID_CHARS = re.compile(r'[^a-z0-9\s]')
+
+_ARTICLES = r'(?:el|la|los|las|una|un|unos|unas)'
+# Un artículo (con los espacios que lo siguen) o una palabra a la que quitar el plural
+_ARTICLE_OR_WORD = re.compile(rf'\b(?P<article>{_ARTICLES})\b\s*|\w+')
+# Igual, pero sin cruzar los saltos de línea que separan los nombres en el modo masivo
+_ARTICLE_OR_WORD_MULTILINE = re.compile(rf'\b(?P<article>{_ARTICLES})\b[^\S\n]*|\w+')
+
+
+def _singularize(match: re.Match) -> str:
+    if match.group("article"):
+        return ""
+    word = match.group(0)
+    # Pluralización simple ('limonadas' a 'limonada')
+    if len(word) >= 2 and word.endswith("s"):
+        word = word[:-1]
+        # Pluralización con 'es' sobre el resultado anterior, igual que la versión original
+        if len(word) >= 3 and word.endswith("es"):
+            word = word[:-2]
+    return word
+
+
+def fold_accents(text: str) -> str:
+    """Minúsculas y sin acentos, sin quitar signos ni espacios (para buscar alias en un mensaje)."""
+    return text.lower().translate(_ACCENTS_TABLE)
+
+
+def _clean(text: str) -> str:
+    return _INVALID_CHARS.sub("", text.lower().translate(_ACCENTS_TABLE))
+
+
+@lru_cache(maxsize=4096)
+def normalize_product_name(product_name: str) -> str:
+    """
+    Normaliza el nombre del producto para facilitar la búsqueda en la base de datos.
+    """
+    return _ARTICLE_OR_WORD.sub(_singularize, _clean(product_name)).strip()
+
+
+def normalize_product_names(product_names) -> list:
+    """Normaliza muchos nombres a la vez (p. ej. todo el catálogo al cargarlo).
+
+    Los nombres se unen en un único texto separado por saltos de línea para aplicar la tabla de
+    traducción y las expresiones regulares una sola vez en lugar de una vez por nombre.
+    """
+    names = [name.replace("\n", " ") for name in product_names]
+    if not names:
+        return []
+    joined = _ARTICLE_OR_WORD_MULTILINE.sub(_singularize, _clean("\n".join(names)))
+    return [name.strip() for name in joined.split("\n")]
@@ -0,0 +1,87 @@
+"""Presupuestos de consultas SQL por manejador.
+
+``QueryRecorder`` se engancha a los eventos ``before/after_cursor_execute`` de un engine (y a los
+``observers`` de ``CatalogReader``, cuyas sentencias preparadas no generan esos eventos) y cuenta y
+cronometra las sentencias ejecutadas mientras está activo. ``QueryBudget`` declara el máximo de
+consultas y de milisegundos que puede gastar una invocación de un manejador::
+
+    BUDGETS = {"show_categories": QueryBudget(max_queries=1, max_ms=5)}
+
+    with QueryRecorder(engine) as recorder:
+        await show_categories(query)
+    BUDGETS["show_categories"].check("show_categories", recorder)  # lanza BudgetExceeded
+
+Los eventos son globales al engine, así que el registro sólo es fiable si los manejadores medidos se
+ejecutan de uno en uno (como en las comprobaciones de ``scripts/check_query_budgets.py``).
+"""
+import time
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import event
+
+
+class QueryRecord(NamedTuple):
+    statement: str
+    duration: float
+
+
+class BudgetExceeded(AssertionError):
+    pass
+
+
+class QueryRecorder:
+    def __init__(self, engine, readers=()):
+        # Con un AsyncEngine los eventos se registran en el engine síncrono subyacente
+        self.engine = getattr(engine, "sync_engine", engine)
+        self.readers = readers
+        self.queries: List[QueryRecord] = []
+
+    def _record(self, statement, duration):
+        self.queries.append(QueryRecord(statement, duration))
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_budget_start", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_budget_start"].pop()
+        self._record(statement, time.perf_counter() - started)
+
+    def __enter__(self) -> "QueryRecorder":
+        event.listen(self.engine, "before_cursor_execute", self._before)
+        event.listen(self.engine, "after_cursor_execute", self._after)
+        for reader in self.readers:
+            reader.observers.append(self._record)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._before)
+        event.remove(self.engine, "after_cursor_execute", self._after)
+        for reader in self.readers:
+            reader.observers.remove(self._record)
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(query.duration for query in self.queries) * 1000
+
+
+class QueryBudget(NamedTuple):
+    max_queries: int
+    max_ms: Optional[float] = None
+
+    def violations(self, recorder: QueryRecorder, latency_scale: float = 1.0) -> List[str]:
+        problems = []
+        if recorder.count > self.max_queries:
+            problems.append(f"{recorder.count} consultas (máximo {self.max_queries})")
+        if self.max_ms is not None and recorder.total_ms > self.max_ms * latency_scale:
+            problems.append(f"{recorder.total_ms:.1f} ms en SQL (máximo {self.max_ms * latency_scale:g} ms)")
+        return problems
+
+    def check(self, name: str, recorder: QueryRecorder, latency_scale: float = 1.0) -> None:
+        problems = self.violations(recorder, latency_scale)
+        if problems:
+            statements = "\n".join(f"  {q.duration * 1000:7.2f} ms  {q.statement}" for q in recorder.queries)
+            raise BudgetExceeded(f"{name}: {'; '.join(problems)}\n{statements}")
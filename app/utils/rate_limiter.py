@@ -0,0 +1,286 @@
+"""Limitador de las llamadas salientes a la API de Telegram.
+
+Se registra con ``Application.builder().rate_limiter(...)`` para que todas las llamadas del bot
+(``reply_text``, ``edit_message_text``, ``delete_message``...) pasen por aquí:
+
+* cubos de tokens global y por chat para no alcanzar los límites de flood (429) de Telegram;
+* prioridad de las respuestas al usuario sobre las ediciones y de éstas sobre los borrados;
+* las ediciones pendientes de un mismo mensaje se fusionan y sólo se envía la última;
+* ``RetryAfter`` bloquea el cubo afectado y la petición se reintenta sin amplificar la carga;
+* las peticiones cuyo llamador se canceló mientras esperaban (p. ej. una respuesta de GPT descartada)
+  se descartan sin enviarse;
+* métricas del tiempo de espera en cola por prioridad.
+"""
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Callable, Coroutine, Dict, Optional
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_REPLY = 0
+PRIORITY_EDIT = 1
+PRIORITY_CLEANUP = 2
+PRIORITY_NAMES = {PRIORITY_REPLY: "reply", PRIORITY_EDIT: "edit", PRIORITY_CLEANUP: "cleanup"}
+
+EDIT_ENDPOINTS = {"editMessageText", "editMessageReplyMarkup", "editMessageCaption", "editMessageMedia"}
+CLEANUP_ENDPOINTS = {"deleteMessage", "deleteMessages"}
+# Llamadas sin destinatario en un chat que no cuentan para los límites de Telegram
+UNLIMITED_ENDPOINTS = {"getMe", "getUpdates", "setWebhook", "deleteWebhook", "getWebhookInfo", "logOut", "close"}
+
+# Cada cuántas vueltas del despachador se purgan los cubos de chats inactivos
+_PRUNE_EVERY = 1000
+
+
+class TokenBucket:
+    """Cubo de tokens que se recarga a ``rate`` tokens por segundo hasta ``capacity``."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at", "blocked_until")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def time_until_available(self, tokens: float = 1) -> float:
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < tokens:
+            wait = max(wait, (tokens - self.tokens) / self.rate)
+        return wait
+
+    def try_consume(self, tokens: float = 1) -> bool:
+        if self.time_until_available(tokens) > 0:
+            return False
+        self.tokens -= tokens
+        return True
+
+    def block_for(self, seconds: float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def is_idle(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity and self.blocked_until <= time.monotonic()
+
+
+class _PendingRequest:
+    __slots__ = ("priority", "seq", "chat_id", "endpoint", "callback", "args", "kwargs", "future",
+                 "enqueued_at", "retries", "coalesce_key")
+
+    def __init__(self, priority, seq, chat_id, endpoint, callback, args, kwargs, coalesce_key):
+        self.priority = priority
+        self.seq = seq
+        self.chat_id = chat_id
+        self.endpoint = endpoint
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+        self.retries = 0
+        self.coalesce_key = coalesce_key
+
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    return retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+
+
+class OutboundRateLimiter(BaseRateLimiter):
+    def __init__(self, global_rate: float = 30.0, chat_rate: float = 1.0, chat_burst: float = 3.0,
+                 group_rate: float = 20 / 60, max_retries: int = 2, bot_label: str = "default"):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.bot_label = bot_label
+        self._chat_buckets: Dict[Any, TokenBucket] = {}
+        self._pending = []
+        self._pending_edits: Dict[tuple, _PendingRequest] = {}
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._in_flight = set()
+
+    async def initialize(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    async def shutdown(self) -> None:
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        for request in self._pending:
+            if not request.future.done():
+                request.future.cancel()
+        self._pending.clear()
+        self._pending_edits.clear()
+
+    async def process_request(self, callback: Callable[..., Coroutine[Any, Any, Any]], args: Any,
+                              kwargs: Dict[str, Any], endpoint: str, data: Dict[str, Any],
+                              rate_limit_args: Optional[Any]) -> Any:
+        if endpoint in UNLIMITED_ENDPOINTS or self._dispatcher is None:
+            return await callback(*args, **kwargs)
+
+        chat_id = data.get("chat_id")
+        if endpoint in CLEANUP_ENDPOINTS:
+            priority = PRIORITY_CLEANUP
+        elif endpoint in EDIT_ENDPOINTS:
+            priority = PRIORITY_EDIT
+        else:
+            priority = PRIORITY_REPLY
+
+        coalesce_key = None
+        if endpoint in EDIT_ENDPOINTS:
+            message_key = data.get("inline_message_id") or (chat_id, data.get("message_id"))
+            coalesce_key = (endpoint, message_key)
+            pending = self._pending_edits.get(coalesce_key)
+            if pending is not None and not pending.future.done():
+                # La edición anterior aún no se ha enviado: sólo importa la última versión del mensaje
+                pending.args, pending.kwargs, pending.callback = args, kwargs, callback
+                metrics.inc("telegram_outbound_coalesced_total", endpoint=endpoint, bot=self.bot_label)
+                return await asyncio.shield(pending.future)
+
+        request = _PendingRequest(priority, next(self._seq), chat_id, endpoint, callback, args, kwargs,
+                                  coalesce_key)
+        self._enqueue(request)
+        return await request.future
+
+    def _enqueue(self, request: _PendingRequest) -> None:
+        self._pending.append(request)
+        if request.coalesce_key is not None:
+            self._pending_edits[request.coalesce_key] = request
+        metrics.set_gauge("telegram_outbound_queue_size", len(self._pending), bot=self.bot_label)
+        self._wakeup.set()
+
+    def _chat_bucket(self, chat_id) -> Optional[TokenBucket]:
+        if chat_id is None:
+            return None
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            is_group = isinstance(chat_id, str) or int(chat_id) < 0
+            rate = self.group_rate if is_group else self.chat_rate
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate, self.chat_burst)
+        return bucket
+
+    def _drop_abandoned(self) -> None:
+        """Saca de la cola las peticiones cuyo llamador ya no espera la respuesta (futuro cancelado)."""
+        abandoned = [request for request in self._pending if request.future.done()]
+        for request in abandoned:
+            self._pending.remove(request)
+            if request.coalesce_key is not None and self._pending_edits.get(request.coalesce_key) is request:
+                del self._pending_edits[request.coalesce_key]
+            metrics.inc("telegram_outbound_abandoned_total", endpoint=request.endpoint, bot=self.bot_label)
+        if abandoned:
+            metrics.set_gauge("telegram_outbound_queue_size", len(self._pending), bot=self.bot_label)
+
+    def _next_ready(self):
+        """Devuelve la petición de mayor prioridad cuyo chat tiene tokens, o el tiempo a esperar."""
+        min_wait = None
+        for request in sorted(self._pending, key=lambda r: (r.priority, r.seq)):
+            bucket = self._chat_bucket(request.chat_id)
+            wait = bucket.time_until_available() if bucket else 0.0
+            if wait <= 0:
+                return request, 0.0
+            min_wait = wait if min_wait is None else min(min_wait, wait)
+        return None, min_wait
+
+    async def _dispatch_loop(self) -> None:
+        for iteration in itertools.count(1):
+            try:
+                await self._dispatch_next()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # El despachador nunca debe morir: dejaría colgadas todas las llamadas
+                logger.exception("Unexpected error in the outbound dispatcher: %s", e)
+                await asyncio.sleep(0.1)
+            if iteration % _PRUNE_EVERY == 0:
+                self._prune_chat_buckets()
+
+    async def _dispatch_next(self) -> None:
+        self._drop_abandoned()
+        if not self._pending:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+            return
+
+        global_wait = self.global_bucket.time_until_available()
+        if global_wait > 0:
+            await asyncio.sleep(global_wait)
+            return
+
+        request, wait = self._next_ready()
+        if request is None:
+            # Todos los chats con peticiones pendientes están limitados: esperar al primero o a una nueva
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+            return
+
+        self._pending.remove(request)
+        if request.coalesce_key is not None and self._pending_edits.get(request.coalesce_key) is request:
+            del self._pending_edits[request.coalesce_key]
+        self.global_bucket.try_consume()
+        bucket = self._chat_bucket(request.chat_id)
+        if bucket:
+            bucket.try_consume()
+
+        metrics.set_gauge("telegram_outbound_queue_size", len(self._pending), bot=self.bot_label)
+        metrics.observe("telegram_outbound_queue_wait_seconds", time.monotonic() - request.enqueued_at,
+                        priority=PRIORITY_NAMES[request.priority], bot=self.bot_label)
+        task = asyncio.create_task(self._execute(request))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _execute(self, request: _PendingRequest) -> None:
+        if request.future.done():  # Cancelada entre el despacho y el arranque de la tarea
+            metrics.inc("telegram_outbound_abandoned_total", endpoint=request.endpoint, bot=self.bot_label)
+            return
+        try:
+            result = await request.callback(*request.args, **request.kwargs)
+        except RetryAfter as e:
+            retry_after = _retry_after_seconds(e)
+            metrics.inc("telegram_outbound_retry_after_total", endpoint=request.endpoint, bot=self.bot_label)
+            bucket = self._chat_bucket(request.chat_id)
+            (bucket or self.global_bucket).block_for(retry_after)
+            if request.future.done():
+                return
+            if request.retries >= self.max_retries:
+                request.future.set_exception(e)
+                return
+            logger.warning("Flood limit on %s for chat %s, retrying in %.1f s",
+                           request.endpoint, request.chat_id, retry_after)
+            request.retries += 1
+            request.enqueued_at = time.monotonic()
+            self._enqueue(request)
+        except Exception as e:
+            if not request.future.done():
+                request.future.set_exception(e)
+        else:
+            if not request.future.done():
+                request.future.set_result(result)
+
+    def _prune_chat_buckets(self) -> None:
+        active = {request.chat_id for request in self._pending}
+        for chat_id in [c for c, bucket in self._chat_buckets.items() if c not in active and bucket.is_idle()]:
+            del self._chat_buckets[chat_id]
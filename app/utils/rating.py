@@ -1,20 +1,14 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from telegram import Update
 from telegram.error import BadRequest
 from telegram.ext import ContextTypes
-from sqlalchemy.orm import sessionmaker
 import logging
 
-from app.config import settings
+from app.database import SessionLocal
 from app.models import Recommendation
 
 # Configurar el logger
 logger = logging.getLogger(__name__)
 
-# Configurar la base de datos
-engine = create_async_engine(settings.database_url, echo=True, future=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=AsyncSession)
-
 
 async def handle_rating(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if update.callback_query:
@@ -64,10 +58,10 @@ async def handle_comment(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                 )
                 session.add(new_recommendation)
                 await session.commit()
-                logger.info(f"Recomendación guardada exitosamente para el usuario {username}")
+                logger.info("Recomendación guardada exitosamente para el usuario %s", username)
             except Exception as e:
                 await session.rollback()
-                logger.error(f"Error al guardar la recomendación en la base de datos: {e}")
+                logger.error("Error al guardar la recomendación en la base de datos: %s", e)
                 await update.message.reply_text(
                     "Lo siento, hubo un error al guardar tu calificación. Inténtalo más tarde.")
 
@@ -82,16 +76,14 @@ async def handle_comment(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
 
 async def exit_chat(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    from app.telegram_bot import greeting_messages
     chat_id = update.message.chat_id
 
     context.chat_data["session_closed"] = True
 
     # Borrar los mensajes de saludo y el teclado
-    if chat_id in greeting_messages:
-        greeting_message_id = greeting_messages[chat_id]["greeting_message_id"]
+    greeting_message_id = context.chat_data.pop("greeting_message_id", None)
+    if greeting_message_id is not None:
         await context.bot.delete_message(chat_id=chat_id, message_id=greeting_message_id)
-        del greeting_messages[chat_id]
 
     if "conversation_history" in context.chat_data:
         for message in context.chat_data["conversation_history"]:
@@ -100,9 +92,9 @@ async def exit_chat(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
                 try:
                     await context.bot.delete_message(chat_id=chat_id, message_id=message_id)
                 except BadRequest as e:
-                    logger.warning(f"Could not delete message {message_id}: {e}")
+                    logger.warning("Could not delete message %s: %s", message_id, e)
             else:
-                logger.warning(f"Message identifier is not specified for message: {message}")
+                logger.warning("Message identifier is not specified for message: %s", message)
         del context.chat_data["conversation_history"]
 
     await update.message.reply_text(
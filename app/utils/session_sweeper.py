@@ -0,0 +1,124 @@
+"""Caducidad de las sesiones abandonadas.
+
+Una sesión sólo se cierra cuando el usuario sale (calificación o ``exit_chat``); si deja de escribir,
+su ``chat_data`` (historial de la conversación, id del saludo...) y su ``user_data`` (esperando
+calificación, etc.) se quedarían en memoria para siempre. Cada ``settings.session_sweep_interval``
+segundos se eliminan los datos de los chats y usuarios sin actividad en ``settings.session_idle_ttl``
+segundos: la sesión queda cerrada, como si hubiera salido, y el próximo mensaje pide ``/start``. Con
+``settings.session_sweep_delete_messages`` también se borran en segundo plano sus mensajes, igual que
+al salir (con la prioridad más baja del limitador de salida).
+
+Publica ``active_sessions{bot}`` (sesiones abiertas), ``session_state_bytes{bot}`` (memoria
+aproximada de todos los ``chat_data`` y ``user_data``) y ``session_state_bytes_per_session{bot}``.
+"""
+import asyncio
+import logging
+import sys
+import time
+from typing import Iterable, List
+
+from telegram.error import TelegramError
+from telegram.ext import Application
+
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Clave con el instante (time.monotonic) de la última actualización del chat o del usuario
+LAST_ACTIVITY_KEY = "last_activity"
+
+# Tareas de borrado en curso (se guarda la referencia para que no las recoja el recolector de basura)
+_deletions = set()
+
+
+def touch(data: dict) -> None:
+    """Marca actividad en un ``chat_data`` o ``user_data``."""
+    data[LAST_ACTIVITY_KEY] = time.monotonic()
+
+
+def deep_size(value, _seen=None) -> int:
+    """Tamaño aproximado en bytes de un valor y de todo lo que contiene."""
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in value)
+    return size
+
+
+def session_message_ids(chat_data: dict) -> List[int]:
+    """Mensajes que ``exit_chat`` borraría: el saludo y los del historial."""
+    ids = [chat_data.get("greeting_message_id")]
+    ids += [message.get("message_id") for message in chat_data.get("conversation_history", ())]
+    return [message_id for message_id in ids if message_id is not None]
+
+
+async def _delete_messages(bot, chat_id: int, message_ids: Iterable[int], bot_label: str) -> None:
+    for message_id in message_ids:
+        try:
+            await bot.delete_message(chat_id=chat_id, message_id=message_id)
+            metrics.inc("session_messages_deleted_total", bot=bot_label)
+        except TelegramError as e:  # Telegram no deja borrar mensajes de más de 48 h
+            logger.debug("Could not delete message %s of expired session %s: %s", message_id, chat_id, e)
+
+
+def _is_busy(chat_data: dict) -> bool:
+    # Una ráfaga de mensajes pendiente o en curso (app.GPT.coalescing) cuenta como actividad
+    return bool(chat_data.get("pending_messages")) or "message_in_flight" in chat_data
+
+
+def sweep(application: Application, idle_ttl: float, delete_messages: bool) -> int:
+    """Elimina los datos de los chats y usuarios inactivos; devuelve cuántas sesiones se cerraron."""
+    bot_label = application.bot_data["bot_config"].label
+    now = time.monotonic()
+    expired_sessions = 0
+    active_sessions = 0
+    total_bytes = 0
+
+    for chat_id, chat_data in list(application.chat_data.items()):
+        last_activity = chat_data.setdefault(LAST_ACTIVITY_KEY, now)
+        if now - last_activity < idle_ttl or _is_busy(chat_data):
+            if not chat_data.get("session_closed", True):
+                active_sessions += 1
+            total_bytes += deep_size(chat_data)
+            continue
+        if not chat_data.get("session_closed", True):
+            expired_sessions += 1
+            if delete_messages:
+                message_ids = session_message_ids(chat_data)
+                if message_ids:
+                    task = asyncio.create_task(_delete_messages(application.bot, chat_id, message_ids, bot_label))
+                    _deletions.add(task)
+                    task.add_done_callback(_deletions.discard)
+        application.drop_chat_data(chat_id)
+
+    for user_id, user_data in list(application.user_data.items()):
+        last_activity = user_data.setdefault(LAST_ACTIVITY_KEY, now)
+        if now - last_activity < idle_ttl:
+            total_bytes += deep_size(user_data)
+            continue
+        application.drop_user_data(user_id)
+
+    if expired_sessions:
+        metrics.inc("sessions_expired_total", expired_sessions, bot=bot_label)
+        logger.info("Expired %d idle sessions", expired_sessions)
+    metrics.set_gauge("active_sessions", active_sessions, bot=bot_label)
+    metrics.set_gauge("session_state_bytes", total_bytes, bot=bot_label)
+    sessions = len(application.chat_data)
+    metrics.set_gauge("session_state_bytes_per_session", total_bytes / sessions if sessions else 0, bot=bot_label)
+    return expired_sessions
+
+
+async def run_session_sweeper(application: Application, idle_ttl: float, interval: float,
+                              delete_messages: bool) -> None:
+    """Tarea de fondo: ``sweep`` cada ``interval`` segundos."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            sweep(application, idle_ttl, delete_messages)
+        except Exception as e:  # Un fallo puntual no debe detener la limpieza
+            logger.error("Session sweep failed: %r", e)
@@ -0,0 +1,116 @@
+"""Benchmark HTTP de los endpoints de la API (``/``, ``/metrics`` y ``/health``).
+
+Lanza ``--concurrency`` clientes que repiten peticiones durante ``--duration`` segundos sobre
+conexiones keep-alive y muestra, por endpoint, peticiones por segundo, errores y latencias
+(p50/p95/p99). Contra un servidor ya en marcha::
+
+    python scripts/bench_api.py --url http://127.0.0.1:8085 --concurrency 64 --duration 15
+
+O arrancando la API en el modo indicado (``settings.api_mode``) para comparar ambos::
+
+    python scripts/bench_api.py --serve production --port 8095
+    python scripts/bench_api.py --serve development --port 8095
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+DEFAULT_ENDPOINTS = ["/", "/metrics", "/health"]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def worker(client: httpx.AsyncClient, path: str, deadline: float, latencies: List[float],
+                 errors: Dict[str, int]) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 500:
+                errors[path] = errors.get(path, 0) + 1
+        except httpx.HTTPError:
+            errors[path] = errors.get(path, 0) + 1
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+async def bench(url: str, endpoints: List[str], concurrency: int, duration: float) -> None:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=10) as client:
+        print(f"{'endpoint':<12} {'req/s':>9} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for path in endpoints:
+            await client.get(path)  # Abrir conexiones y calentar el endpoint
+            latencies: List[float] = []
+            errors: Dict[str, int] = {}
+            started = time.perf_counter()
+            deadline = started + duration
+            await asyncio.gather(*(worker(client, path, deadline, latencies, errors) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+            if not latencies:
+                print(f"{path:<12} {'-':>9} {errors.get(path, 0):>7}")
+                continue
+            print(f"{path:<12} {len(latencies) / elapsed:>9.0f} {errors.get(path, 0):>7} "
+                  f"{statistics.median(latencies) * 1000:>8.2f} {percentile(latencies, 0.95) * 1000:>8.2f} "
+                  f"{percentile(latencies, 0.99) * 1000:>8.2f}")
+
+
+def serve(mode: str, port: int) -> subprocess.Popen:
+    env = {**os.environ, "API_MODE": mode, "API_PORT": str(port), "API_HOST": "127.0.0.1"}
+    return subprocess.Popen([sys.executable, "-c", "from app.start_fastapi import start_fastapi; start_fastapi()"],
+                            cwd=ROOT, env=env)
+
+
+async def wait_until_up(url: str, timeout: float = 30) -> None:
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while True:
+            try:
+                await client.get("/")
+                return
+            except httpx.HTTPError:
+                if time.perf_counter() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
+
+async def main_async(args, server: Optional[subprocess.Popen]) -> None:
+    if server is not None:
+        await wait_until_up(args.url)
+    await bench(args.url, args.endpoints, args.concurrency, args.duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="URL base de la API (por defecto la del servidor que se arranca)")
+    parser.add_argument("--serve", choices=["production", "development"],
+                        help="Arrancar la API en este modo durante el benchmark")
+    parser.add_argument("--port", type=int, default=8095, help="Puerto de la API arrancada con --serve")
+    parser.add_argument("--endpoints", nargs="+", default=DEFAULT_ENDPOINTS)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos por endpoint")
+    args = parser.parse_args()
+    if args.url is None:
+        args.url = f"http://127.0.0.1:{args.port}" if args.serve else "http://127.0.0.1:8085"
+
+    server = serve(args.serve, args.port) if args.serve else None
+    try:
+        asyncio.run(main_async(args, server))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compara el rendimiento de la normalización de nombres antigua (ocho ``re.sub``) con la actual.
+
+Uso::
+
+    python -m scripts.bench_normalize [--names 10000] [--repeat 5]
+"""
+import argparse
+import random
+import re
+import time
+
+from app.utils.normalization import normalize_product_name, normalize_product_names
+
+WORDS = ["Limonada", "Jugo", "de", "Naranja", "Piña", "Café", "con", "Leche", "Té", "Helado", "Sopa", "Pollo",
+         "Arroz", "Menestra", "las", "los", "Empanadas", "Queso", "Batido", "Fresas", "Agua", "Gaseosa", "Tostadas"]
+
+
+def legacy_normalize_product_name(product_name):
+    """Implementación anterior, copiada de ``gpt_integration`` como referencia."""
+    product_name = product_name.lower()
+    product_name = re.sub(r'[áàäâ]', 'a', product_name)
+    product_name = re.sub(r'[éèëê]', 'e', product_name)
+    product_name = re.sub(r'[íìïî]', 'i', product_name)
+    product_name = re.sub(r'[óòöô]', 'o', product_name)
+    product_name = re.sub(r'[úùüû]', 'u', product_name)
+    product_name = re.sub(r'[^a-z0-9\s]', '', product_name)
+    product_name = re.sub(r'\b(el|la|los|las|una|un|unos|unas)\b\s*', '', product_name)
+    product_name = re.sub(r'(\w+)s\b', r'\1', product_name)
+    product_name = re.sub(r'(\w+)es\b', r'\1', product_name)
+    return product_name.strip()
+
+
+def _throughput(func, names, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(names)
+        best = min(best, time.perf_counter() - start)
+    return len(names) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    names = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))) for _ in range(args.names)]
+    expected = [legacy_normalize_product_name(name) for name in names]
+    assert [normalize_product_name.__wrapped__(name) for name in names] == expected
+    assert normalize_product_names(names) == expected
+
+    def uncached(batch):
+        return [normalize_product_name.__wrapped__(name) for name in batch]
+
+    def cached(batch):
+        return [normalize_product_name(name) for name in batch]
+
+    results = [
+        ("legacy (8 x re.sub)", _throughput(lambda b: [legacy_normalize_product_name(n) for n in b], names,
+                                            args.repeat)),
+        ("single pass", _throughput(uncached, names, args.repeat)),
+        ("single pass + LRU", _throughput(cached, names, args.repeat)),
+        ("bulk (catalog load)", _throughput(normalize_product_names, names, args.repeat)),
+    ]
+    baseline = results[0][1]
+    print(f"{args.names} nombres, mejor de {args.repeat} repeticiones")
+    for label, rate in results:
+        print(f"{label:<22} {rate:>12,.0f} nombres/s  x{rate / baseline:.1f}")
+
+
+if __name__ == "__main__":
+    main()
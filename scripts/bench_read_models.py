@@ -0,0 +1,81 @@
+"""Compara la carga de productos como instancias del ORM con los registros de ``app.catalog``.
+
+Usa una base SQLite en memoria (síncrona) con el esquema de ``app.models`` y mide, por cada
+``--products`` productos, el tiempo de hidratación (mejor de ``--repeat``) y la memoria retenida
+mientras los resultados siguen vivos (``tracemalloc``).
+
+Uso::
+
+    python -m scripts.bench_read_models [--products 10000] [--repeat 5]
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.catalog import ProductRecord, select_products
+from app.models import Base, Category, Product
+
+
+def load_orm(session):
+    return session.execute(select(Product)).scalars().all()
+
+
+def load_records(session):
+    return [ProductRecord(*row) for row in session.execute(select_products()).all()]
+
+
+def _best_time(func, engine, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        with Session(engine) as session:
+            start = time.perf_counter()
+            func(session)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _retained_memory(func, engine):
+    gc.collect()
+    with Session(engine) as session:
+        tracemalloc.start()
+        result = func(session)
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+    return retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(insert(Category), [{"id": i, "name": f"Categoria {i}", "slug": f"categoria-{i}"}
+                                        for i in range(1, 11)])
+        conn.execute(insert(Product), [
+            {"id": i, "name": f"Producto {i}", "price": Decimal(rng.randint(50, 2000)) / 100,
+             "stock": rng.randint(0, 100), "categoryId": 1 + i % 10}
+            for i in range(1, args.products + 1)
+        ])
+
+    print(f"{args.products} productos, mejor de {args.repeat} repeticiones")
+    for label, func in (("ORM (Product)", load_orm), ("Core + ProductRecord", load_records)):
+        seconds = _best_time(func, engine, args.repeat)
+        retained = _retained_memory(func, engine)
+        print(f"{label:<22} {seconds * 1000:>8.1f} ms  {retained / 1024:>8.0f} KiB  "
+              f"{retained / args.products:>6.0f} B/producto")
+
+
+if __name__ == "__main__":
+    main()
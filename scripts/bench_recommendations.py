@@ -0,0 +1,83 @@
+"""Mide la latencia de ``MealRecommender.combos`` con un catálogo sintético en memoria.
+
+Comprueba además, con un menú pequeño, que el resultado coincide con la enumeración exhaustiva.
+
+Uso::
+
+    python -m scripts.bench_recommendations [--products 10000] [--queries 2000] [--limit 5]
+"""
+import argparse
+import itertools
+import random
+import time
+from decimal import Decimal
+
+from app.catalog import CategoryRecord, ProductRecord
+from app.recommendations import DEFAULT_MEAL, MealRecommender
+
+CATEGORIES = [CategoryRecord(i, name, None) for i, name in
+              enumerate(["Bebidas", "Bebidas Deportivas", "Desayunos", "Entradas", "Segundos", "Snacks"], start=1)]
+# Rango de precios (en centavos) por categoría
+PRICE_RANGES = {"Bebidas": (50, 300), "Entradas": (100, 400), "Segundos": (200, 800)}
+
+
+def synthetic_catalog(size: int, rng: random.Random):
+    products = []
+    for product_id in range(1, size + 1):
+        category = rng.choice(CATEGORIES)
+        low, high = PRICE_RANGES.get(category.name, (50, 500))
+        stock = None if category.name in ("Entradas", "Segundos") else rng.randint(0, 50)
+        products.append(ProductRecord(product_id, f"Producto {product_id}", Decimal(rng.randint(low, high)) / 100,
+                                      stock, category.id, None))
+    return products
+
+
+def brute_force(recommender: MealRecommender, budget, limit):
+    tables = [recommender._courses[course][1] for course in DEFAULT_MEAL]
+    best_by_starter = {}
+    for combo in itertools.product(*tables):
+        total = sum(p.price for p in combo)
+        if total <= budget and total > best_by_starter.get(combo[0].id, -1):
+            best_by_starter[combo[0].id] = total
+    return sorted(best_by_starter.values(), reverse=True)[:limit]
+
+
+def check(rng: random.Random, limit: int) -> None:
+    recommender = MealRecommender(synthetic_catalog(60, rng), CATEGORIES)
+    for _ in range(200):
+        budget = Decimal(rng.randint(300, 1500)) / 100
+        got = [combo.total for combo in recommender.combos(budget, limit=limit)]
+        assert got == brute_force(recommender, budget, limit), (budget, got)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    check(rng, args.limit)
+
+    products = synthetic_catalog(args.products, rng)
+    start = time.perf_counter()
+    recommender = MealRecommender(products, CATEGORIES)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    budgets = [Decimal(rng.randint(200, 2000)) / 100 for _ in range(args.queries)]
+    timings = []
+    for budget in budgets:
+        start = time.perf_counter()
+        recommender.combos(budget, limit=args.limit)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+
+    print(f"{args.products} productos ({len(recommender)} disponibles), construcción {build_ms:.1f} ms")
+    print(f"{args.queries} consultas, top {args.limit}: "
+          f"p50 {timings[len(timings) // 2]:.3f} ms  p99 {timings[int(len(timings) * 0.99)]:.3f} ms  "
+          f"máx {timings[-1]:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
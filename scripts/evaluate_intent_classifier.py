@@ -0,0 +1,148 @@
+"""Evalúa la precisión y la latencia del clasificador local de intenciones.
+
+Genera variantes con errores de escritura ("near-misses") de los ejemplos de entrenamiento,
+mide cuántas se clasifican correctamente y cuántas preguntas ajenas al menú se desvían por error
+(falsos positivos que nunca llegarían a GPT), y escribe un informe en Markdown.
+
+Uso::
+
+    python -m scripts.evaluate_intent_classifier [--model app/GPT/intent_model.json] [--report docs/...]
+"""
+import argparse
+import random
+import re
+import statistics
+import time
+
+from app.GPT.intent_classifier import load_intent_classifier, prepare_text
+from app.GPT.patterns import INTENT_PATTERNS, PRODUCT_BY_NAME_CATEGORY_PATTERNS
+from app.utils.aliases import alias_registry
+from scripts.train_intent_classifier import DEFAULT_MODEL_PATH, build_examples
+
+DEFAULT_REPORT_PATH = "docs/intent_classifier_eval.md"
+THRESHOLDS = (0.25, 0.3, 0.35, 0.4, 0.5, 0.6)
+SEED = 7
+
+# Preguntas que no corresponden a ninguna intención del menú y deben seguir llegando a GPT
+OFF_TOPIC_MESSAGES = [
+    "a qué hora abren", "dónde están ubicados", "cómo te llamas", "tienen wifi gratis",
+    "puedo pagar con tarjeta", "aceptan transferencias", "cuál es el horario de atención",
+    "hacen entregas a domicilio", "quién te creó", "eres un robot", "cuéntame un chiste",
+    "qué día es hoy", "necesito la factura", "puedo reservar una mesa", "tienen estacionamiento",
+    "el pedido llegó frío", "quiero hablar con una persona", "cuál es su número de teléfono",
+    "mi pedido no ha llegado", "cómo cancelo mi orden", "trabajan los domingos",
+    "hay descuento para estudiantes", "cuánto tarda el envío", "me equivoqué de pedido",
+]
+FILLERS = ["oye", "por favor", "disculpa", "hola", "una pregunta"]
+
+
+def _typo(word: str, rng: random.Random) -> str:
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.choice(("drop", "swap", "double", "replace"))
+    if kind == "drop":
+        return word[:i] + word[i + 1:]
+    if kind == "swap":
+        return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+    if kind == "double":
+        return word[:i] + word[i] + word[i:]
+    return word[:i] + rng.choice("aeiourslnm") + word[i + 1:]
+
+
+def perturb(text: str, rng: random.Random) -> str:
+    """Introduce uno o dos errores de escritura y, a veces, palabras de relleno."""
+    words = text.split()
+    for _ in range(rng.choice((1, 1, 2))):
+        i = rng.randrange(len(words))
+        words[i] = _typo(words[i], rng)
+    if rng.random() < 0.3:
+        words.insert(0, rng.choice(FILLERS))
+    return " ".join(words)
+
+
+def _matches_regex(text: str) -> bool:
+    patterns = [p for group in INTENT_PATTERNS.values() for p in group] + PRODUCT_BY_NAME_CATEGORY_PATTERNS
+    return any(re.search(p, text) for p in patterns) or alias_registry.find_category(text) is not None
+
+
+def evaluate(classifier, examples, threshold):
+    correct = answered = 0
+    for text, label, payload in examples:
+        prediction = classifier.predict(text, threshold)
+        if prediction:
+            answered += 1
+            correct += (prediction.label, prediction.payload) == (label, payload)
+    false_positives = sum(1 for text in OFF_TOPIC_MESSAGES if classifier.predict(text, threshold))
+    return correct, answered, false_positives
+
+
+def measure_latency(classifier, texts, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            classifier.predict(text)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50": statistics.median(timings),
+        "p95": timings[int(len(timings) * 0.95)],
+        "p99": timings[int(len(timings) * 0.99)],
+        "max": timings[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--report", default=DEFAULT_REPORT_PATH)
+    args = parser.parse_args()
+
+    classifier = load_intent_classifier(args.model)
+    if classifier is None:
+        raise SystemExit(f"No se pudo cargar el modelo {args.model}")
+
+    rng = random.Random(SEED)
+    categories = sorted({payload for label, payload, _ in classifier.classes if label == "category"})
+    products = sorted(payload for label, payload, _ in classifier.classes if label == "product")
+    base = build_examples(categories, products)
+    perturbed = [(perturb(text, rng), label, payload) for text, label, payload in base]
+    near_misses = [item for item in perturbed if not _matches_regex(prepare_text(item[0]))]
+
+    lines = [
+        "# Evaluación del clasificador local de intenciones",
+        "",
+        f"Modelo: `{args.model}` ({len(classifier.classes)} clases, de ellas {len(products)} productos del "
+        f"catálogo; {len(classifier.idf)} n-gramas).",
+        f"Conjunto: {len(perturbed)} variantes con errores de escritura de los ejemplos de entrenamiento, "
+        f"de las cuales {len(near_misses)} ya no coinciden con ninguna expresión regular (near-misses); "
+        f"{len(OFF_TOPIC_MESSAGES)} preguntas ajenas al menú para medir falsos positivos.",
+        "",
+        "| Umbral | Precisión (respondidas) | Cobertura near-misses | Acierto near-misses | Falsos positivos |",
+        "|---|---|---|---|---|",
+    ]
+    for threshold in THRESHOLDS:
+        correct, answered, _ = evaluate(classifier, perturbed, threshold)
+        nm_correct, nm_answered, false_positives = evaluate(classifier, near_misses, threshold)
+        lines.append(
+            f"| {threshold:.2f} | {correct / max(answered, 1):.1%} | {nm_answered / max(len(near_misses), 1):.1%} | "
+            f"{nm_correct / max(len(near_misses), 1):.1%} | {false_positives}/{len(OFF_TOPIC_MESSAGES)} |"
+        )
+
+    latency = measure_latency(classifier, [text for text, _, _ in perturbed] + OFF_TOPIC_MESSAGES)
+    lines += [
+        "",
+        f"Latencia por mensaje (umbral del modelo {classifier.threshold}): "
+        f"p50 {latency['p50']:.3f} ms, p95 {latency['p95']:.3f} ms, p99 {latency['p99']:.3f} ms, "
+        f"máx. {latency['max']:.3f} ms.",
+        "",
+    ]
+    report = "\n".join(lines)
+    with open(args.report, "w", encoding="utf-8") as f:
+        f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
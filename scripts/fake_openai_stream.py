@@ -0,0 +1,107 @@
+"""Endpoint local que imita ``/v1/chat/completions`` en modo streaming, para probar las respuestas progresivas.
+
+Uso::
+
+    python -m scripts.fake_openai_stream serve [--port 8099] [--delay 0.05]
+    OPENAI_API_BASE=http://127.0.0.1:8099/v1 python -m scripts.fake_openai_stream demo [--interval 1.0]
+
+Con el servidor levantado, el bot también puede usarse con ``GPT_STREAMING=true`` y
+``OPENAI_API_BASE`` apuntando a él. El cuerpo de la petición puede incluir ``"fake_reply"`` para
+forzar el texto devuelto (útil para comprobar el filtro de recomendaciones).
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+DEFAULT_REPLY = ("¡Claro! Nuestro horario de atención es de lunes a sábado de 7:00 a 19:00. "
+                 "Si necesitas algo más, aquí estoy para ayudarte.")
+
+
+def create_app(delay: float):
+    from fastapi import FastAPI, Request
+    from fastapi.responses import StreamingResponse
+
+    app = FastAPI()
+
+    def _chunk(delta: dict, finish_reason=None) -> str:
+        payload = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": "gpt-3.5-turbo",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        reply = body.get("fake_reply", DEFAULT_REPLY)
+
+        async def events():
+            yield _chunk({"role": "assistant"})
+            for word in reply.split(" "):
+                await asyncio.sleep(delay)
+                yield _chunk({"content": word + " "})
+            yield _chunk({}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+class ConsoleMessage:
+    """Sustituto de ``telegram.Message`` que imprime las ediciones en consola."""
+
+    def __init__(self, text: str = "", message_id: int = 1):
+        self.text = text
+        self.message_id = message_id
+        self._start = time.monotonic()
+
+    async def reply_text(self, text: str):
+        print(f"[{time.monotonic() - self._start:6.2f}s] send: {text}")
+        return ConsoleMessage(text, self.message_id + 1)
+
+    async def edit_text(self, text: str):
+        print(f"[{time.monotonic() - self._start:6.2f}s] edit: {text}")
+        self.text = text
+        return self
+
+
+async def run_demo(interval: float, reply: str = None):
+    import openai
+
+    from app.GPT.streaming import stream_gpt_response
+
+    openai.api_key = os.getenv("OPENAI_API_KEY", "fake-key")
+    openai.api_base = os.getenv("OPENAI_API_BASE", "http://127.0.0.1:8099/v1")
+    extra = {"fake_reply": reply} if reply else {}
+    text, _ = await stream_gpt_response(ConsoleMessage(), [{"role": "user", "content": "hola"}], interval,
+                                        model="gpt-3.5-turbo", max_tokens=150, **extra)
+    print(f"final: {text!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve = subparsers.add_parser("serve")
+    serve.add_argument("--port", type=int, default=8099)
+    serve.add_argument("--delay", type=float, default=0.05, help="Segundos entre tokens")
+    demo = subparsers.add_parser("demo")
+    demo.add_argument("--interval", type=float, default=1.0, help="Intervalo mínimo entre ediciones")
+    demo.add_argument("--reply", help="Texto que devolverá el endpoint falso")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        import uvicorn
+
+        uvicorn.run(create_app(args.delay), host="127.0.0.1", port=args.port)
+    else:
+        asyncio.run(run_demo(args.interval, args.reply))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Genera de una vez las miniaturas JPEG de las imágenes de productos.
+
+El bot envía la miniatura (``settings.product_thumbnails_dir``) en lugar de la imagen original cuando
+existe, así que cada subida a Telegram es de unos pocos KB. Las imágenes se leen de
+``PRODUCT_IMAGES_DIR`` o, si ``Product.image`` es una URL (o hay ``PRODUCT_IMAGE_URL``), se descargan.
+Requiere Pillow (``pip install Pillow``).
+
+Uso::
+
+    python -m scripts.generate_product_thumbnails            # imágenes de Product.image (DATABASE_URL)
+    python -m scripts.generate_product_thumbnails --dir img/  # todos los ficheros de un directorio
+"""
+import argparse
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from app.config import settings
+from app.utils.media_cache import image_source, thumbnail_path
+
+DEFAULT_SIZE = 640
+DEFAULT_QUALITY = 80
+
+
+def read_image(image: str) -> bytes:
+    source = image_source(image) if not os.path.isfile(image) else image
+    if source is None:
+        raise FileNotFoundError(f"no se encuentra la imagen {image!r}")
+    if isinstance(source, str) and source.startswith(("http://", "https://")):
+        response = requests.get(source, timeout=30)
+        response.raise_for_status()
+        return response.content
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def make_thumbnail(image: str, size: int, quality: int, force: bool) -> str:
+    target = thumbnail_path(image)
+    if target.exists() and not force:
+        return "existe"
+    with Image.open(io.BytesIO(read_image(image))) as original:
+        thumbnail = original.convert("RGB")
+        thumbnail.thumbnail((size, size))
+        target.parent.mkdir(parents=True, exist_ok=True)
+        thumbnail.save(target, "JPEG", quality=quality, optimize=True)
+    return "creada"
+
+
+async def catalog_images():
+    from app.catalog_reader import catalog_reader
+    return sorted({product.image for product in await catalog_reader.all_products() if product.image})
+
+
+def main(args) -> int:
+    if Image is None:
+        print("Falta Pillow: pip install Pillow", file=sys.stderr)
+        return 1
+    if args.dir:
+        images = sorted(os.path.join(args.dir, name) for name in os.listdir(args.dir))
+    else:
+        images = asyncio.run(catalog_images())
+
+    failures = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {image: pool.submit(make_thumbnail, image, args.size, args.quality, args.force)
+                   for image in images}
+        for image, future in futures.items():
+            try:
+                print(f"{future.result():<7} {image}")
+            except Exception as e:
+                failures += 1
+                print(f"error   {image}: {e}", file=sys.stderr)
+    print(f"{len(images) - failures} miniaturas en {settings.product_thumbnails_dir}, {failures} errores")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", help="Directorio de imágenes (por defecto, las del catálogo)")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="Lado mayor en píxeles")
+    parser.add_argument("--quality", type=int, default=DEFAULT_QUALITY, help="Calidad JPEG")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--force", action="store_true", help="Regenerar las miniaturas existentes")
+    sys.exit(main(parser.parse_args()))
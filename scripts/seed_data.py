@@ -0,0 +1,78 @@
+"""Base de datos de pruebas con datos sintéticos para los scripts de comprobación.
+
+``temporary_schema`` crea un esquema de PostgreSQL desechable, aplica las migraciones y devuelve un
+engine cuyo ``search_path`` apunta a él; ``seed`` lo llena con un catálogo, pedidos y valoraciones
+de tamaño configurable. Las primeras categorías son las que esperan los manejadores del bot.
+"""
+import contextlib
+import os
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.migrations import run_migrations  # noqa: E402
+
+# El orden importa: los manejadores usan ids fijos (1 = Bebidas, 2 = Bebidas Deportivas...)
+CATEGORY_NAMES = ["Bebidas", "Bebidas Deportivas", "Desayunos", "Entradas", "Segundos", "Snacks"]
+
+DEFAULT_SIZES = {"categories": 50, "products": 50_000, "orders": 100_000, "order_products": 500_000,
+                 "recommendations": 50_000}
+
+SEED_STATEMENTS = [
+    'INSERT INTO "Category" (id, name, slug) '
+    "SELECT i, coalesce((ARRAY[{category_names}])[i], 'Categoria ' || i), 'categoria-' || i "
+    "FROM generate_series(1, {categories}) AS i",
+    'INSERT INTO "Product" (id, name, price, stock, "categoryId") '
+    "SELECT i, 'Producto ' || md5(i::text), (random() * 20)::numeric(10, 2), (random() * 100)::int, "
+    "1 + i % {categories} FROM generate_series(1, {products}) AS i",
+    "INSERT INTO orders (id) SELECT i FROM generate_series(1, {orders}) AS i",
+    'INSERT INTO "OrderProducts" (id, "orderId", "productId", quantity) '
+    "SELECT i, 1 + i % {orders}, 1 + (random() * ({products} - 1))::int, 1 + (random() * 4)::int "
+    "FROM generate_series(1, {order_products}) AS i",
+    'INSERT INTO "Recommendation" ("userName", rating, comment, "createdAt") '
+    "SELECT 'usuario' || i, 1 + i % 5, 'comentario', now() - i * interval '1 minute' "
+    "FROM generate_series(1, {recommendations}) AS i",
+    'ANALYZE "Category", "Product", orders, "OrderProducts", "Recommendation"',
+]
+
+
+@contextlib.asynccontextmanager
+async def temporary_schema(database_url: str, schema: str, keep: bool = False):
+    """Esquema vacío con las migraciones aplicadas; se borra al salir salvo con ``keep``."""
+    admin_engine = create_async_engine(database_url)
+    async with admin_engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {schema}"))
+
+    engine = create_async_engine(database_url, connect_args={"server_settings": {"search_path": f"{schema},public"}})
+    try:
+        await run_migrations(engine)
+        yield engine
+    finally:
+        await engine.dispose()
+        if not keep:
+            async with admin_engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await admin_engine.dispose()
+
+
+async def seed(engine, **sizes) -> None:
+    values = {**DEFAULT_SIZES, **sizes}
+    values["category_names"] = ", ".join(f"'{name}'" for name in CATEGORY_NAMES)
+    async with engine.begin() as conn:
+        for statement in SEED_STATEMENTS:
+            await conn.exec_driver_sql(statement.format(**values))
+
+
+def add_size_arguments(parser, **defaults) -> None:
+    """Añade a un ``argparse`` las opciones de tamaño del conjunto de datos."""
+    sizes = {**DEFAULT_SIZES, **defaults}
+    for name, default in sizes.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default)
+
+
+def sizes_from_args(args) -> dict:
+    return {name: getattr(args, name) for name in DEFAULT_SIZES}
@@ -0,0 +1,190 @@
+"""Entrena el clasificador local de intenciones y lo serializa en ``app/GPT/intent_model.json``.
+
+Los ejemplos se generan expandiendo los patrones de ``app.GPT.patterns`` y, si hay acceso a la
+base de datos (o se pasa ``--catalog``), añadiendo los nombres de categorías y productos.
+
+Uso::
+
+    python -m scripts.train_intent_classifier                  # catálogo desde DATABASE_URL
+    python -m scripts.train_intent_classifier --catalog c.json  # {"categories": [...], "products": [...]}
+    python -m scripts.train_intent_classifier --no-db          # sólo patrones
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+from app.GPT.intent_classifier import IntentClassifier
+from app.GPT.patterns import INTENT_PATTERNS, CATEGORY_KEYWORDS, PRODUCT_BY_NAME_CATEGORY_PATTERNS
+
+DEFAULT_MODEL_PATH = os.path.join("app", "GPT", "intent_model.json")
+DEFAULT_THRESHOLD = 0.35
+MAX_EXPANSIONS_PER_PATTERN = 40
+SEED = 13
+
+_WHITESPACE = {sre_constants.CATEGORY_SPACE}
+_FREE_CATEGORIES = {sre_constants.CATEGORY_WORD, sre_constants.CATEGORY_DIGIT}
+
+
+def _is_free(nodes) -> bool:
+    """Indica si un grupo captura texto libre (``\\w+``, ``.*``) que hay que rellenar con valores."""
+    for op, av in nodes:
+        if op is sre_constants.ANY:
+            return True
+        if op is sre_constants.IN and any(o is sre_constants.CATEGORY and a in _FREE_CATEGORIES for o, a in av):
+            return True
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and _is_free(av[2]):
+            return True
+        if op is sre_constants.SUBPATTERN and _is_free(av[-1]):
+            return True
+        if op is sre_constants.BRANCH and any(_is_free(branch) for branch in av[1]):
+            return True
+    return False
+
+
+def _expand(nodes, slot_values):
+    """Enumera las cadenas que acepta una secuencia de nodos del parser de ``re``.
+
+    Devuelve una lista de tuplas ``(texto, captura)`` donde captura es el texto del primer grupo.
+    """
+    results = [("", None)]
+    for op, av in nodes:
+        options = _expand_node(op, av, slot_values)
+        results = [(prefix + text, capture or cap)
+                   for (prefix, capture), (text, cap) in itertools.product(results, options)]
+        if len(results) > MAX_EXPANSIONS_PER_PATTERN * 4:
+            results = random.Random(SEED).sample(results, MAX_EXPANSIONS_PER_PATTERN * 4)
+    return results
+
+
+def _expand_node(op, av, slot_values):
+    if op is sre_constants.LITERAL:
+        return [(chr(av), None)]
+    if op is sre_constants.IN:
+        literals = [chr(a) for o, a in av if o is sre_constants.LITERAL]
+        if literals:
+            return [(ch, None) for ch in dict.fromkeys(ch.lower() for ch in literals)]
+        if any(o is sre_constants.CATEGORY and a in _WHITESPACE for o, a in av):
+            return [(" ", None)]
+        return [("", None)]
+    if op is sre_constants.BRANCH:
+        return [option for branch in av[1] for option in _expand(branch, slot_values)]
+    if op is sre_constants.SUBPATTERN:
+        group, nodes = av[0], av[-1]
+        if group is not None and _is_free(nodes):
+            return [(value, value) for value in slot_values]
+        options = _expand(nodes, slot_values)
+        if group is not None:
+            return [(text, text) for text, _ in options]
+        return options
+    if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+        low, high, nodes = av
+        inner = _expand(nodes, slot_values)
+        if low == 0 and high == 1:
+            return [("", None)] + inner
+        if _is_free(nodes):
+            return [(value, value) for value in slot_values]
+        return [(text * max(low, 1), cap) for text, cap in inner]
+    # AT (\b), ASSERT_NOT (?!...) y similares no consumen texto
+    return [("", None)]
+
+
+def expand_pattern(pattern: str, slot_values=()) -> list:
+    """Genera frases de ejemplo a partir de un patrón. Devuelve ``[(frase, captura)]``."""
+    parsed = sre_parse.parse(pattern)
+    if _is_free(list(parsed)) and not slot_values:
+        return []
+    expansions = {}
+    for text, capture in _expand(list(parsed), list(slot_values)):
+        text = " ".join(text.split())
+        if text:
+            expansions.setdefault(text, capture)
+    items = sorted(expansions.items())
+    if len(items) > MAX_EXPANSIONS_PER_PATTERN:
+        items = random.Random(SEED).sample(items, MAX_EXPANSIONS_PER_PATTERN)
+    return items
+
+
+def _category_for(word: str):
+    word = (word or "").strip().lower()
+    for candidate in (word, word[:-1] if word.endswith("s") else word):
+        if candidate in CATEGORY_KEYWORDS:
+            return CATEGORY_KEYWORDS[candidate]
+    return None
+
+
+def build_examples(categories=(), products=()) -> list:
+    """Construye los ejemplos ``(texto, label, payload)`` de entrenamiento."""
+    examples = []
+    for label, patterns in INTENT_PATTERNS.items():
+        for pattern in patterns:
+            examples.extend((text, label, None) for text, _ in expand_pattern(pattern))
+
+    # Categorías: palabras clave y frases de los patrones de categoría rellenadas con esas palabras
+    category_words = list(CATEGORY_KEYWORDS) + [name.lower() for name in categories]
+    for keyword, category in CATEGORY_KEYWORDS.items():
+        examples.append((keyword, "category", category))
+    for name in categories:
+        examples.append((name, "category", name))
+    for pattern in PRODUCT_BY_NAME_CATEGORY_PATTERNS:
+        for text, capture in expand_pattern(pattern, category_words):
+            category = _category_for(capture) or next((c for c in categories if c.lower() == capture), None)
+            if category:
+                examples.append((text, "category", category))
+
+    # Productos: el propio nombre del catálogo es el ejemplo
+    for name in products:
+        examples.append((name, "product", name))
+    return examples
+
+
+async def _load_catalog_from_db():
+    from sqlalchemy import select
+
+    from app.database import SessionLocal, get_engine
+    from app.models import Category, Product
+
+    get_engine()  # Crea el engine y enlaza SessionLocal
+    async with SessionLocal() as session:
+        async with session.begin():
+            categories = (await session.execute(select(Category.name))).scalars().all()
+            products = (await session.execute(select(Product.name))).scalars().all()
+    return list(categories), list(products)
+
+
+def load_catalog(args):
+    if args.no_db:
+        return [], []
+    if args.catalog:
+        with open(args.catalog, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("categories", []), data.get("products", [])
+    return asyncio.run(_load_catalog_from_db())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--catalog", help="JSON con las listas 'categories' y 'products'")
+    parser.add_argument("--no-db", action="store_true", help="Entrenar sólo con los patrones")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    categories, products = load_catalog(args)
+    examples = build_examples(categories, products)
+    classifier = IntentClassifier.train(examples, threshold=args.threshold)
+    classifier.save(args.output)
+    print(f"{len(examples)} ejemplos, {len(classifier.classes)} clases, "
+          f"{len(classifier.idf)} n-gramas -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()